@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 浏览器驱动创建
+一级、二级爬虫共用的 WebDriver 初始化：依次尝试 Selenium Manager Chrome、本地 chromedriver、Edge，
+并缓存本机可用的后端，之后直接启动，失败时才重新探测
+"""
+
+import json
+import os
+import shutil
+import socket
+import time
+import logging
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.chrome.service import Service as ChromeService
+from selenium.webdriver.edge.options import Options as EdgeOptions
+from selenium.webdriver.edge.service import Service as EdgeService
+
+logger = logging.getLogger(__name__)
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+PAGE_LOAD_TIMEOUT = 30
+# 持久化浏览器用户数据目录的根目录（每个 worker 独占其中一个 worker-<n> 子目录）
+PROFILE_ROOT = os.path.join('data_BAI_DU', '_browser', 'profiles')
+# 本机探测成功的浏览器后端缓存（按主机名区分，可被多个 worker 共享）
+BACKEND_CACHE_FILE = os.environ.get('BROWSER_BACKEND_CACHE', os.path.join('data_BAI_DU', '_browser', 'backend.json'))
+
+
+
+def _try_lock(fh):
+    try:
+        if os.name == 'nt':
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+
+def _unlock(fh):
+    try:
+        if os.name == 'nt':
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+def _dir_size_mb(path):
+    total = 0
+    for dirpath, _dirnames, filenames in os.walk(path):
+        for name in filenames:
+            try:
+                total += os.path.getsize(os.path.join(dirpath, name))
+            except OSError:
+                continue
+    return total / 1024 / 1024
+
+
+class ProfileSlot:
+    """
+    持久化用户数据目录的独占槽位：root/worker-<n>
+    同一目录不能被两个浏览器同时使用，这里用操作系统文件锁（进程退出时自动释放，崩溃不会留下死锁）
+    选出第一个空闲槽位；目录总大小超过 max_profile_mb 时清空重建
+    """
+
+    def __init__(self, root=PROFILE_ROOT, max_slots=32, max_profile_mb=2048):
+        self.root = root
+        self.max_slots = max_slots
+        self.max_profile_mb = max_profile_mb
+        self.path = None
+        self._fh = None
+
+    def acquire(self):
+        if self.path:
+            return self.path
+        os.makedirs(self.root, exist_ok=True)
+        for slot in range(self.max_slots):
+            fh = open(os.path.join(self.root, f'worker-{slot}.lock'), 'a+')
+            if not _try_lock(fh):
+                fh.close()
+                continue
+            self._fh = fh
+            self.path = os.path.join(self.root, f'worker-{slot}')
+            self._prepare()
+            logger.info(f"使用持久化浏览器目录: {self.path}")
+            return self.path
+        raise RuntimeError(f"{self.root} 下 {self.max_slots} 个浏览器目录均被占用")
+
+    def _prepare(self):
+        if os.path.isdir(self.path) and self.max_profile_mb and _dir_size_mb(self.path) > self.max_profile_mb:
+            logger.info(f"浏览器目录超过 {self.max_profile_mb} MB，清空重建: {self.path}")
+            shutil.rmtree(self.path, ignore_errors=True)
+        os.makedirs(self.path, exist_ok=True)
+        # 已持有槽位锁，之前崩溃的浏览器留下的单例锁可以安全删除
+        for name in ('SingletonLock', 'SingletonSocket', 'SingletonCookie', 'lockfile'):
+            try:
+                os.remove(os.path.join(self.path, name))
+            except OSError:
+                pass
+
+    def release(self):
+        if self._fh is not None:
+            _unlock(self._fh)
+            self._fh.close()
+        self._fh = None
+        self.path = None
+
+
+def _profile_arguments(profile_dir, cache_mb):
+    """持久化用户数据目录 + 磁盘缓存（大小上限 cache_mb）"""
+    if not profile_dir:
+        return []
+    profile_dir = os.path.abspath(profile_dir)
+    args = [f'--user-data-dir={profile_dir}', f'--disk-cache-dir={os.path.join(profile_dir, "cache")}']
+    if cache_mb:
+        args.append(f'--disk-cache-size={int(cache_mb) * 1024 * 1024}')
+    return args
+
+
+def _chrome_options(profile_dir=None, cache_mb=None):
+    chrome_options = Options()
+    chrome_options.add_argument('--headless')
+    chrome_options.add_argument('--no-sandbox')
+    chrome_options.add_argument('--disable-dev-shm-usage')
+    chrome_options.add_argument('--disable-gpu')
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-logging')
+    chrome_options.add_argument('--disable-web-security')
+    chrome_options.add_argument('--window-size=1920,1080')
+    chrome_options.add_argument(f'--user-agent={USER_AGENT}')
+    for arg in _profile_arguments(profile_dir, cache_mb):
+        chrome_options.add_argument(arg)
+    return chrome_options
+
+
+def _edge_options(profile_dir=None, cache_mb=None):
+    edge_options = EdgeOptions()
+    edge_options.use_chromium = True
+    edge_options.add_argument('--headless')
+    edge_options.add_argument('--no-sandbox')
+    edge_options.add_argument('--disable-dev-shm-usage')
+    edge_options.add_argument('--disable-gpu')
+    edge_options.add_argument('--disable-extensions')
+    edge_options.add_argument('--disable-logging')
+    edge_options.add_argument('--disable-web-security')
+    edge_options.add_argument('--window-size=1920,1080')
+    for arg in _profile_arguments(profile_dir, cache_mb):
+        edge_options.add_argument(arg)
+    return edge_options
+
+
+def _launch(backend, driver_path=None, profile_dir=None, cache_mb=None):
+    """按指定后端启动驱动；driver_path 为已解析的驱动路径时跳过 Selenium Manager 的查找"""
+    if backend == 'edge':
+        kwargs = {'service': EdgeService(driver_path)} if driver_path else {}
+        driver = webdriver.Edge(options=_edge_options(profile_dir, cache_mb), **kwargs)
+    else:
+        kwargs = {'service': ChromeService(driver_path)} if driver_path else {}
+        driver = webdriver.Chrome(options=_chrome_options(profile_dir, cache_mb), **kwargs)
+    driver.set_page_load_timeout(PAGE_LOAD_TIMEOUT)
+    return driver
+
+
+def _backend_key():
+    return socket.gethostname()
+
+
+def load_backend_cache(path=None):
+    try:
+        with open(path or BACKEND_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _write_backend_cache(cache, path=None):
+    path = path or BACKEND_CACHE_FILE
+    try:
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(cache, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.warning(f"写入浏览器后端缓存失败: {e}")
+
+
+def _remember_backend(backend, driver):
+    """记录本机可用的后端、解析后的驱动路径和浏览器版本"""
+    caps = getattr(driver, 'capabilities', None) or {}
+    try:
+        driver_path = driver.service.path
+    except Exception:
+        driver_path = None
+    cache = load_backend_cache()
+    cache[_backend_key()] = {
+        'backend': backend,
+        'driver_path': driver_path,
+        'browser_name': caps.get('browserName', ''),
+        'browser_version': caps.get('browserVersion', ''),
+        'updated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+    }
+    _write_backend_cache(cache)
+
+
+def forget_backend():
+    cache = load_backend_cache()
+    if cache.pop(_backend_key(), None) is not None:
+        _write_backend_cache(cache)
+
+
+def _launch_cached(profile_dir=None, cache_mb=None):
+    """直接启动缓存的后端；失败（如浏览器升级后驱动不匹配）时清除缓存并返回 None"""
+    entry = load_backend_cache().get(_backend_key())
+    if not entry:
+        return None
+    driver_path = entry.get('driver_path')
+    if driver_path and not os.path.exists(driver_path):
+        driver_path = None
+    try:
+        logger.info(f"使用缓存的浏览器后端: {entry['backend']} {entry.get('browser_version', '')}")
+        driver = _launch(entry['backend'], driver_path, profile_dir, cache_mb)
+    except Exception as e:
+        logger.warning(f"缓存的浏览器后端 {entry.get('backend')} 启动失败，重新探测: {e}")
+        forget_backend()
+        return None
+    version = (getattr(driver, 'capabilities', None) or {}).get('browserVersion', '')
+    if version != entry.get('browser_version') or driver_path != entry.get('driver_path'):
+        _remember_backend(entry['backend'], driver)
+    return driver
+
+
+def create_driver(use_cache=True, profile_dir=None, cache_mb=None):
+    """
+    创建 WebDriver，全部方案失败时返回 None
+    use_cache 时优先使用本机上次探测成功的后端（按主机名缓存到 BACKEND_CACHE_FILE，记录驱动路径与浏览器版本），
+    只有缓存缺失或启动失败时才按 Chrome → CHROMEDRIVER_PATH → Edge 的顺序重新探测
+    profile_dir 指定持久化用户数据目录（调用方需先通过 ProfileSlot 独占该目录），cache_mb 为磁盘缓存上限
+    """
+    if use_cache:
+        driver = _launch_cached(profile_dir, cache_mb)
+        if driver is not None:
+            return driver
+    try:
+        # 优先尝试：Selenium Manager（不下载第三方依赖）
+        try:
+            logger.info("正在初始化Chrome（Selenium Manager）...")
+            driver = _launch('chrome', None, profile_dir, cache_mb)
+            logger.info("Selenium WebDriver 初始化成功 (Chrome)")
+            _remember_backend('chrome', driver)
+            return driver
+        except Exception as e1:
+            logger.warning(f"Chrome (Selenium Manager) 初始化失败: {e1}")
+
+        # 备用方案：本地驱动（不进行网络下载）
+        try:
+            logger.info("尝试使用本地chromedriver（跳过网络下载）...")
+            os.environ['WDM_LOCAL'] = '1'  # 禁止webdriver-manager联网下载，若无本地缓存将快速失败
+            chromedriver_path = os.environ.get('CHROMEDRIVER_PATH', '')
+            if chromedriver_path and os.path.exists(chromedriver_path):
+                logger.info(f"使用环境变量CHROMEDRIVER_PATH: {chromedriver_path}")
+                driver = _launch('chromedriver', chromedriver_path, profile_dir, cache_mb)
+                logger.info("Selenium WebDriver 初始化成功 (本地chromedriver)")
+                _remember_backend('chromedriver', driver)
+                return driver
+        except Exception as e2:
+            logger.warning(f"本地chromedriver 初始化失败: {e2}")
+
+        # 最后备用：Microsoft Edge（Windows更易可用）
+        try:
+            logger.info("尝试使用Edge WebDriver 初始化...")
+            driver = _launch('edge', None, profile_dir, cache_mb)
+            logger.info("Selenium WebDriver 初始化成功 (Edge)")
+            _remember_backend('edge', driver)
+            return driver
+        except Exception as e3:
+            logger.error(f"Edge 初始化失败: {e3}")
+
+        # 全部失败
+        raise RuntimeError("无法初始化任何浏览器驱动。请安装 Chrome/Edge 或提供 CHROMEDRIVER_PATH。")
+    except Exception as e:
+        logger.error(f"Selenium WebDriver 初始化失败: {e}")
+        logger.error("请确保已安装Chrome浏览器和ChromeDriver")
+        return None
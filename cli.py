@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 统一命令行入口
+子命令：scrape / batch / queue / scan-ids / translate / stats
+Selenium、pandas、transformers 等重依赖只在对应子命令需要时才导入，stats 等维护命令可以毫秒级启动
+
+    python cli.py scrape <url> -o data/Cheating --csv-name Cheating.csv
+    python cli.py batch result_2025-05-01_to_2025-09-11.csv --start-row 2 --end-row 100
+    python cli.py queue add result_2025-05-01_to_2025-09-11.csv --db /shared/queue.db
+    python cli.py batch --queue /shared/queue.db
+    python cli.py scan-ids --start-id 592000 --end-id 600000 --workers 15
+    python cli.py translate -- --input valid_record_ids.csv --start-date 2025-05-01
+    python cli.py stats data_BAI_DU/141 data_BAI_DU/142
+    python cli.py --import-time stats --root data_BAI_DU
+    python cli.py stats --batch-status
+"""
+
+import argparse
+import importlib
+import os
+import sys
+import time
+
+_START = time.perf_counter()
+_show_import_time = False
+
+
+def _load(module_name):
+    """按需导入模块；开启 --import-time 时打印导入耗时"""
+    if module_name in sys.modules:
+        return sys.modules[module_name]
+    t0 = time.perf_counter()
+    module = importlib.import_module(module_name)
+    if _show_import_time:
+        elapsed = (time.perf_counter() - t0) * 1000
+        since_start = (time.perf_counter() - _START) * 1000
+        print(f"⏱️ 导入 {module_name}: {elapsed:.1f} ms（启动至今 {since_start:.1f} ms）", file=sys.stderr)
+    return module
+
+
+def cmd_scrape(args):
+    main = _load('main')
+    csv_name = args.csv_name or f"{os.path.basename(os.path.normpath(args.output_dir))}.csv"
+    main.run_full_scrape(args.url, args.output_dir, csv_name)
+
+
+def cmd_batch(args):
+    if not args.csv and not args.queue:
+        raise SystemExit('batch 需要指定CSV文件或 --queue')
+    main = _load('main')
+    main.run_batch(args.csv, max(args.start_row, 2), args.end_row, order=args.order, budget=args.budget,
+                   metrics_dir=args.metrics_dir or None, profile=args.profile, profile_rows=args.profile_rows,
+                   reuse_driver=not args.no_reuse_driver, recycle_pages=args.recycle_pages,
+                   recycle_rss_mb=args.recycle_rss_mb, recycle_errors=args.recycle_errors,
+                   browser_profile=args.browser_profile, browser_cache_mb=args.browser_cache_mb,
+                   queue_db=args.queue, lease_seconds=args.lease_seconds,
+                   row_timeout=args.row_timeout, page_timeout=args.page_timeout)
+
+
+def cmd_queue(args):
+    work_queue = _load('work_queue')
+    if args.action == 'add':
+        if not args.csv:
+            raise SystemExit('queue add 需要指定CSV文件')
+        added = work_queue.WorkQueue(args.db).add_csv(args.csv, max(args.start_row, 2), args.end_row,
+                                                      order=args.order, budget=args.budget)
+        print(f"✅ 新加入 {added} 行")
+    elif args.action == 'requeue':
+        count = work_queue.WorkQueue(args.db).requeue(tuple(args.status))
+        print(f"🔄 已重新排队 {count} 行")
+    work_queue.print_queue_status(args.db)
+
+
+def cmd_scan_ids(args):
+    checker_module = _load('test')  # RecordIdChecker 定义在 test.py 中
+    checker = checker_module.RecordIdChecker(args.output)
+    checker.batch_check(start_id=args.start_id, end_id=args.end_id, max_workers=args.workers,
+                        use_parallel=args.workers > 1, batch_size=args.batch_size)
+
+
+def cmd_translate(args):
+    filter_translate_csv = _load('filter_translate_csv')
+    argv = args.translate_args
+    if argv and argv[0] == '--':
+        argv = argv[1:]
+    filter_translate_csv.main(argv)
+
+
+def _row_stats(data_dir):
+    """读取单个输出目录的统计（只解析JSON，不导入pandas）"""
+    data_manager = _load('data_manager')
+    return data_manager.DataManager(data_dir).get_statistics()
+
+
+def cmd_stats(args):
+    if args.batch_status:
+        _load('progress').print_status(args.batch_status)
+        return
+    dirs = list(args.dirs)
+    if args.root:
+        dirs.extend(
+            os.path.join(args.root, name) for name in sorted(os.listdir(args.root))
+            if not name.startswith('_') and os.path.isdir(os.path.join(args.root, name))
+        )
+    if not dirs:
+        dirs = ['data']
+
+    totals = {'dirs': 0, 'total_sub_events': 0, 'total_comments': 0, 'events_with_comments': 0}
+    for data_dir in dirs:
+        if not os.path.isdir(data_dir):
+            print(f"❌ {data_dir} (不存在)")
+            continue
+        stats = _row_stats(data_dir)
+        totals['dirs'] += 1
+        for key in ('total_sub_events', 'total_comments', 'events_with_comments'):
+            totals[key] += stats.get(key, 0)
+        if not args.root:
+            print(f"📁 {data_dir}: 子事件 {stats.get('total_sub_events', 0)}，"
+                  f"评论 {stats.get('total_comments', 0)}，有评论的事件 {stats.get('events_with_comments', 0)}")
+    print(f"📊 目录 {totals['dirs']} 个，子事件 {totals['total_sub_events']}，"
+          f"评论 {totals['total_comments']}，有评论的事件 {totals['events_with_comments']}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description='百度事件评论爬虫命令行入口')
+    parser.add_argument('--import-time', action='store_true', help='打印各子命令依赖模块的导入耗时')
+    parser.add_argument('--log-level', default=None, help='全局日志级别（默认 LOG_LEVEL 或 INFO）')
+    parser.add_argument('--log-levels', default=None,
+                        help='按子系统设置日志级别，例如 level2_scraper=WARNING,test=DEBUG（默认 LOG_LEVELS）')
+    parser.add_argument('--log-file', default=None, help='额外写入的日志文件（默认 LOG_FILE）')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('scrape', help='爬取单个核心事件（一级 + 二级）')
+    p.add_argument('url', help='事件时间线页面URL')
+    p.add_argument('--output-dir', '-o', default='data', help='输出目录')
+    p.add_argument('--csv-name', default=None, help='评论CSV文件名（默认取输出目录名）')
+    p.set_defaults(func=cmd_scrape)
+
+    p = sub.add_parser('batch', help='按CSV的url列批量爬取')
+    p.add_argument('csv', nargs='?', default=None, help='包含 url 列的CSV文件（使用 --queue 且队列已有任务时可省略）')
+    p.add_argument('--start-row', type=int, default=2, help='起始行号（>=2）')
+    p.add_argument('--end-row', type=int, default=None, help='结束行号（包含该行）')
+    p.add_argument('--order', choices=['file', 'priority'], default='file', help='处理顺序')
+    p.add_argument('--budget', type=int, default=None, help='最多处理的行数')
+    p.add_argument('--metrics-dir', default=os.path.join('data_BAI_DU', '_metrics'),
+                   help='分阶段耗时 JSONL/Prometheus 快照目录，留空则不落盘')
+    p.add_argument('--profile', action='store_true', help='逐行采集 cProfile 与 tracemalloc 报告')
+    p.add_argument('--profile-rows', type=int, default=None, help='只剖析前N行（隐含 --profile）')
+    p.add_argument('--no-reuse-driver', action='store_true', help='每行重新启动浏览器（不跨行复用会话）')
+    p.add_argument('--recycle-pages', type=int, default=50, help='复用会话累计加载N个页面后回收')
+    p.add_argument('--recycle-rss-mb', type=int, default=1500, help='浏览器进程树内存超过N MB时回收（需要psutil）')
+    p.add_argument('--recycle-errors', type=int, default=3, help='连续N次页面加载失败后回收')
+    p.add_argument('--browser-profile', nargs='?', const=os.path.join('data_BAI_DU', '_browser', 'profiles'), default=None,
+                   help='使用持久化浏览器目录和磁盘缓存（可指定根目录，每个worker独占一个子目录）')
+    p.add_argument('--browser-cache-mb', type=int, default=512, help='持久化浏览器磁盘缓存上限（MB）')
+    p.add_argument('--queue', default=None,
+                   help='共享任务队列（SQLite）路径：多个节点从同一队列以租约领取行，代替手工划分行号范围')
+    p.add_argument('--lease-seconds', type=int, default=600, help='队列租约时长（秒），处理期间自动续租')
+    p.add_argument('--row-timeout', type=int, default=3600, help='单行墙钟截止时间（秒，0 表示不限）')
+    p.add_argument('--page-timeout', type=int, default=180,
+                   help='单次页面导航（含加载更多）的截止时间（秒，0 表示不限），超时结束浏览器并跳过该行')
+    p.set_defaults(func=cmd_batch)
+
+    p = sub.add_parser('queue', help='管理多节点共享任务队列')
+    p.add_argument('action', choices=['add', 'status', 'requeue'])
+    p.add_argument('csv', nargs='?', default=None, help='add 时读取的CSV文件')
+    p.add_argument('--db', default=os.path.join('data_BAI_DU', '_queue', 'queue.db'), help='队列数据库路径')
+    p.add_argument('--start-row', type=int, default=2, help='起始行号（>=2）')
+    p.add_argument('--end-row', type=int, default=None, help='结束行号（包含该行）')
+    p.add_argument('--order', choices=['file', 'priority'], default='file', help='领取顺序')
+    p.add_argument('--budget', type=int, default=None, help='最多加入的行数')
+    p.add_argument('--status', nargs='+', default=['failed'], choices=['failed', 'done', 'leased'],
+                   help='requeue 时重新排队的状态')
+    p.set_defaults(func=cmd_queue)
+
+    p = sub.add_parser('scan-ids', help='批量检测有效的 record_id')
+    p.add_argument('--start-id', type=int, required=True)
+    p.add_argument('--end-id', type=int, required=True)
+    p.add_argument('--workers', type=int, default=15, help='并行线程数；1 为串行')
+    p.add_argument('--batch-size', type=int, default=1000, help='并行模式下每批的ID数')
+    p.add_argument('--output', default='valid_record_ids.csv', help='结果CSV')
+    p.set_defaults(func=cmd_scan_ids)
+
+    p = sub.add_parser('translate', help='过滤并翻译 valid_record_ids.csv（其余参数原样传给 filter_translate_csv）')
+    p.add_argument('translate_args', nargs=argparse.REMAINDER)
+    p.set_defaults(func=cmd_translate)
+
+    p = sub.add_parser('stats', help='查看输出目录的数据统计')
+    p.add_argument('dirs', nargs='*', help='输出目录（默认 data）')
+    p.add_argument('--root', default=None, help='汇总该目录下所有子目录，例如 data_BAI_DU')
+    p.add_argument('--batch-status', nargs='?', const=os.path.join('data_BAI_DU', '_status'), default=None,
+                   help='显示批量任务各 worker 的进度状态（默认读取 data_BAI_DU/_status）')
+    p.set_defaults(func=cmd_stats)
+    return parser
+
+
+def main(argv=None):
+    global _show_import_time
+    args = build_parser().parse_args(argv)
+    _show_import_time = args.import_time
+    _load('log_config').setup_logging(args.log_level, args.log_levels, args.log_file)
+    args.func(args)
+    if _show_import_time:
+        print(f"⏱️ 总耗时 {(time.perf_counter() - _START) * 1000:.1f} ms", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
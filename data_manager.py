@@ -8,19 +8,22 @@
 import json
 import time
 import os
-import pandas as pd
 from datetime import datetime
 import logging
+from records import flatten_normalized
+import storage
+from log_config import setup_logging
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# 日志由入口通过 log_config.setup_logging() 统一配置
 logger = logging.getLogger(__name__)
 
 class DataManager:
-    def __init__(self, output_dir: str = 'data'):
+    def __init__(self, output_dir: str = 'data', storage_mode: str = None):
         self.data_dir = output_dir or 'data'
+        self.storage_mode = storage_mode or storage.STORAGE_MODE
         self.level1_file = os.path.join(self.data_dir, 'level1_data.json')
         self.level2_file = os.path.join(self.data_dir, 'level2_data.json')
+        self.level2_normalized_file = os.path.join(self.data_dir, 'level2_normalized.json')
         self.combined_file = os.path.join(self.data_dir, 'combined_data.json')
         self.csv_file = os.path.join(self.data_dir, 'comments_data.csv')
         self._ensure_data_dir()
@@ -41,10 +44,9 @@ class DataManager:
                 'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S')
             }
             
-            with open(self.level1_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            path = storage.dump_json(self.level1_file, data, self.storage_mode)
             
-            logger.info(f"一级界面数据已保存到: {self.level1_file}")
+            logger.info(f"一级界面数据已保存到: {path}")
             return True
         except Exception as e:
             logger.error(f"保存一级界面数据失败: {e}")
@@ -59,10 +61,9 @@ class DataManager:
                 'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S')
             }
             
-            with open(self.level2_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            path = storage.dump_json(self.level2_file, data, self.storage_mode)
             
-            logger.info(f"二级界面数据已保存到: {self.level2_file}")
+            logger.info(f"二级界面数据已保存到: {path}")
             return True
         except Exception as e:
             logger.error(f"保存二级界面数据失败: {e}")
@@ -71,27 +72,45 @@ class DataManager:
     def load_level1_data(self):
         """加载一级界面数据"""
         try:
-            if os.path.exists(self.level1_file):
-                with open(self.level1_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            return None
+            return storage.load_json(self.level1_file)
         except Exception as e:
             logger.error(f"加载一级界面数据失败: {e}")
             return None
     
     def load_level2_data(self):
-        """加载二级界面数据"""
+        """加载二级界面数据；只有规范化输出时由子事件表 + 评论表还原扁平结构"""
         try:
-            if os.path.exists(self.level2_file):
-                with open(self.level2_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
+            data = storage.load_json(self.level2_file)
+            if data is not None:
+                return data
+            normalized = self.load_level2_normalized()
+            if normalized:
+                comments = flatten_normalized(normalized)
+                return {
+                    'core_event_name': normalized.get('core_event_name', ''),
+                    'comments': comments,
+                    'total_comments': len(comments),
+                    'scrape_time': normalized.get('scrape_time', ''),
+                }
             return None
         except Exception as e:
             logger.error(f"加载二级界面数据失败: {e}")
             return None
     
+    def load_level2_normalized(self):
+        """加载规范化的二级数据（events + comments 两张表）"""
+        try:
+            return storage.load_json(self.level2_normalized_file)
+        except Exception as e:
+            logger.error(f"加载规范化二级数据失败: {e}")
+            return None
+    
     def combine_data(self):
-        """合并一级和二级数据"""
+        """
+        合并一级和二级数据
+        压缩存储模式下 combined_data.json 只是清单（核心信息、统计和各级数据文件名），
+        不再复制一份子事件和评论；完整合并结果用 load_combined_data() 读取
+        """
         try:
             level1_data = self.load_level1_data()
             level2_data = self.load_level2_data()
@@ -119,8 +138,16 @@ class DataManager:
                 }
             }
             
-            with open(self.combined_file, 'w', encoding='utf-8') as f:
-                json.dump(combined_data, f, ensure_ascii=False, indent=2)
+            if self.storage_mode != 'json':
+                del combined_data['sub_events'], combined_data['comments']
+                level2_path = storage.find(self.level2_file) or storage.find(self.level2_normalized_file)
+                combined_data['files'] = {
+                    'level1': os.path.basename(storage.find(self.level1_file)),
+                    'level2': os.path.basename(level2_path),
+                }
+            
+            # 合并文件（或清单）始终写成普通 JSON，便于直接查看
+            storage.dump_json(self.combined_file, combined_data, 'json')
             
             logger.info(f"合并数据已保存到: {self.combined_file}")
             return True
@@ -128,6 +155,21 @@ class DataManager:
             logger.error(f"合并数据失败: {e}")
             return False
     
+    def load_combined_data(self):
+        """读取合并数据；combined_data.json 为清单时按其中的文件名读取并展开子事件和评论"""
+        try:
+            combined = storage.load_json(self.combined_file)
+            if combined and 'files' in combined:
+                level1_data = self.load_level1_data() or {}
+                level2_data = self.load_level2_data() or {}
+                combined = dict(combined)
+                combined['sub_events'] = level1_data.get('sub_events', [])
+                combined['comments'] = level2_data.get('comments', [])
+            return combined
+        except Exception as e:
+            logger.error(f"加载合并数据失败: {e}")
+            return None
+    
     def export_to_csv(self):
         """导出评论数据到CSV"""
         try:
@@ -136,11 +178,13 @@ class DataManager:
                 logger.error("没有评论数据可导出")
                 return False
             
-            # 转换为DataFrame
+            # 转换为DataFrame（pandas 只在导出时导入）
+            import pandas as pd
             df = pd.DataFrame(level2_data['comments'])
             
-            # 保存为CSV
-            df.to_csv(self.csv_file, index=False, encoding='utf-8-sig')
+            # 保存为CSV（先写临时文件再替换）
+            with storage.atomic_path(self.csv_file) as tmp:
+                df.to_csv(tmp, index=False, encoding='utf-8-sig')
             
             logger.info(f"CSV数据已导出到: {self.csv_file}")
             return True
@@ -188,9 +232,10 @@ class DataManager:
         print("\n📁 数据文件:")
         files = [self.level1_file, self.level2_file, self.combined_file, self.csv_file]
         for file in files:
-            if os.path.exists(file):
-                size = os.path.getsize(file)
-                print(f"  ✅ {file} ({size} bytes)")
+            actual = storage.find(file)
+            if actual:
+                size = os.path.getsize(actual)
+                print(f"  ✅ {actual} ({size} bytes)")
             else:
                 print(f"  ❌ {file} (不存在)")
         
@@ -240,4 +285,5 @@ def main():
     dm.print_summary()
 
 if __name__ == "__main__":
+    setup_logging()
     main()
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 浏览器驱动生命周期
+批量爬取时跨行复用同一个浏览器会话，满足以下任一条件时回收重建：
+- 累计加载页面数达到 max_pages
+- 浏览器进程树（chromedriver + Chrome 全部子进程）RSS 超过 max_rss_mb
+- 连续 max_errors 次页面加载失败
+并可清理崩溃行遗留的孤儿 chromedriver / Chrome 进程（需要 psutil，已列入 requirements.txt；未安装时只按页数/错误数回收并给出警告）
+指定 profile_root 时使用独占的持久化用户数据目录和磁盘缓存，回收重建后仍命中之前缓存的静态资源和 Cookie
+"""
+
+import logging
+
+from browser import ProfileSlot, create_driver
+from metrics import stage
+from process_tree import driver_pid, kill_process_tree
+
+try:
+    import psutil
+except ImportError:  # psutil 列在 requirements.txt 中，缺失时只按页数/错误数回收
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+DRIVER_PROCESS_NAMES = ('chromedriver', 'msedgedriver')
+BROWSER_PROCESS_NAMES = ('chrome', 'chromium', 'chromium-browser', 'google-chrome', 'msedge')
+
+
+def _normalize_name(name):
+    name = (name or '').lower()
+    return name[:-4] if name.endswith('.exe') else name
+
+
+class DriverManager:
+    def __init__(self, max_pages=50, max_rss_mb=1500, max_errors=3, rss_check_every=5,
+                 profile_root=None, cache_mb=512):
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self.max_errors = max_errors
+        self.rss_check_every = rss_check_every
+        self.driver = None
+        self.pages_loaded = 0
+        self.consecutive_errors = 0
+        self.sessions_started = 0
+        self.recycles = {}
+        self._recycle_reason = None
+        self.cache_mb = cache_mb
+        self.profile = ProfileSlot(profile_root) if profile_root else None
+        if psutil is None:
+            logger.warning("未安装 psutil：不会按内存回收浏览器（--recycle-rss-mb），也不会清理孤儿浏览器进程；"
+                           "请 pip install psutil" if max_rss_mb else
+                           "未安装 psutil：不会清理孤儿浏览器进程；请 pip install psutil")
+
+    def _profile_dir(self):
+        if self.profile is None:
+            return None
+        try:
+            return self.profile.acquire()
+        except Exception as e:
+            logger.warning(f"无法获取持久化浏览器目录，改用临时目录: {e}")
+            self.profile = None
+            return None
+
+    @property
+    def driver_pid(self):
+        return driver_pid(self.driver)
+
+    def acquire(self):
+        """返回可用的驱动；需要回收时先关闭旧会话再新建，创建失败返回 None"""
+        if self.driver is not None and self._recycle_reason:
+            self.recycle(self._recycle_reason)
+        if self.driver is None:
+            with stage('driver_startup', scraper='shared'):
+                self.driver = create_driver(profile_dir=self._profile_dir(), cache_mb=self.cache_mb)
+            if self.driver is not None:
+                self.sessions_started += 1
+                self.pages_loaded = 0
+                self.consecutive_errors = 0
+                self._recycle_reason = None
+        return self.driver
+
+    def page_done(self, ok=True):
+        """每次页面加载后调用，累计页数/错误数，并在下次 acquire 时按需回收"""
+        self.pages_loaded += 1
+        self.consecutive_errors = 0 if ok else self.consecutive_errors + 1
+
+        if self.max_errors and self.consecutive_errors >= self.max_errors:
+            self._recycle_reason = 'errors'
+        elif self.max_pages and self.pages_loaded >= self.max_pages:
+            self._recycle_reason = 'pages'
+        elif (self.max_rss_mb and psutil is not None and self.rss_check_every
+              and self.pages_loaded % self.rss_check_every == 0):
+            rss = self.browser_rss_mb()
+            if rss is not None and rss > self.max_rss_mb:
+                logger.info(f"浏览器进程树内存 {rss:.0f} MB 超过 {self.max_rss_mb} MB")
+                self._recycle_reason = 'rss'
+
+    def browser_rss_mb(self):
+        """浏览器进程树的常驻内存（MB），无法获取时返回 None"""
+        pid = self.driver_pid
+        if psutil is None or pid is None:
+            return None
+        try:
+            parent = psutil.Process(pid)
+            procs = [parent] + parent.children(recursive=True)
+        except psutil.Error:
+            return None
+        total = 0
+        for proc in procs:
+            try:
+                total += proc.memory_info().rss
+            except psutil.Error:
+                continue
+        return total / 1024 / 1024
+
+    def recycle(self, reason='manual'):
+        """关闭当前会话（quit 失败时强制结束进程树），下次 acquire 时重建"""
+        if self.driver is None:
+            return
+        pid = self.driver_pid
+        logger.info(f"回收浏览器会话（原因: {reason}，已加载 {self.pages_loaded} 个页面）")
+        with stage('driver_quit', reason=reason):
+            try:
+                self.driver.quit()
+            except Exception as e:
+                logger.warning(f"driver.quit() 失败，强制结束进程树: {e}")
+            if pid is not None:
+                kill_process_tree(pid)
+        self.driver = None
+        self._recycle_reason = None
+        self.recycles[reason] = self.recycles.get(reason, 0) + 1
+
+    def reap_orphans(self):
+        """
+        清理当前用户下的孤儿驱动/浏览器进程：父进程已不存在（或已被 init 收养）的 chromedriver，
+        以及父进程不是驱动的 WebDriver 浏览器主进程。返回结束的进程数
+        """
+        if psutil is None:
+            logger.debug("未安装 psutil，跳过孤儿浏览器进程清理")
+            return 0
+        try:
+            me = psutil.Process()
+            username = me.username()
+        except psutil.Error:
+            return 0
+        own_pid = self.driver_pid
+        killed = 0
+        for proc in psutil.process_iter(['pid', 'ppid', 'name', 'username', 'cmdline']):
+            try:
+                if proc.info['username'] != username or proc.info['pid'] in (me.pid, own_pid):
+                    continue
+                name = _normalize_name(proc.info['name'])
+                ppid = proc.info['ppid']
+                orphaned = ppid in (0, 1) or not psutil.pid_exists(ppid)
+                if name in DRIVER_PROCESS_NAMES and orphaned:
+                    killed += kill_process_tree(proc.info['pid'])
+                elif name in BROWSER_PROCESS_NAMES:
+                    cmdline = ' '.join(proc.info['cmdline'] or [])
+                    # 只处理由 WebDriver 启动的浏览器主进程（渲染/GPU 等子进程随主进程一起结束）
+                    if '--test-type=webdriver' not in cmdline or '--type=' in cmdline:
+                        continue
+                    parent_name = _normalize_name(psutil.Process(ppid).name()) if not orphaned else ''
+                    if orphaned or parent_name not in DRIVER_PROCESS_NAMES:
+                        killed += kill_process_tree(proc.info['pid'])
+            except psutil.Error:
+                continue
+        if killed:
+            logger.info(f"已清理 {killed} 个孤儿浏览器/驱动进程")
+        return killed
+
+    def stats(self):
+        return {
+            'sessions_started': self.sessions_started,
+            'pages_loaded': self.pages_loaded,
+            'recycles': dict(self.recycles),
+            'rss_mb': self.browser_rss_mb(),
+        }
+
+    def close(self):
+        if self.driver is not None:
+            self.recycle('close')
+        if self.profile is not None:
+            self.profile.release()
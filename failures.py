@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 失败分类与延迟重试
+把页面/行级失败归为几类，可重试的放入 RetryQueue，在主流程跑完后按指数退避重试，
+瞬时错误既不拖慢主流程，也不会被当成“无评论”写进结果：
+- timeout: 页面加载/看门狗超时
+- driver_crash: 浏览器或驱动进程失联
+- blocked: 被重定向到百度安全验证等反爬页面
+- parse_empty: 页面加载成功但既没有评论也没有评论区（结构未渲染完整）
+- error: 其他错误（不重试）
+"""
+
+import heapq
+import itertools
+import os
+import random
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+FAIL_TIMEOUT = 'timeout'
+FAIL_DRIVER_CRASH = 'driver_crash'
+FAIL_BLOCKED = 'blocked'
+FAIL_PARSE_EMPTY = 'parse_empty'
+FAIL_OTHER = 'error'
+RETRYABLE = (FAIL_TIMEOUT, FAIL_DRIVER_CRASH, FAIL_BLOCKED, FAIL_PARSE_EMPTY)
+
+RETRY_MAX_ATTEMPTS = int(os.environ.get('RETRY_MAX_ATTEMPTS', '3'))
+RETRY_BASE_SECONDS = float(os.environ.get('RETRY_BASE_SECONDS', '15'))
+RETRY_MAX_SECONDS = float(os.environ.get('RETRY_MAX_SECONDS', '300'))
+
+# 超时：异常类型，或 chromedriver 的 “timeout: Timed out receiving message” 等特定短语
+_TIMEOUT_TYPES = ('RowTimeout', 'TimeoutException', 'TimeoutError', 'ReadTimeout', 'ConnectTimeout', 'ScriptTimeoutException')
+_TIMEOUT_PREFIXES = ('timeout:', 'message: timeout:')
+_TIMEOUT_PHRASES = ('timed out',)
+# 驱动/浏览器失联时 WebDriverException 和底层连接错误的特征
+_CRASH_MARKERS = ('invalid session id', 'session deleted', 'disconnected', 'no such window', 'not reachable',
+                  'target window already closed', 'tab crashed', 'connection refused', 'connection reset',
+                  'max retries exceeded', 'remote end closed', 'failed to establish a new connection')
+_CRASH_TYPES = ('InvalidSessionIdException', 'NoSuchWindowException', 'ConnectionError', 'ConnectionRefusedError',
+                'ConnectionResetError', 'MaxRetryError', 'NewConnectionError', 'ProtocolError', 'RemoteDisconnected')
+# 百度安全验证 / 验证码页面
+_BLOCKED_URL_MARKERS = ('wappass.baidu.com', '/static/captcha', 'antispider')
+_BLOCKED_HTML_MARKERS = ('百度安全验证', 'wappass.baidu.com', '请输入验证码', 'passMod_')
+# 百家号评论区的标记：出现时说明评论区已渲染，0 条评论是真实结果
+_COMMENT_SECTION_MARKERS = ('xcp-', '暂无评论', '评论区', 'comment-list', 'commentList')
+
+
+def classify_exception(exc):
+    """
+    按异常类型/信息归类；看门狗取消（RowTimeout）按 timeout 处理。
+    超时异常类型优先，其次是驱动失联的类型和特征，最后才看信息中的超时短语，
+    驱动进程已死时连接池报出的 “Max retries exceeded ... Read timed out” 归为 driver_crash
+    """
+    name = type(exc).__name__
+    message = str(exc).lower().strip()
+    if name in _TIMEOUT_TYPES:
+        return FAIL_TIMEOUT
+    if name in _CRASH_TYPES or any(marker in message for marker in _CRASH_MARKERS):
+        return FAIL_DRIVER_CRASH
+    if message.startswith(_TIMEOUT_PREFIXES) or any(phrase in message for phrase in _TIMEOUT_PHRASES):
+        return FAIL_TIMEOUT
+    return FAIL_OTHER
+
+
+def is_blocked(url='', html=''):
+    url = url or ''
+    return any(marker in url for marker in _BLOCKED_URL_MARKERS) or \
+        any(marker in (html or '')[:20000] for marker in _BLOCKED_HTML_MARKERS)
+
+
+def has_comment_section(html):
+    return any(marker in (html or '') for marker in _COMMENT_SECTION_MARKERS)
+
+
+def backoff_seconds(attempt, base=None, cap=None):
+    """第 attempt 次失败后的等待时间：base * 2^(attempt-1)，上限 cap，±20% 抖动避免多个 worker 同时重试"""
+    base = RETRY_BASE_SECONDS if base is None else base
+    cap = RETRY_MAX_SECONDS if cap is None else cap
+    delay = min(base * 2 ** max(attempt - 1, 0), cap)
+    return delay * random.uniform(0.8, 1.2)
+
+
+class RetryQueue:
+    """
+    延迟重试队列：push() 记录一次失败并按退避时间排期，drain() 在主流程结束后依次等待到期并重试
+    handler(payload) 返回 None 表示成功，返回失败类别则在次数未用完时再次排期
+    """
+
+    def __init__(self, max_attempts=None, base_seconds=None, max_seconds=None, name='retry'):
+        self.max_attempts = RETRY_MAX_ATTEMPTS if max_attempts is None else max_attempts
+        self.base_seconds = base_seconds
+        self.max_seconds = max_seconds
+        self.name = name
+        self._heap = []
+        self._order = itertools.count()
+        self.attempts = {}
+        self.failures = {}
+        self.recovered = []
+        self.gave_up = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def push(self, key, payload, failure):
+        """记录 key 的一次失败；可重试且次数未用完时排期并返回 True"""
+        attempts = self.attempts.get(key, 0) + 1
+        self.attempts[key] = attempts
+        self.failures.setdefault(key, []).append(failure)
+        if failure not in RETRYABLE or attempts >= self.max_attempts:
+            self.gave_up[key] = failure
+            return False
+        due = time.time() + backoff_seconds(attempts, self.base_seconds, self.max_seconds)
+        heapq.heappush(self._heap, (due, next(self._order), key, payload))
+        return True
+
+    def drain(self, handler, sleep=time.sleep):
+        """按到期顺序重试全部条目，返回 (恢复数, 放弃数)"""
+        while self._heap:
+            due, _, key, payload = heapq.heappop(self._heap)
+            wait = due - time.time()
+            if wait > 0:
+                logger.info(f"[{self.name}] 等待 {wait:.0f}s 后重试 {key}（第 {self.attempts[key] + 1} 次）")
+                sleep(wait)
+            failure = handler(payload)
+            if failure is None:
+                self.recovered.append(key)
+                self.gave_up.pop(key, None)
+            elif not self.push(key, payload, failure):
+                logger.warning(f"[{self.name}] {key} 重试 {self.attempts[key]} 次仍失败，放弃（{failure}）")
+        return len(self.recovered), len(self.gave_up)
+
+    def summary(self):
+        return {'recovered': len(self.recovered), 'gave_up': dict(self.gave_up),
+                'attempts': sum(self.attempts.values())}
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 静态优先抓取
+页面先用连接池里的 HTTP 请求获取并解析，必需字段齐全就直接使用，
+缺字段或页面依赖 JS 渲染时才交给浏览器；按 (主机, 页面类型) 统计静态抓取成功率：
+样本足够且成功率过低的组合直接走浏览器（每隔 probe_every 次仍试一次静态，页面改版后能重新学到），
+成功率高的页面完全不需要浏览器加载
+- FETCH_MODE=auto（默认）/ browser（总是用浏览器，原行为）
+- 统计保存在 FETCH_ROUTER_STATS（默认 data_BAI_DU/_fetch/router_stats.json），多个 worker 在文件锁下合并累加
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+import logging
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup
+
+from metrics import stage
+from work_queue import _lock_file, _unlock_file
+import storage
+
+try:
+    import lxml  # noqa: F401  lxml 为可选依赖，解析速度明显快于 html.parser
+    HTML_PARSER = 'lxml'
+except ImportError:
+    HTML_PARSER = 'html.parser'
+
+logger = logging.getLogger(__name__)
+
+FETCH_MODE = os.environ.get('FETCH_MODE', 'auto')
+ROUTER_STATS_FILE = os.environ.get('FETCH_ROUTER_STATS', os.path.join('data_BAI_DU', '_fetch', 'router_stats.json'))
+HTTP_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'zh-CN,zh;q=0.9,en;q=0.8',
+    'Accept-Encoding': 'gzip, deflate',
+    'Connection': 'keep-alive',
+    'Referer': 'https://www.baidu.com/',
+}
+
+
+def make_soup(html):
+    return BeautifulSoup(html, HTML_PARSER)
+
+
+class FetchRouter:
+    def __init__(self, stats_file=ROUTER_STATS_FILE, mode=FETCH_MODE, min_samples=10, min_success_rate=0.2,
+                 probe_every=50, timeout=10, pool_size=10, save_every=20):
+        self.stats_file = stats_file
+        self.mode = mode
+        self.min_samples = min_samples
+        self.min_success_rate = min_success_rate
+        self.probe_every = probe_every
+        self.timeout = timeout
+        self.pool_size = pool_size
+        self.save_every = save_every
+        self._session = None
+        self._stats = None   # 文件中的累计值 + 本进程新增
+        self._delta = {}     # 本进程尚未写回文件的新增
+        self._skipped = {}   # 本进程因成功率低跳过静态抓取的次数
+        self._lock = threading.Lock()
+        self._unsaved = 0
+
+    @property
+    def session(self):
+        """连接池会话：同一主机的请求复用 keep-alive 连接"""
+        if self._session is None:
+            session = requests.Session()
+            session.headers.update(HTTP_HEADERS)
+            adapter = HTTPAdapter(pool_connections=self.pool_size, pool_maxsize=self.pool_size, max_retries=0)
+            session.mount('http://', adapter)
+            session.mount('https://', adapter)
+            self._session = session
+        return self._session
+
+    # ---- 成功率统计 ----
+    @staticmethod
+    def _key(url, kind):
+        return f"{urlsplit(url).hostname or ''}|{kind}"
+
+    def _load(self):
+        if self._stats is None:
+            try:
+                self._stats = storage.load_json(self.stats_file) or {}
+            except Exception as e:
+                logger.warning(f"读取抓取统计失败，重新统计: {e}")
+                self._stats = {}
+            atexit.register(self.save)
+        return self._stats
+
+    def _record(self, key, ok):
+        with self._lock:
+            for table in (self._load(), self._delta):
+                entry = table.setdefault(key, {'attempts': 0, 'static_ok': 0})
+                entry['attempts'] += 1
+                entry['static_ok'] += int(ok)
+            self._unsaved += 1
+            save = self._unsaved >= self.save_every
+        if save:
+            self.save()
+
+    def success_rate(self, url, kind):
+        entry = self._load().get(self._key(url, kind))
+        if not entry or not entry['attempts']:
+            return None
+        return entry['static_ok'] / entry['attempts']
+
+    def should_try_static(self, url, kind):
+        if self.mode == 'browser':
+            return False
+        key = self._key(url, kind)
+        entry = self._load().get(key)
+        if entry is None or entry['attempts'] < self.min_samples:
+            return True
+        if entry['static_ok'] / entry['attempts'] >= self.min_success_rate:
+            return True
+        # 成功率低：大多数时候直接走浏览器，偶尔探测一次
+        skipped = self._skipped[key] = self._skipped.get(key, 0) + 1
+        return bool(self.probe_every) and skipped % self.probe_every == 0
+
+    def save(self):
+        """把本进程的新增统计合并进文件（其他 worker 的累计值保留）"""
+        with self._lock:
+            if not self._delta:
+                return
+            delta, self._delta, self._unsaved = self._delta, {}, 0
+        try:
+            os.makedirs(os.path.dirname(self.stats_file) or '.', exist_ok=True)
+            # 多个 worker 共用统计文件：读取-合并-写回期间持有独占文件锁，重叠的保存不会丢掉对方的新增
+            with open(self.stats_file + '.lock', 'a+b') as lock_fh:
+                _lock_file(lock_fh)
+                try:
+                    merged = storage.load_json(self.stats_file) or {}
+                    for key, entry in delta.items():
+                        target = merged.setdefault(key, {'attempts': 0, 'static_ok': 0})
+                        target['attempts'] += entry['attempts']
+                        target['static_ok'] += entry['static_ok']
+                        target['updated_at'] = time.strftime('%Y-%m-%d %H:%M:%S')
+                    storage.atomic_write_bytes(self.stats_file,
+                                               json.dumps(merged, ensure_ascii=False, indent=2).encode('utf-8'))
+                finally:
+                    _unlock_file(lock_fh)
+        except Exception as e:
+            logger.warning(f"保存抓取统计失败，下次保存时重试: {e}")
+            with self._lock:
+                for key, entry in delta.items():
+                    pending = self._delta.setdefault(key, {'attempts': 0, 'static_ok': 0})
+                    pending['attempts'] += entry['attempts']
+                    pending['static_ok'] += entry['static_ok']
+
+    # ---- 抓取 ----
+    def fetch_static(self, url, kind='page'):
+        """HTTP 获取页面，失败（网络错误/非200/非HTML）返回 None"""
+        try:
+            with stage('http_get', page=kind):
+                response = self.session.get(url, timeout=self.timeout)
+        except requests.RequestException as e:
+            logger.debug(f"HTTP 获取失败 {url}: {e}")
+            return None
+        if response.status_code != 200 or 'html' not in response.headers.get('Content-Type', 'text/html'):
+            logger.debug(f"HTTP 获取 {url} 返回 {response.status_code}")
+            return None
+        if not response.encoding or response.encoding.lower() == 'iso-8859-1':
+            response.encoding = response.apparent_encoding or 'utf-8'
+        return response.text
+
+    def try_static(self, url, kind, parse):
+        """
+        静态抓取并解析：parse(soup, html) 返回结果表示必需字段齐全，返回 None 表示需要浏览器；
+        按成功率跳过静态抓取时同样返回 None
+        """
+        if not self.should_try_static(url, kind):
+            return None
+        html = self.fetch_static(url, kind)
+        result = None
+        if html:
+            try:
+                with stage('parse', page=kind, via='http'):
+                    result = parse(make_soup(html), html)
+            except Exception as e:
+                logger.debug(f"静态解析失败 {url}: {e}")
+        self._record(self._key(url, kind), result is not None)
+        if result is None:
+            logger.info(f"静态页面缺少必需内容，改用浏览器（{kind}）")
+        else:
+            logger.info(f"静态抓取成功（{kind}），跳过浏览器: {url}")
+        return result
+
+    def route(self, url, kind, parse, browser):
+        """先静态后浏览器：browser() 为原来的浏览器抓取流程，返回 (结果, 'http' | 'browser')"""
+        result = self.try_static(url, kind, parse)
+        if result is not None:
+            return result, 'http'
+        return browser(), 'browser'
+
+    def summary(self):
+        stats = self._load()
+        return {key: dict(entry, rate=round(entry['static_ok'] / entry['attempts'], 3) if entry['attempts'] else None)
+                for key, entry in stats.items()}
+
+
+# 全局路由：各爬虫共用连接池和成功率统计
+fetch_router = FetchRouter()
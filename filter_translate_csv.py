@@ -1,17 +1,13 @@
 import argparse
 import os
-from datetime import datetime, date
+import re
+import time
+from contextlib import nullcontext
+from datetime import datetime
 import pandas as pd
-from typing import Optional, Dict, List
-
-# 尝试加载在线翻译器（可选）
-_googletrans_available = False
-_deep_translator_available = False
-try:
-    from googletrans import Translator as GoogletransTranslator  # type: ignore
-    _googletrans_available = True
-except Exception:
-    pass
+from typing import Optional, Dict, List, Tuple
+from translation_cache import TranslationCacheStore, DEFAULT_DB_PATH
+from online_translate import OnlineTranslationService
 
 # 进度条（可选）
 _tqdm_available = False
@@ -21,26 +17,46 @@ try:
 except Exception:
     pass
 
-# 离线翻译（MarianMT，可选）
+# 离线翻译（MarianMT，可选）；transformers/torch 导入很慢，只在真正构建离线模型时才导入
 _marian_available = False
-try:
-    from transformers import MarianMTModel, MarianTokenizer  # type: ignore
-    import torch  # type: ignore
-    _marian_available = True
-except Exception:
-    pass
-try:
-    from deep_translator import GoogleTranslator as DeepGoogleTranslator  # type: ignore
-    _deep_translator_available = True
-except Exception:
-    pass
+_marian_checked = False
 
 
-def parse_args():
-    parser = argparse.ArgumentParser(description="按固定时间范围过滤并翻译标题（只输出到新CSV文件，不修改原文件）")
+def _ensure_marian() -> bool:
+    global _marian_available, _marian_checked, MarianMTModel, MarianTokenizer, torch
+    if not _marian_checked:
+        _marian_checked = True
+        try:
+            from transformers import MarianMTModel, MarianTokenizer  # type: ignore
+            import torch  # type: ignore
+            _marian_available = True
+        except Exception:
+            pass
+    return _marian_available
+
+
+def parse_args(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description="按时间范围等条件分块过滤并翻译标题（只输出到新CSV文件，不修改原文件）")
     parser.add_argument("--input", "-i", default="valid_record_ids.csv", help="输入CSV路径")
     parser.add_argument("--output", "-o", default=None, help="输出CSV路径；不填则自动生成 *_filtered_translated.csv")
-    return parser.parse_args()
+    parser.add_argument("--start-date", default="2025-05-01", help="起始日期（含），格式 YYYY-MM-DD")
+    parser.add_argument("--end-date", default="2025-09-11", help="结束日期（含），格式 YYYY-MM-DD")
+    parser.add_argument("--keyword", "-k", action="append", help="标题需包含的关键词，可重复指定（任一命中即保留）")
+    parser.add_argument("--min-record-id", type=int, default=None, help="最小 record_id（含）")
+    parser.add_argument("--max-record-id", type=int, default=None, help="最大 record_id（含）")
+    parser.add_argument("--chunksize", type=int, default=100000, help="分块读取的行数")
+    parser.add_argument("--batch-size", type=int, default=32, help="离线模型每批翻译的标题数")
+    parser.add_argument("--cache", default=DEFAULT_DB_PATH, help="翻译缓存SQLite路径（首次会导入旧的 translation_cache.json）")
+    parser.add_argument("--checkpoint-every", type=int, default=0, help="每翻译N个标题提交一次缓存；0表示只在结束时提交")
+    parser.add_argument("--mt-backend", choices=MARIAN_BACKENDS, default="torch", help="离线模型推理后端")
+    parser.add_argument("--mt-threads", type=int, default=None, help="推理线程数（intra-op）")
+    parser.add_argument("--mt-interop-threads", type=int, default=None, help="inter-op 线程数")
+    parser.add_argument("--mt-workers", type=int, default=1, help="推理进程数；>1 时每个进程各加载一份模型")
+    parser.add_argument("--online-endpoint", default=None, help="LibreTranslate 风格的翻译接口地址（可指向本地替身服务）")
+    parser.add_argument("--online-concurrency", type=int, default=4, help="在线翻译并发数")
+    parser.add_argument("--online-rate", type=float, default=5.0, help="在线翻译每秒最多请求数")
+    parser.add_argument("--benchmark", type=int, default=0, help="取N个标题对比 torch 与所选后端的 titles/sec，然后退出")
+    return parser.parse_args(argv)
     
 
 
@@ -62,97 +78,154 @@ _dict_translations: Dict[str, str] = {
 
 _translation_cache: Dict[str, str] = {}
 
+# 在线翻译服务（全局复用一个，main 中可按参数重新配置）
+_online_service: Optional[OnlineTranslationService] = None
+
+
+def get_online_service() -> OnlineTranslationService:
+    global _online_service
+    if _online_service is None:
+        _online_service = OnlineTranslationService()
+    return _online_service
+
+
+def configure_online_service(**kwargs) -> OnlineTranslationService:
+    global _online_service
+    if _online_service is not None:
+        _online_service.close()
+    _online_service = OnlineTranslationService(**kwargs)
+    return _online_service
+
 
 def _online_translate(text: str) -> Optional[str]:
-    # 优先使用 googletrans，其次 deep_translator；失败则返回 None
-    if _googletrans_available:
-        try:
-            gt = GoogletransTranslator()
-            res = gt.translate(text, src='zh-cn', dest='en')
-            if res and getattr(res, 'text', ''):
-                return res.text
-        except Exception:
-            pass
-    if _deep_translator_available:
-        try:
-            res = DeepGoogleTranslator(source='auto', target='en').translate(text)
-            if isinstance(res, str) and res.strip():
-                return res
-        except Exception:
-            pass
-    return None
+    # 按引擎顺序尝试（googletrans、deep_translator 或自定义 endpoint）；失败则返回 None
+    return get_online_service().translate(text)
 
 
-def translate_to_english(chinese_text: str) -> str:
-    if not isinstance(chinese_text, str) or not chinese_text.strip():
-        return ''
+def _translate_local(chinese_text: str) -> Optional[Tuple[str, str]]:
+    """只查缓存和字典，不发网络请求；未命中返回 None"""
     # 缓存命中
     if chinese_text in _translation_cache:
-        return normalize_english(_translation_cache[chinese_text])
+        return normalize_english(_translation_cache[chinese_text]), 'cache'
     # 字典命中（优先）
     if chinese_text in _dict_translations:
         eng = _dict_translations[chinese_text]
         _translation_cache[chinese_text] = eng
-        return normalize_english(eng)
+        return normalize_english(eng), 'dict'
     # 子串命中
     for k, v in _dict_translations.items():
         if k in chinese_text:
             _translation_cache[chinese_text] = v
-            return normalize_english(v)
+            return normalize_english(v), 'dict'
+    return None
+
+
+def translate_with_engine(chinese_text: str) -> Tuple[str, str]:
+    """翻译并返回 (英文, 引擎)；引擎为 cache/dict/online/fallback 之一"""
+    if not isinstance(chinese_text, str) or not chinese_text.strip():
+        return '', 'fallback'
+    local = _translate_local(chinese_text)
+    if local:
+        return local
     # 在线翻译尝试
     eng_online = _online_translate(chinese_text)
     if eng_online:
         _translation_cache[chinese_text] = eng_online
-        return normalize_english(eng_online)
+        return normalize_english(eng_online), 'online'
     # 兜底：返回原文本（会是中文），但做下划线规范
-    return normalize_english(chinese_text)
+    return normalize_english(chinese_text), 'fallback'
 
 
-# 持久化缓存
-_CACHE_PATH = "translation_cache.json"
-def _load_persistent_cache() -> Dict[str, str]:
-    try:
-        if os.path.exists(_CACHE_PATH):
-            import json
-            with open(_CACHE_PATH, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-                if isinstance(data, dict):
-                    return {str(k): str(v) for k, v in data.items()}
-    except Exception:
-        pass
-    return {}
+def translate_to_english(chinese_text: str) -> str:
+    return translate_with_engine(chinese_text)[0]
 
 
-def _save_persistent_cache(cache: Dict[str, str]) -> None:
-    try:
-        import json
-        with open(_CACHE_PATH, 'w', encoding='utf-8') as f:
-            json.dump(cache, f, ensure_ascii=False)
-    except Exception:
-        pass
+# ONNX Runtime 导出图（可选，同样延迟导入）
+_onnx_available = False
+_onnx_checked = False
+
+
+def _ensure_onnx() -> bool:
+    global _onnx_available, _onnx_checked, ORTModelForSeq2SeqLM, onnxruntime
+    if not _onnx_checked:
+        _onnx_checked = True
+        try:
+            from optimum.onnxruntime import ORTModelForSeq2SeqLM  # type: ignore
+            import onnxruntime  # type: ignore
+            _onnx_available = True
+        except Exception:
+            pass
+    return _onnx_available
+
+MARIAN_BACKENDS = ("torch", "int8", "onnx")
+_ONNX_EXPORT_DIR = "marian_onnx"
+
+
+def _configure_torch_threads(num_threads: Optional[int], interop_threads: Optional[int]) -> None:
+    if not _ensure_marian():
+        return
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    if interop_threads:
+        try:
+            # 只能在第一次并行计算前设置
+            torch.set_interop_threads(interop_threads)
+        except RuntimeError:
+            pass
 
 
 class MarianOfflineTranslator:
-    def __init__(self) -> None:
+    """
+    Helsinki-NLP/opus-mt-zh-en 离线翻译
+    backend: torch=原始PyTorch；int8=对Linear层做动态int8量化（CPU）；onnx=导出到ONNX Runtime（导出结果缓存在 marian_onnx/）
+    """
+
+    def __init__(self, backend: str = "torch", num_threads: Optional[int] = None,
+                 interop_threads: Optional[int] = None) -> None:
         self.enabled = False
-        if not _marian_available:
+        self.backend = backend
+        if not _ensure_marian():
             return
         try:
             self.model_name = 'Helsinki-NLP/opus-mt-zh-en'
+            _configure_torch_threads(num_threads, interop_threads)
             self.tokenizer = MarianTokenizer.from_pretrained(self.model_name)
-            self.model = MarianMTModel.from_pretrained(self.model_name)
-            self.device = 'cuda' if 'torch' in globals() and torch.cuda.is_available() else 'cpu'
-            self.model.to(self.device)
+            if backend == "onnx":
+                if not _ensure_onnx():
+                    return
+                self.model = self._load_onnx_model(num_threads, interop_threads)
+                self.device = 'cpu'
+            else:
+                self.model = MarianMTModel.from_pretrained(self.model_name)
+                if backend == "int8":
+                    self.model = torch.quantization.quantize_dynamic(self.model, {torch.nn.Linear}, dtype=torch.qint8)
+                    self.device = 'cpu'
+                else:
+                    self.device = 'cuda' if 'torch' in globals() and torch.cuda.is_available() else 'cpu'
+                self.model.to(self.device)
+                self.model.eval()
             self.enabled = True
         except Exception:
             self.enabled = False
 
-    def batch_translate(self, texts: List[str], batch_size: int = 16) -> List[str]:
+    def _load_onnx_model(self, num_threads: Optional[int], interop_threads: Optional[int]):
+        options = onnxruntime.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        if interop_threads:
+            options.inter_op_num_threads = interop_threads
+        if os.path.isdir(_ONNX_EXPORT_DIR):
+            return ORTModelForSeq2SeqLM.from_pretrained(_ONNX_EXPORT_DIR, session_options=options)
+        model = ORTModelForSeq2SeqLM.from_pretrained(self.model_name, export=True, session_options=options)
+        model.save_pretrained(_ONNX_EXPORT_DIR)
+        return model
+
+    def batch_translate(self, texts: List[str], batch_size: int = 16, progress: bool = True) -> List[str]:
         results: List[str] = []
         if not self.enabled or not texts:
             return [translate_to_english(t) for t in texts]
         indices = range(0, len(texts), batch_size)
-        iterator = tqdm(indices, desc="Offline MT", unit="batch") if _tqdm_available else indices
+        iterator = tqdm(indices, desc="Offline MT", unit="batch") if _tqdm_available and progress else indices
         for i in iterator:
             batch = texts[i:i + batch_size]
             try:
@@ -166,20 +239,193 @@ class MarianOfflineTranslator:
             results.extend(out_texts)
         return results
 
-try:
-    from contextlib import nullcontext  # py3.7+
-except Exception:
-    class nullcontext:  # type: ignore
-        def __init__(self, *_, **__):
-            pass
-        def __enter__(self):
-            return None
-        def __exit__(self, *exc):
-            return False
 
+# 进程池中每个子进程各自持有一个翻译器
+_worker_translator: Optional[MarianOfflineTranslator] = None
+
+
+def _pool_init(backend: str, num_threads: Optional[int], interop_threads: Optional[int]) -> None:
+    global _worker_translator
+    _worker_translator = MarianOfflineTranslator(backend, num_threads, interop_threads)
+
+
+def _pool_translate(batch: List[str]) -> Optional[List[str]]:
+    if _worker_translator is None or not _worker_translator.enabled:
+        return None
+    return _worker_translator.batch_translate(batch, batch_size=len(batch), progress=False)
 
-def main():
-    args = parse_args()
+
+class MarianProcessPool:
+    """把批次分发到多个进程（每个进程一个模型实例），接口与 MarianOfflineTranslator 相同"""
+
+    def __init__(self, workers: int, backend: str = "torch", num_threads: Optional[int] = None,
+                 interop_threads: Optional[int] = None) -> None:
+        from concurrent.futures import ProcessPoolExecutor
+        self.backend = backend
+        self.enabled = _ensure_marian() and (backend != "onnx" or _ensure_onnx())
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_pool_init, initargs=(backend, num_threads, interop_threads)
+        ) if self.enabled else None
+
+    def batch_translate(self, texts: List[str], batch_size: int = 16, progress: bool = True) -> List[str]:
+        if not self.enabled or not texts:
+            return [translate_to_english(t) for t in texts]
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        outputs = self._executor.map(_pool_translate, batches)
+        if _tqdm_available and progress:
+            outputs = tqdm(outputs, total=len(batches), desc="Offline MT", unit="batch")
+        results: List[str] = []
+        for batch, out in zip(batches, outputs):
+            results.extend(out if out is not None else [translate_to_english(t) for t in batch])
+        return results
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown()
+
+
+def build_offline_translator(backend: str = "torch", num_threads: Optional[int] = None,
+                             interop_threads: Optional[int] = None, workers: int = 1):
+    if workers > 1:
+        return MarianProcessPool(workers, backend, num_threads, interop_threads)
+    return MarianOfflineTranslator(backend, num_threads, interop_threads)
+
+
+def benchmark_backends(texts: List[str], backends: List[str], batch_size: int = 32,
+                       num_threads: Optional[int] = None, interop_threads: Optional[int] = None,
+                       workers: int = 1) -> List[Dict[str, object]]:
+    """逐个后端翻译同一组标题，返回 titles/sec 及相对 torch 的加速比（不含模型加载时间）"""
+    ordered = sorted(texts, key=len)
+    rows: List[Dict[str, object]] = []
+    for backend in backends:
+        translator = build_offline_translator(backend, num_threads, interop_threads, workers)
+        row: Dict[str, object] = {"backend": backend, "enabled": translator.enabled, "titles": len(ordered)}
+        if translator.enabled and ordered:
+            translator.batch_translate(ordered[:batch_size], batch_size=batch_size, progress=False)  # 预热
+            start = time.perf_counter()
+            translator.batch_translate(ordered, batch_size=batch_size, progress=False)
+            elapsed = time.perf_counter() - start
+            row["seconds"] = round(elapsed, 3)
+            row["titles_per_sec"] = round(len(ordered) / elapsed, 2) if elapsed > 0 else 0.0
+        if isinstance(translator, MarianProcessPool):
+            translator.close()
+        rows.append(row)
+    base = next((r.get("titles_per_sec") for r in rows if r["backend"] == "torch"), None)
+    for row in rows:
+        if base and row.get("titles_per_sec"):
+            row["speedup_vs_torch"] = round(float(row["titles_per_sec"]) / float(base), 2)
+    return rows
+
+
+def translate_titles(texts: List[str], offline, batch_size: int = 32) -> Dict[str, Tuple[str, str]]:
+    """翻译一组去重后的标题，返回 {中文: (英文, 引擎)}；离线模型可用时按长度排序后分批，减少padding"""
+    if not offline.enabled:
+        return _translate_online_batch(texts)
+    ordered = sorted(texts, key=len)
+    try:
+        outputs = offline.batch_translate(ordered, batch_size=batch_size)
+    except Exception:
+        return {zh: translate_with_engine(zh) for zh in ordered}
+    return {zh: (en, 'marian') for zh, en in zip(ordered, outputs)}
+
+
+def _translate_online_batch(texts: List[str]) -> Dict[str, Tuple[str, str]]:
+    """离线模型不可用时：先查缓存/字典，其余标题并发走在线翻译，失败的保留原文"""
+    results: Dict[str, Tuple[str, str]] = {}
+    remaining: List[str] = []
+    for zh in texts:
+        local = _translate_local(zh) if zh else ('', 'fallback')
+        if local:
+            results[zh] = local
+        else:
+            remaining.append(zh)
+    online = get_online_service().translate_many(remaining)
+    for zh in remaining:
+        eng = online.get(zh)
+        if eng:
+            _translation_cache[zh] = eng
+            results[zh] = (normalize_english(eng), 'online')
+        else:
+            results[zh] = (normalize_english(zh), 'fallback')
+    return results
+
+
+def apply_translations(df: pd.DataFrame, titles: pd.Series) -> pd.DataFrame:
+    """按缓存把 title_chinese 一次性映射为 title_english"""
+    df["title_english"] = (
+        titles.map(_translation_cache).fillna(titles).str.strip().str.replace(" ", "_", regex=False)
+    )
+    return df
+
+
+def _record_ids(urls: pd.Series) -> pd.Series:
+    return pd.to_numeric(urls.str.extract(r"record_id=(\d+)", expand=False), errors="coerce")
+
+
+def filter_chunk(chunk: pd.DataFrame, start_date: pd.Timestamp, end_date: pd.Timestamp,
+                 keywords: List[str], min_record_id: Optional[int], max_record_id: Optional[int]) -> pd.DataFrame:
+    """对一个分块做向量化过滤：日期范围（含边界）、标题关键词（任一命中）、record_id 范围"""
+    # update_date 为固定格式 YYYY-MM-DD（可能带时间），只取前10位按固定格式解析
+    day = chunk["update_date"].str.slice(0, 10)
+    parsed = pd.to_datetime(day, format="%Y-%m-%d", errors="coerce")
+    mask = (parsed >= start_date) & (parsed <= end_date)
+    if keywords:
+        pattern = "|".join(re.escape(k) for k in keywords)
+        mask &= chunk["title_chinese"].str.contains(pattern, regex=True, na=False)
+    if (min_record_id is not None or max_record_id is not None) and "url" in chunk.columns:
+        ids = _record_ids(chunk["url"])
+        if min_record_id is not None:
+            mask &= ids >= min_record_id
+        if max_record_id is not None:
+            mask &= ids <= max_record_id
+    filtered = chunk.loc[mask].copy()
+    filtered["update_date"] = day[mask]
+    return filtered
+
+
+def stream_filter(input_path: str, output_path: str, args) -> Tuple[int, List[str]]:
+    """分块读取输入CSV，过滤后直接追加写入输出（保留输入的全部列）；返回 (保留行数, 去重后的中文标题)"""
+    header = pd.read_csv(input_path, dtype=str, nrows=0).columns.tolist()
+    required_cols = ["update_date", "title_chinese", "title_english"]
+    for col in required_cols:
+        if col not in header:
+            raise ValueError(f"Missing required column: {col}")
+
+    start_date = pd.Timestamp(datetime.strptime(args.start_date, "%Y-%m-%d"))
+    end_date = pd.Timestamp(datetime.strptime(args.end_date, "%Y-%m-%d"))
+
+    total = 0
+    titles: Dict[str, None] = {}
+    first = True
+    for chunk in pd.read_csv(input_path, dtype=str, chunksize=args.chunksize):
+        filtered = filter_chunk(chunk, start_date, end_date, args.keyword or [],
+                                args.min_record_id, args.max_record_id)
+        filtered.to_csv(output_path, mode="w" if first else "a", header=first, index=False, encoding="utf-8")
+        first = False
+        total += len(filtered)
+        titles.update(dict.fromkeys(filtered["title_chinese"].dropna()))
+    if first:
+        # 输入为空时也写出表头
+        pd.DataFrame(columns=header).to_csv(output_path, index=False, encoding="utf-8")
+    return total, [zh for zh in titles if zh]
+
+
+def rewrite_translations(output_path: str, chunksize: int) -> None:
+    """分块把缓存中的译文写回输出文件的 title_english 列，写完后替换原文件"""
+    tmp_path = output_path + ".tmp"
+    first = True
+    for chunk in pd.read_csv(output_path, dtype=str, chunksize=chunksize):
+        titles = chunk["title_chinese"].fillna("").astype(str)
+        apply_translations(chunk, titles).to_csv(
+            tmp_path, mode="w" if first else "a", header=first, index=False, encoding="utf-8"
+        )
+        first = False
+    if not first:
+        os.replace(tmp_path, output_path)
+
+
+def main(argv: Optional[List[str]] = None):
+    args = parse_args(argv)
     input_path = args.input
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
@@ -191,65 +437,48 @@ def main():
         root, ext = os.path.splitext(input_path)
         output_path = f"{root}_filtered_translated{ext or '.csv'}"
 
-    # 读取CSV
-    df = pd.read_csv(input_path, dtype=str)
-
-    # 必需列
-    required_cols = ["update_date", "title_chinese", "title_english"]
-    for col in required_cols:
-        if col not in df.columns:
-            raise ValueError(f"Missing required column: {col}")
-
-    # 解析日期
-    df["update_date"] = pd.to_datetime(df["update_date"], errors="coerce").dt.date
-
-    # 固定时间范围（含边界）
-    start_date = datetime.strptime("2025-05-01", "%Y-%m-%d").date()
-    end_date = datetime.strptime("2025-09-11", "%Y-%m-%d").date()
+    # 分块过滤并直接写出（只筛选，不翻译）
+    total, unique_titles = stream_filter(input_path, output_path, args)
+    print(f"已保存筛选结果到 {output_path}（{args.start_date} ~ {args.end_date}），开始批量翻译...")
 
-    # 过滤
-    mask = (df["update_date"] >= start_date) & (df["update_date"] <= end_date)
-    filtered = df.loc[mask].copy()
+    if args.benchmark > 0:
+        sample = unique_titles[:args.benchmark]
+        backends = ["torch"] if args.mt_backend == "torch" else ["torch", args.mt_backend]
+        for row in benchmark_backends(sample, backends, args.batch_size, args.mt_threads,
+                                      args.mt_interop_threads, args.mt_workers):
+            print(row)
+        return
 
-    # 先保存一次（只筛选，不翻译）
-    filtered.to_csv(output_path, index=False, encoding="utf-8")
-    print(f"已保存筛选结果到 {output_path}，开始逐行翻译并实时保存...")
+    configure_online_service(endpoint=args.online_endpoint, max_workers=args.online_concurrency,
+                             rate=args.online_rate)
 
     # 准备缓存与离线模型
-    total = len(filtered)
     print(f"待翻译行数: {total}")
-    persistent = _load_persistent_cache()
-    _translation_cache.update(persistent)
-    offline = MarianOfflineTranslator()
-
-    # 按行翻译并每行保存一次
-    if total > 0:
-        indices = filtered.index.tolist()
-        iterator = tqdm(range(total), desc="Translating", unit="row") if _tqdm_available else range(total)
-        for k in iterator:
-            idx = indices[k]
-            zh = str(filtered.at[idx, "title_chinese"]) if not pd.isna(filtered.at[idx, "title_chinese"]) else ""
-            if zh in _translation_cache:
-                en = _translation_cache[zh]
-            else:
-                if offline.enabled and zh:
-                    try:
-                        en_list = offline.batch_translate([zh], batch_size=1)
-                        en = en_list[0] if en_list else normalize_english(zh)
-                    except Exception:
-                        en = translate_to_english(zh)
-                else:
-                    en = translate_to_english(zh)
+    store = TranslationCacheStore(args.cache)
+    _translation_cache.update(store.load_all())
+    offline = build_offline_translator(args.mt_backend, args.mt_threads, args.mt_interop_threads, args.mt_workers)
+
+    # 只翻译未命中缓存的标题；按长度排序后分段，每段结束提交一次缓存
+    pending = sorted((zh for zh in unique_titles if zh not in _translation_cache), key=len)
+    print(f"唯一标题 {len(unique_titles)} 个，其中待翻译 {len(pending)} 个（批大小 {args.batch_size}）")
+    step = args.checkpoint_every if args.checkpoint_every > 0 else max(len(pending), 1)
+    try:
+        for start in range(0, len(pending), step):
+            translated = translate_titles(pending[start:start + step], offline, batch_size=args.batch_size)
+            for zh, (en, engine) in translated.items():
                 _translation_cache[zh] = en
-                persistent[zh] = en
-                _save_persistent_cache(persistent)
-
-            filtered.at[idx, "title_english"] = normalize_english(en)
-            # 每翻译一行，立即覆盖保存
-            filtered.to_csv(output_path, index=False, encoding="utf-8")
-
-    # 仅保存筛选后的行到新文件
-    filtered.to_csv(output_path, index=False, encoding="utf-8")
+                store.put(zh, en, engine)
+            if args.checkpoint_every > 0:
+                store.flush()
+                print(f"检查点: 已翻译 {min(start + step, len(pending))}/{len(pending)}")
+    finally:
+        store.close()
+        if isinstance(offline, MarianProcessPool):
+            offline.close()
+        get_online_service().close()
+
+    # 分块写回译文
+    rewrite_translations(output_path, args.chunksize)
     print(f"已保存到 {output_path}")
 
 
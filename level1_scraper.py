@@ -7,35 +7,39 @@
 
 import requests
 from bs4 import BeautifulSoup
-import json
 import time
 import re
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.edge.options import Options as EdgeOptions
-from selenium.webdriver.edge.service import Service as EdgeService
 import os
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 import logging
 import os
-from level2_scraper import Level2Scraper
-from data_manager import DataManager
+from metrics import stage
+from row_watchdog import watchdog
+from browser import create_driver
+from page_loader import load_timeline
+from fetch_router import fetch_router
+from failures import FAIL_BLOCKED, classify_exception, is_blocked
+from records import SubEvent
+import storage
+from log_config import setup_logging
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# 日志由入口通过 log_config.setup_logging() 统一配置
 logger = logging.getLogger(__name__)
 
 class Level1Scraper:
-    def __init__(self):
+    def __init__(self, driver_manager=None):
         self.session = requests.Session()
         self.driver = None
+        self.driver_manager = driver_manager
         self.core_info = {}
         self.sub_events = []
+        self._timeline = None  # fetch_timeline 的结果，核心信息和子事件共用
+        self.last_failure = None  # 时间线抓取的失败类别（failures.FAIL_*，成功为 None）
         self._init_session()
-        self._init_selenium()
+        # 浏览器在第一次需要打开页面时才启动（静态抓取成功的页面不需要浏览器）；
+        # 批量模式下由 DriverManager 提供跨行复用的浏览器会话
         self._ensure_data_dir()
     
     def _init_session(self):
@@ -51,68 +55,7 @@ class Level1Scraper:
     
     def _init_selenium(self):
         """初始化Selenium"""
-        try:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--disable-extensions')
-            chrome_options.add_argument('--disable-logging')
-            chrome_options.add_argument('--disable-web-security')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            # 优先尝试：Selenium Manager（不下载第三方依赖）
-            try:
-                logger.info("正在初始化Chrome（Selenium Manager）...")
-                self.driver = webdriver.Chrome(options=chrome_options)
-                self.driver.set_page_load_timeout(30)
-                logger.info("Selenium WebDriver 初始化成功 (Chrome)")
-                return
-            except Exception as e1:
-                logger.warning(f"Chrome (Selenium Manager) 初始化失败: {e1}")
-
-            # 备用方案：本地驱动（不进行网络下载）
-            try:
-                logger.info("尝试使用本地chromedriver（跳过网络下载）...")
-                os.environ['WDM_LOCAL'] = '1'  # 禁止webdriver-manager联网下载，若无本地缓存将快速失败
-                chromedriver_path = os.environ.get('CHROMEDRIVER_PATH', '')
-                if chromedriver_path and os.path.exists(chromedriver_path):
-                    logger.info(f"使用环境变量CHROMEDRIVER_PATH: {chromedriver_path}")
-                    self.driver = webdriver.Chrome(service=ChromeService(chromedriver_path), options=chrome_options)
-                    self.driver.set_page_load_timeout(30)
-                    logger.info("Selenium WebDriver 初始化成功 (本地chromedriver)")
-                    return
-            except Exception as e2:
-                logger.warning(f"本地chromedriver 初始化失败: {e2}")
-
-            # 最后备用：Microsoft Edge（Windows更易可用）
-            try:
-                logger.info("尝试使用Edge WebDriver 初始化...")
-                edge_options = EdgeOptions()
-                edge_options.use_chromium = True
-                edge_options.add_argument('--headless')
-                edge_options.add_argument('--no-sandbox')
-                edge_options.add_argument('--disable-dev-shm-usage')
-                edge_options.add_argument('--disable-gpu')
-                edge_options.add_argument('--disable-extensions')
-                edge_options.add_argument('--disable-logging')
-                edge_options.add_argument('--disable-web-security')
-                edge_options.add_argument('--window-size=1920,1080')
-                self.driver = webdriver.Edge(options=edge_options)
-                self.driver.set_page_load_timeout(30)
-                logger.info("Selenium WebDriver 初始化成功 (Edge)")
-                return
-            except Exception as e3:
-                logger.error(f"Edge 初始化失败: {e3}")
-
-            # 全部失败
-            raise RuntimeError("无法初始化任何浏览器驱动。请安装 Chrome/Edge 或提供 CHROMEDRIVER_PATH。")
-        except Exception as e:
-            logger.error(f"Selenium WebDriver 初始化失败: {e}")
-            logger.error("请确保已安装Chrome浏览器和ChromeDriver")
-            self.driver = None
+        self.driver = create_driver()
     
     def _ensure_data_dir(self):
         """确保数据目录存在"""
@@ -132,168 +75,149 @@ class Level1Scraper:
             filename = filename[:50]
         return filename
     
-    def scrape_core_info(self, url):
-        """爬取核心信息"""
-        logger.info(f"开始爬取核心信息: {url}")
+    def _open_page(self, url, page):
+        """打开页面并等待 body 出现；复用驱动时先向 DriverManager 取会话，加载后回报结果以便按需回收"""
+        if self.driver_manager is not None:
+            self.driver = self.driver_manager.acquire()
+        elif self.driver is None:
+            with stage('driver_startup', scraper='level1'):
+                self._init_selenium()
+        if self.driver is None:
+            raise RuntimeError("WebDriver未初始化，无法爬取")
+        # 本行已超时则在导航前取消；否则登记浏览器进程并开始单页计时
+        watchdog.arm_page(self.driver, page)
+        ok = False
+        try:
+            with stage('driver_get', page=page):
+                self.driver.get(url)
+                WebDriverWait(self.driver, 15).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+            ok = True
+        finally:
+            if self.driver_manager is not None:
+                self.driver_manager.page_done(ok)
+    
+    def fetch_timeline(self, url):
+        """
+        获取时间线页面，核心信息和子事件列表共用这一次加载（同一 URL 重复调用直接返回结果）：
+        静态 HTML 中核心信息齐全且已包含声明数量的全部子事件时不打开浏览器，
+        否则浏览器只导航一次，展开全部子事件后从同一份页面源码中解析两者
+        返回 {'url', 'via', 'core_info', 'sub_events'}；被重定向到安全验证页面时记录 last_failure 并返回 None
+        """
+        if self._timeline is not None and self._timeline['url'] == url:
+            return self._timeline
+        static_core = {}
         
-        if not self.driver:
-            logger.error("WebDriver未初始化，无法爬取")
-            return False
+        def static(soup, html):
+            core_info = self._parse_core_info(soup, required=True)
+            if core_info is None:
+                return None
+            static_core.update(core_info)
+            # 时间线分页加载，静态 HTML 只有在已包含全部子事件时才可用
+            sub_events = self._parse_sub_events(soup)
+            if len(sub_events) < core_info['sub_event_count']:
+                return None
+            return {'core_info': core_info, 'sub_events': sub_events}
         
-        try:
+        def browser():
             logger.info("正在访问页面...")
-            self.driver.get(url)
-            
-            logger.info("等待页面加载...")
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            logger.info("页面加载完成，开始解析...")
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            # 1. 核心事件名称
-            title_elem = soup.find('title')
-            core_event_name = title_elem.get_text(strip=True) if title_elem else ''
-            
-            # 2. 最新更新时间
-            update_time_elem = soup.find('p', class_='create-time')
-            update_time = update_time_elem.get_text(strip=True) if update_time_elem else ''
-            
-            # 3. 子事件数量 - 从标签中获取
-            sub_event_count = 0
-            count_elem = soup.find('span', class_='count')
-            if count_elem:
-                try:
-                    sub_event_count = int(count_elem.get_text(strip=True))
-                except ValueError:
-                    pass
-            
-            self.core_info = {
-                'core_event_name': core_event_name,
-                'update_time': update_time,
-                'sub_event_count': sub_event_count,
-                'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S')
-            }
+            try:
+                self._open_page(url, 'timeline')
+                
+                # 页面内 MutationObserver 驱动加载：点击“加载更多”并滚动，达到声明总数或不再增长时立即返回
+                declared_total = static_core.get('sub_event_count') or self._declared_count()
+                logger.info("正在加载全部子事件...")
+                with stage('load_more', page='timeline'):
+                    load_timeline(self.driver, target=declared_total)
+                
+                logger.info("页面加载完成，开始解析...")
+                with stage('page_source', page='timeline'):
+                    html = self.driver.page_source
+            finally:
+                # 导航和展开结束，之后的解析不计入单页截止时间
+                watchdog.disarm_page()
+            if is_blocked(self.driver.current_url, html):
+                logger.warning(f"时间线页面被重定向到安全验证: {self.driver.current_url}")
+                self.last_failure = FAIL_BLOCKED
+                return None
+            with stage('parse', page='timeline'):
+                soup = BeautifulSoup(html, 'html.parser')
+            return {'core_info': self._parse_core_info(soup), 'sub_events': self._parse_sub_events(soup)}
+        
+        page, via = fetch_router.route(url, 'timeline', static, browser)
+        if page is None:
+            return None
+        page.update(url=url, via=via)
+        self._timeline = page
+        return page
+    
+    def _declared_count(self):
+        """从已打开的页面读取声明的子事件数量（span.count），读取失败返回 0"""
+        try:
+            return int(self.driver.find_element(By.CSS_SELECTOR, 'span.count').text.strip())
+        except Exception:
+            return 0
+    
+    def scrape_core_info(self, url):
+        """爬取核心信息（与子事件列表共用 fetch_timeline 的一次加载）"""
+        logger.info(f"开始爬取核心信息: {url}")
+        try:
+            page = self.fetch_timeline(url)
+            if page is None:
+                return False
+            self.core_info = core_info = page['core_info']
             
-            logger.info(f"核心信息提取完成:")
-            logger.info(f"  事件名称: {core_event_name}")
-            logger.info(f"  更新时间: {update_time}")
-            logger.info(f"  子事件数量: {sub_event_count}")
+            logger.info(f"核心信息提取完成（{page['via']}）:")
+            logger.info(f"  事件名称: {core_info['core_event_name']}")
+            logger.info(f"  更新时间: {core_info['update_time']}")
+            logger.info(f"  子事件数量: {core_info['sub_event_count']}")
             
             return True
             
         except Exception as e:
-            logger.error(f"爬取核心信息失败: {e}")
+            self.last_failure = classify_exception(e)
+            logger.error(f"爬取核心信息失败（{self.last_failure}）: {e}")
             return False
     
+    def _parse_core_info(self, soup, required=False):
+        """解析核心信息；required 时名称/更新时间/子事件数量任一缺失返回 None"""
+        # 1. 核心事件名称
+        title_elem = soup.find('title')
+        core_event_name = title_elem.get_text(strip=True) if title_elem else ''
+        
+        # 2. 最新更新时间
+        update_time_elem = soup.find('p', class_='create-time')
+        update_time = update_time_elem.get_text(strip=True) if update_time_elem else ''
+        
+        # 3. 子事件数量 - 从标签中获取
+        sub_event_count = 0
+        count_elem = soup.find('span', class_='count')
+        if count_elem:
+            try:
+                sub_event_count = int(count_elem.get_text(strip=True))
+            except ValueError:
+                pass
+        
+        if required and not (core_event_name and update_time and sub_event_count):
+            return None
+        return {
+            'core_event_name': core_event_name,
+            'update_time': update_time,
+            'sub_event_count': sub_event_count,
+            'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S')
+        }
+    
     def scrape_sub_events(self, url):
-        """爬取164个子事件"""
+        """爬取164个子事件（与核心信息共用 fetch_timeline 的一次加载）"""
         logger.info("开始爬取子事件列表...")
-        
         try:
-            self.driver.get(url)
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
+            page = self.fetch_timeline(url)
+            if page is None:
+                return False
+            self.sub_events.extend(page['sub_events'])
             
-            # 等待初始内容加载
-            time.sleep(3)
-            
-            # 动态加载：循环滚动 + 点击“加载更多”，直到元素数量稳定
-            logger.info("正在滚动页面以加载更多内容...")
-            stable_loops = 0
-            last_count = -1
-            max_loops = 80
-
-            def query_item_count():
-                try:
-                    return int(self.driver.execute_script(
-                        "return document.querySelectorAll(`div.item, div[class*=item], div[class*=event], li[class*=item], li[class*=event], .timeline-item, .event-item`).length;")
-                    )
-                except Exception:
-                    return 0
-
-            # 若页面提供总数，作为退出参考
-            declared_total = 0
-            try:
-                declared_total = int(self.core_info.get('sub_event_count', 0))
-            except Exception:
-                declared_total = 0
-
-            for i in range(max_loops):
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(1.5)
-
-                # 尝试点击“加载更多/展开”
-                try:
-                    load_buttons = self.driver.find_elements(By.XPATH, "//button[contains(., '加载') or contains(., '更多') or contains(translate(., 'MORE', 'more'), 'more') or contains(translate(., 'LOAD', 'load'), 'load')] | //*[(contains(@class, 'load') or contains(@class, 'more')) and self::button] | //a[contains(., '加载') or contains(., '更多')]")
-                    clicked = False
-                    for btn in load_buttons:
-                        if btn.is_displayed() and btn.is_enabled():
-                            try:
-                                self.driver.execute_script("arguments[0].click();", btn)
-                                clicked = True
-                                time.sleep(2)
-                            except Exception:
-                                continue
-                    if clicked:
-                        time.sleep(1)
-                except Exception:
-                    pass
-
-                count_now = query_item_count()
-                logger.debug(f"加载循环 {i+1}: 当前事件项 {count_now}")
-
-                if count_now == last_count:
-                    stable_loops += 1
-                else:
-                    stable_loops = 0
-                last_count = count_now
-
-                # 退出条件：稳定多次或达到声明总数
-                if (declared_total and count_now >= declared_total) or stable_loops >= 5:
-                    break
-
-            # 最后等待一下确保所有内容加载完成
-            time.sleep(2)
-            
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            # 尝试多种可能的选择器
-            event_items = []
-            selectors = [
-                'div.item',
-                'div[class*="item"]',
-                'div[class*="event"]',
-                'li[class*="item"]',
-                'li[class*="event"]',
-                '.timeline-item',
-                '.event-item',
-                'section[class*="item"]',
-            ]
-            for selector in selectors:
-                items = soup.select(selector)
-                if items and len(items) > len(event_items):
-                    event_items = items
-                    logger.info(f"使用选择器 '{selector}' 找到 {len(items)} 个事件项")
-            
-            logger.info(f"最终找到 {len(event_items)} 个事件项")
-            
-            seen_keys = set()
-            for i, item in enumerate(event_items):
-                try:
-                    sub_event = self._extract_event_from_item(item, i+1)
-                    if sub_event:
-                        key = (sub_event.get('title', ''), sub_event.get('time', ''))
-                        if key not in seen_keys:
-                            seen_keys.add(key)
-                            self.sub_events.append(sub_event)
-                except Exception as e:
-                    logger.warning(f"解析事件项 {i+1} 失败: {e}")
-                    continue
-            
-            logger.info(f"成功提取 {len(self.sub_events)} 个子事件")
+            logger.info(f"成功提取 {len(self.sub_events)} 个子事件（{page['via']}）")
             
             # 显示前几个子事件预览
             for i, event in enumerate(self.sub_events[:5]):
@@ -302,9 +226,47 @@ class Level1Scraper:
             return True
             
         except Exception as e:
-            logger.error(f"爬取子事件失败: {e}")
+            self.last_failure = classify_exception(e)
+            logger.error(f"爬取子事件失败（{self.last_failure}）: {e}")
             return False
     
+    def _parse_sub_events(self, soup):
+        """从时间线页面中解析子事件（按标题+时间去重）"""
+        # 尝试多种可能的选择器
+        event_items = []
+        selectors = [
+            'div.item',
+            'div[class*="item"]',
+            'div[class*="event"]',
+            'li[class*="item"]',
+            'li[class*="event"]',
+            '.timeline-item',
+            '.event-item',
+            'section[class*="item"]',
+        ]
+        for selector in selectors:
+            items = soup.select(selector)
+            if items and len(items) > len(event_items):
+                event_items = items
+                logger.info(f"使用选择器 '{selector}' 找到 {len(items)} 个事件项")
+        
+        logger.info(f"最终找到 {len(event_items)} 个事件项")
+        
+        sub_events = []
+        seen_keys = set()
+        for i, item in enumerate(event_items):
+            try:
+                sub_event = self._extract_event_from_item(item, i+1)
+                if sub_event:
+                    key = (sub_event.get('title', ''), sub_event.get('time', ''))
+                    if key not in seen_keys:
+                        seen_keys.add(key)
+                        sub_events.append(sub_event)
+            except Exception as e:
+                logger.warning(f"解析事件项 {i+1} 失败: {e}")
+                continue
+        return sub_events
+    
     def _extract_event_from_item(self, item, index):
         """从单个item元素中提取事件信息"""
         sub_event = {
@@ -343,7 +305,7 @@ class Level1Scraper:
         
         # 只有当标题不为空时才返回
         if sub_event['title']:
-            return sub_event
+            return SubEvent.from_dict(sub_event)
         
         return None
     
@@ -352,13 +314,13 @@ class Level1Scraper:
         try:
             output_data = {
                 'core_info': self.core_info,
-                'sub_events': self.sub_events,
+                'sub_events': [event.to_dict() for event in self.sub_events],
                 'total_sub_events': len(self.sub_events),
                 'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S')
             }
             
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(output_data, f, ensure_ascii=False, indent=2)
+            with stage('save_level1'):
+                filename = storage.dump_json(filename, output_data)
             
             logger.info(f"数据已保存到 {filename}")
         except Exception as e:
@@ -367,13 +329,17 @@ class Level1Scraper:
     def start_level2_scraping(self, output_dir: str = None, csv_output_file: str = None):
         """启动二级评论爬取"""
         logger.info("开始启动二级评论爬取...")
+        # 二级爬虫依赖 pandas，只在真正进入二级爬取时导入
+        from level2_scraper import Level2Scraper
+        from data_manager import DataManager
         
         try:
             # 创建二级爬虫实例
             level2_scraper = Level2Scraper(
                 self.core_info.get('core_event_name', ''),
                 output_dir=output_dir,
-                csv_output_file=csv_output_file
+                csv_output_file=csv_output_file,
+                driver_manager=self.driver_manager
             )
             
             # 开始爬取评论
@@ -422,9 +388,13 @@ class Level1Scraper:
         print("="*60)
     
     def close(self):
-        """关闭资源"""
-        if self.driver:
-            self.driver.quit()
+        """关闭资源（复用的驱动由 DriverManager 负责关闭）"""
+        if self.driver and self.driver_manager is None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                # 看门狗超时后浏览器进程已被结束
+                logger.warning(f"关闭浏览器失败: {e}")
         self.session.close()
 
 def main():
@@ -465,4 +435,5 @@ def main():
         scraper.close()
 
 if __name__ == "__main__":
+    setup_logging()
     main()
@@ -10,12 +10,6 @@ from bs4 import BeautifulSoup
 import json
 import time
 import re
-import pandas as pd
-from selenium import webdriver
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.chrome.service import Service as ChromeService
-from selenium.webdriver.edge.options import Options as EdgeOptions
-from selenium.webdriver.edge.service import Service as EdgeService
 import os
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
@@ -23,26 +17,68 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.common.exceptions import TimeoutException, NoSuchElementException
 import logging
 import os
+from metrics import stage
+from row_watchdog import watchdog
+from browser import create_driver
+from page_loader import COMMENT_ITEM_SELECTOR, COMMENT_MORE_PATTERN, load_comments
+from fetch_router import fetch_router
+from failures import (FAIL_BLOCKED, FAIL_DRIVER_CRASH, FAIL_PARSE_EMPTY, RetryQueue, classify_exception,
+                      has_comment_section, is_blocked)
+from records import (CommentStore, STATUS_ERROR, STATUS_NO_COMMENTS, STATUS_NO_LINK, STATUS_OK,
+                     STATUS_SKIPPED, NO_COMMENTS_PLACEHOLDER, NON_BAIJIAHAO_PLACEHOLDER)
+import storage
+from log_config import Sampler, setup_logging
 
-# 配置日志
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+# 日志由入口通过 log_config.setup_logging() 统一配置
 logger = logging.getLogger(__name__)
+# 静态 HTML 中仍有这些控件时评论不完整，需要浏览器展开
+_STATIC_MORE_RE = re.compile(COMMENT_MORE_PATTERN.lstrip('^'))
+# 评论区容器：判断“暂无评论”只看这些元素渲染出的文字，不看脚本/模板中的字符串
+COMMENT_AREA_SELECTOR = '[class*="xcp-"], .comment-list, [class*="commentList"]'
+
+# 单篇文章评论加载上限：条数 / 秒数 / 展开轮数（可用环境变量覆盖）
+COMMENT_MAX_ITEMS = int(os.environ.get('COMMENT_MAX_ITEMS', '500'))
+COMMENT_MAX_SECONDS = float(os.environ.get('COMMENT_MAX_SECONDS', '30'))
+COMMENT_MAX_ROUNDS = int(os.environ.get('COMMENT_MAX_ROUNDS', '40'))
+
+# 输出格式：flat=原扁平格式（默认），normalized=子事件表 + 评论表，both=两者都写
+OUTPUT_SCHEMA = os.environ.get('OUTPUT_SCHEMA', 'flat')
+
+# 输出文件批量落盘：累计N条评论或间隔N秒重写一次（每个子事件结束时也会落盘）
+SAVE_EVERY_COMMENTS = int(os.environ.get('SAVE_EVERY_COMMENTS', '50'))
+SAVE_INTERVAL_SECONDS = float(os.environ.get('SAVE_INTERVAL_SECONDS', '10'))
 
 class Level2Scraper:
-    def __init__(self, core_event_name="", output_dir: str = None, csv_output_file: str = None):
+    def __init__(self, core_event_name="", output_dir: str = None, csv_output_file: str = None, driver_manager=None):
         self.session = requests.Session()
         self.driver = None
-        self.comments_data = []
+        self.driver_manager = driver_manager
+        self.comments_data = CommentStore()  # 紧凑评论记录，输出时再转为 dict
         self.core_event_name = core_event_name
         # 输出目录与文件
         self.output_dir = output_dir or 'data'
         if not os.path.exists(self.output_dir):
             os.makedirs(self.output_dir, exist_ok=True)
         self.level2_file = os.path.join(self.output_dir, 'level2_data.json')
+        self.coverage_file = os.path.join(self.output_dir, 'comment_coverage.jsonl')
+        self.normalized_file = os.path.join(self.output_dir, 'level2_normalized.json')
+        self.write_flat = OUTPUT_SCHEMA in ('flat', 'both')
+        self.write_normalized = OUTPUT_SCHEMA in ('normalized', 'both')
+        # 所有输出文件都原子写出，并按批次合并重写
+        self.writer = storage.BatchedWriter(SAVE_EVERY_COMMENTS, SAVE_INTERVAL_SECONDS)
+        self.writer.register('json', self._write_json_outputs)
+        self.writer.register('tables', self._write_table_outputs)
+        self.comment_coverage = []
+        # 每条评论的明细按子事件采样输出，完整数量见每个子事件的汇总行；
+        # event_id（event_1、event_2…）每行都会重复，采样计数随爬虫实例（每行一个）重新开始
+        self._comment_detail = Sampler()
+        self.last_failure = None  # 最近一次 scrape_comments_from_url 的失败类别（成功为 None）
+        self.retry_summary = {}
         self.table_file = os.path.join(self.output_dir, f"{self._sanitize_filename(core_event_name)}_评论数据.xlsx")
         self.csv_output_file = csv_output_file  # 例如 D:/.../Israeli_Palestinian_conflict.csv
         self._init_session()
-        self._init_selenium()
+        # 浏览器在第一次需要打开页面时才启动（静态抓取成功的页面不需要浏览器）；
+        # 批量模式下由 DriverManager 提供跨行复用的浏览器会话
         self._ensure_data_dir()
     
     def _sanitize_filename(self, filename):
@@ -70,67 +106,7 @@ class Level2Scraper:
     
     def _init_selenium(self):
         """初始化Selenium"""
-        try:
-            chrome_options = Options()
-            chrome_options.add_argument('--headless')
-            chrome_options.add_argument('--no-sandbox')
-            chrome_options.add_argument('--disable-dev-shm-usage')
-            chrome_options.add_argument('--disable-gpu')
-            chrome_options.add_argument('--disable-extensions')
-            chrome_options.add_argument('--disable-logging')
-            chrome_options.add_argument('--disable-web-security')
-            chrome_options.add_argument('--window-size=1920,1080')
-            chrome_options.add_argument('--user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36')
-            
-            # 优先尝试：Selenium Manager（不下载第三方依赖）
-            try:
-                logger.info("正在初始化Chrome（Selenium Manager）...")
-                self.driver = webdriver.Chrome(options=chrome_options)
-                self.driver.set_page_load_timeout(30)
-                logger.info("Selenium WebDriver 初始化成功 (Chrome)")
-                return
-            except Exception as e1:
-                logger.warning(f"Chrome (Selenium Manager) 初始化失败: {e1}")
-
-            # 备用：本地chromedriver（通过环境变量指定）
-            try:
-                logger.info("尝试使用本地chromedriver（跳过网络下载）...")
-                os.environ['WDM_LOCAL'] = '1'
-                chromedriver_path = os.environ.get('CHROMEDRIVER_PATH', '')
-                if chromedriver_path and os.path.exists(chromedriver_path):
-                    logger.info(f"使用CHROMEDRIVER_PATH: {chromedriver_path}")
-                    self.driver = webdriver.Chrome(service=ChromeService(chromedriver_path), options=chrome_options)
-                    self.driver.set_page_load_timeout(30)
-                    logger.info("Selenium WebDriver 初始化成功 (本地chromedriver)")
-                    return
-            except Exception as e2:
-                logger.warning(f"本地chromedriver 初始化失败: {e2}")
-
-            # 最后备用：Edge
-            try:
-                logger.info("尝试使用Edge WebDriver 初始化...")
-                edge_options = EdgeOptions()
-                edge_options.use_chromium = True
-                edge_options.add_argument('--headless')
-                edge_options.add_argument('--no-sandbox')
-                edge_options.add_argument('--disable-dev-shm-usage')
-                edge_options.add_argument('--disable-gpu')
-                edge_options.add_argument('--disable-extensions')
-                edge_options.add_argument('--disable-logging')
-                edge_options.add_argument('--disable-web-security')
-                edge_options.add_argument('--window-size=1920,1080')
-                self.driver = webdriver.Edge(options=edge_options)
-                self.driver.set_page_load_timeout(30)
-                logger.info("Selenium WebDriver 初始化成功 (Edge)")
-                return
-            except Exception as e3:
-                logger.error(f"Edge 初始化失败: {e3}")
-
-            raise RuntimeError("无法初始化任何浏览器驱动。请安装 Chrome/Edge 或提供 CHROMEDRIVER_PATH。")
-        except Exception as e:
-            logger.error(f"Selenium WebDriver 初始化失败: {e}")
-            logger.error("请确保已安装Chrome浏览器和ChromeDriver")
-            self.driver = None
+        self.driver = create_driver()
     
     def _ensure_data_dir(self):
         """确保数据目录存在"""
@@ -138,46 +114,143 @@ class Level2Scraper:
             os.makedirs('data')
             logger.info("创建数据目录: data")
     
+    def _open_page(self, url, page):
+        """打开页面并等待 body 出现；复用驱动时先向 DriverManager 取会话，加载后回报结果以便按需回收"""
+        if self.driver_manager is not None:
+            self.driver = self.driver_manager.acquire()
+        elif self.driver is None:
+            with stage('driver_startup', scraper='level2'):
+                self._init_selenium()
+        if self.driver is None:
+            raise RuntimeError("WebDriver未初始化，无法爬取")
+        # 本行已超时则在导航前取消；否则登记浏览器进程并开始单页计时
+        watchdog.arm_page(self.driver, page)
+        ok = False
+        try:
+            with stage('driver_get', page=page):
+                self.driver.get(url)
+                WebDriverWait(self.driver, 15).until(
+                    EC.presence_of_element_located((By.TAG_NAME, "body"))
+                )
+            ok = True
+        finally:
+            if self.driver_manager is not None:
+                self.driver_manager.page_done(ok)
+    
     def scrape_comments_from_url(self, url, event_title, event_id):
-        """从单个URL爬取评论"""
+        """从单个URL爬取评论；失败时返回 []，并把失败类别记在 last_failure 和子事件状态中"""
         logger.info(f"开始爬取评论: {event_title[:30]}...")
+        self.last_failure = None
         
         # 检查URL是否为百度百家号页面（支持http和https）
         if not (url.startswith('https://baijiahao.baidu.com/') or url.startswith('http://baijiahao.baidu.com/')):
             logger.info(f"跳过非百家号页面: {url}")
             return []
         
-        if not self.driver:
-            logger.error("WebDriver未初始化，无法爬取")
-            return []
-        
+        # 上一篇的浏览器导航已经结束，静态抓取不计入单页截止时间
+        watchdog.disarm_page()
         try:
-            self.driver.get(url)
-            WebDriverWait(self.driver, 15).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # 等待页面加载
-            time.sleep(3)
-            
-            # 滚动页面加载更多评论
-            for i in range(5):
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
-            
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            comments = self._extract_comments(soup, event_title, event_id, url)
+            # 静态优先：HTML 中评论已完整（没有“更多评论/展开回复”）或明确“暂无评论”时不打开浏览器
+            comments = fetch_router.try_static(
+                url, 'article', lambda soup, html: self._parse_static_comments(soup, html, event_title, event_id, url))
+            if comments is not None:
+                load_result = {'count': len(comments), 'reason': 'static'}
+            else:
+                try:
+                    self._open_page(url, 'article')
+                    if is_blocked(self.driver.current_url):
+                        return self._fail_event(event_id, event_title, FAIL_BLOCKED, self.driver.current_url)
+                    
+                    # 自适应展开“更多评论/展开回复”，评论数不再增长或达到单篇上限时停止
+                    with stage('load_more', page='article'):
+                        load_result = load_comments(self.driver, COMMENT_MAX_ITEMS, COMMENT_MAX_SECONDS, COMMENT_MAX_ROUNDS)
+                    
+                    with stage('page_source', page='article'):
+                        html = self.driver.page_source
+                finally:
+                    # 导航和展开结束，之后的解析、保存和子事件间的等待不计入单页截止时间
+                    watchdog.disarm_page()
+                with stage('parse', page='article'):
+                    soup = BeautifulSoup(html, 'html.parser')
+                    comments = self._extract_comments(soup, event_title, event_id, url)
+                if not comments:
+                    # 0 条评论只有在评论区确实渲染出来时才可信
+                    if is_blocked(url, html):
+                        return self._fail_event(event_id, event_title, FAIL_BLOCKED, '安全验证页面')
+                    if not has_comment_section(html):
+                        return self._fail_event(event_id, event_title, FAIL_PARSE_EMPTY, '页面中没有评论区')
             
             # 实时存储每条评论
             for comment in comments:
                 self._save_single_comment(comment)
+            self._record_coverage(event_id, url, load_result, len(comments))
             
             logger.info(f"从 {event_title[:30]}... 提取到 {len(comments)} 条评论")
             return comments
             
         except Exception as e:
-            logger.error(f"爬取评论失败 {event_title[:30]}...: {e}")
-            return []
+            failure = classify_exception(e)
+            if failure == FAIL_DRIVER_CRASH:
+                self._recover_driver()
+            return self._fail_event(event_id, event_title, failure, e)
+    
+    def _parse_static_comments(self, soup, html, event_title, event_id, url):
+        """静态 HTML 中的评论：评论已完整渲染或页面明确“暂无评论”时返回评论列表，否则返回 None（需要浏览器）"""
+        if is_blocked(url, html):
+            return None
+        if soup.select_one(COMMENT_ITEM_SELECTOR):
+            if _STATIC_MORE_RE.search(soup.get_text(' ')):
+                return None
+            return self._extract_comments(soup, event_title, event_id, url)
+        return [] if '暂无评论' in self._comment_area_text(soup) else None
+    
+    @staticmethod
+    def _comment_area_text(soup):
+        """评论区容器渲染出的文字（跳过 script/template 中的同名结构）"""
+        return ' '.join(area.get_text(' ', strip=True) for area in soup.select(COMMENT_AREA_SELECTOR)
+                        if not area.find_parent(['script', 'template', 'noscript']))
+    
+    def _fail_event(self, event_id, event_title, failure, detail):
+        logger.error(f"爬取评论失败 {event_title[:30]}...（{failure}）: {detail}")
+        self.last_failure = failure
+        self.comments_data.set_status(event_id, STATUS_ERROR, failure=failure)
+        return []
+    
+    def _recover_driver(self):
+        """浏览器/驱动失联后立即换新会话，后续子事件和重试不再打到失效的会话上"""
+        watchdog.check()  # 看门狗结束的浏览器不再重建，直接取消本行
+        if self.driver_manager is not None:
+            self.driver_manager.recycle('crash')
+            self.driver = None  # 下次打开页面时重新 acquire
+            return
+        try:
+            self.driver.quit()
+        except Exception:
+            pass
+        self.driver = None  # 下次打开页面时重新启动
+    
+    def _record_coverage(self, event_id, url, load_result, extracted):
+        """记录单篇文章的评论加载覆盖情况，便于评估上限设置是否截断了热门文章"""
+        load_result = load_result or {}
+        entry = {
+            'event_id': event_id,
+            'url': url,
+            'loaded': load_result.get('count', 0),
+            'extracted': extracted,
+            'rounds': load_result.get('rounds', 0),
+            'clicks': load_result.get('clicks', 0),
+            'seconds': round(load_result.get('ms', 0) / 1000, 2),
+            'reason': load_result.get('reason', 'error'),
+            'truncated': load_result.get('truncated', False),
+        }
+        self.comment_coverage.append(entry)
+        if entry['truncated']:
+            logger.info(f"评论已截断（{entry['reason']}）: 加载 {entry['loaded']} 条，{entry['seconds']}s")
+        try:
+            with open(self.coverage_file, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(entry, ensure_ascii=False) + '\n')
+        except Exception as e:
+            logger.warning(f"写入评论覆盖记录失败: {e}")
     
     def _extract_comments(self, soup, event_title, event_id, url):
         """从页面中提取评论"""
@@ -386,38 +459,85 @@ class Level2Scraper:
             return None
     
     def _save_single_comment(self, comment):
-        """实时保存单条评论到JSON和表格文件"""
+        """记录单条评论；JSON 和表格文件按批次原子重写（每个子事件结束时必定落盘）"""
         try:
-            # 添加到内存中的评论列表
-            self.comments_data.append(comment)
-            
-            # 保存到JSON文件
-            self._save_to_json()
-            
-            # 更新表格文件
-            self._update_table()
+            # 添加到内存中的评论列表（转为共享子事件元数据的紧凑记录）
+            record = self.comments_data.add(comment)
+            self.writer.touch()
             
-            logger.info(f"✅ 评论已保存: {comment['user_id']} - {comment['comment_content'][:30]}...")
+            level = logging.INFO if self._comment_detail(record.event_id) else logging.DEBUG
+            if logger.isEnabledFor(level):
+                logger.log(level, "✅ 评论已记录: %s - %s...", record.user_id, record.comment_content[:30])
             
         except Exception as e:
             logger.error(f"保存评论失败: {e}")
     
+    def _write_json_outputs(self):
+        with stage('save_json'):
+            if self.write_flat:
+                self._save_to_json()
+            if self.write_normalized:
+                self._save_normalized()
+    
+    def _write_table_outputs(self):
+        with stage('update_table'):
+            if self.write_flat:
+                self._update_table()
+            if self.write_normalized:
+                self._update_normalized_tables()
+    
+    def flush_outputs(self):
+        """立即写出尚未落盘的评论"""
+        self.writer.flush()
+    
     def _save_to_json(self):
         """保存评论数据到JSON文件"""
         try:
             data = {
                 'core_event_name': self.core_event_name,
-                'comments': self.comments_data,
+                'comments': self.comments_data.to_dicts(),
                 'total_comments': len(self.comments_data),
                 'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S')
             }
             
-            with open(self.level2_file, 'w', encoding='utf-8') as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            storage.dump_json(self.level2_file, data)
                 
         except Exception as e:
             logger.error(f"保存JSON文件失败: {e}")
     
+    def _save_normalized(self):
+        """保存规范化的子事件表 + 评论表（评论以 event_id 关联，无占位行）"""
+        try:
+            storage.dump_json(self.normalized_file, self.comments_data.to_normalized(self.core_event_name))
+        except Exception as e:
+            logger.error(f"保存规范化JSON文件失败: {e}")
+    
+    def _save_event_status(self):
+        """子事件状态变化也算一次数据变更，随批次写出规范化输出（扁平输出中状态由占位行体现）"""
+        if self.write_normalized:
+            self.writer.touch()
+    
+    def _normalized_table_paths(self):
+        if self.csv_output_file:
+            base, ext = os.path.splitext(self.csv_output_file)
+            return f"{base}_events{ext or '.csv'}", f"{base}_comments{ext or '.csv'}"
+        return os.path.join(self.output_dir, 'events.csv'), os.path.join(self.output_dir, 'comments.csv')
+    
+    def _update_normalized_tables(self):
+        """更新规范化的子事件 CSV 与评论 CSV"""
+        try:
+            import pandas as pd
+            data = self.comments_data.to_normalized(self.core_event_name)
+            events_file, comments_file = self._normalized_table_paths()
+            with storage.atomic_path(events_file) as tmp:
+                pd.DataFrame(data['events']).to_csv(tmp, index=False, encoding='utf-8-sig')
+            with storage.atomic_path(comments_file) as tmp:
+                pd.DataFrame(data['comments'], columns=['event_id', 'comment_index', 'user_id', 'comment_time',
+                                                        'comment_content', 'user_location', 'like_count',
+                                                        'scrape_time']).to_csv(tmp, index=False, encoding='utf-8-sig')
+        except Exception as e:
+            logger.error(f"更新规范化表格失败: {e}")
+    
     def _update_table(self):
         """更新Excel表格文件"""
         try:
@@ -439,94 +559,35 @@ class Level2Scraper:
                 })
             
             # 创建DataFrame
+            import pandas as pd
             df = pd.DataFrame(table_data)
             
-            # 保存到Excel文件
-            df.to_excel(self.table_file, index=False, engine='openpyxl')
+            # 保存到Excel文件（先写临时文件再替换）
+            with storage.atomic_path(self.table_file) as tmp:
+                df.to_excel(tmp, index=False, engine='openpyxl')
 
-            # 可选：保存到CSV文件
+            # 可选：保存到CSV文件（atomic_path 会创建所在目录）
             if self.csv_output_file:
-                # 确保CSV目录存在
-                os.makedirs(os.path.dirname(self.csv_output_file), exist_ok=True)
-                df.to_csv(self.csv_output_file, index=False, encoding='utf-8-sig')
+                with storage.atomic_path(self.csv_output_file) as tmp:
+                    df.to_csv(tmp, index=False, encoding='utf-8-sig')
             
         except Exception as e:
             logger.error(f"更新表格文件失败: {e}")
     
     def scrape_all_comments(self, sub_events_data):
-        """爬取所有子事件的评论"""
+        """爬取所有子事件的评论；可重试的失败在主流程结束后按指数退避重试"""
         logger.info(f"开始爬取 {len(sub_events_data)} 个子事件的评论...")
         
         total_comments = 0
+        retries = RetryQueue(name='评论重试')
         
         for i, event in enumerate(sub_events_data):
             try:
                 logger.info(f"进度: {i+1}/{len(sub_events_data)} - {event['title'][:50]}...")
-                
-                if not event.get('link'):
-                    logger.warning(f"事件 {event['title']} 没有链接，跳过")
-                    continue
-                
-                # 为评论添加子事件时间信息
-                event_time = event.get('time', '')
-                event_url = event.get('link', '')
-                
-                # 先判断URL类型（支持http和https）
-                is_baijiahao = event_url.startswith('https://baijiahao.baidu.com/') or event_url.startswith('http://baijiahao.baidu.com/')
-                
-                if is_baijiahao:
-                    # 百家号页面：尝试爬取评论
-                    comments = self.scrape_comments_from_url(
-                        event_url, 
-                        event['title'], 
-                        event['id']
-                    )
-                    
-                    # 为每条评论添加子事件时间
-                    for comment in comments:
-                        comment['event_time'] = event_time
-                    
-                    # 若无评论，添加占位行
-                    if len(comments) == 0:
-                        placeholder_comment = {
-                            'event_title': event['title'],
-                            'event_id': event['id'],
-                            'event_url': event_url,
-                            'comment_index': 0,
-                            'user_id': '',
-                            'comment_time': '',
-                            'comment_content': '无评论',
-                            'user_location': '',
-                            'like_count': 0,
-                            'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S'),
-                            'event_time': event_time
-                        }
-                        self._save_single_comment(placeholder_comment)
-                else:
-                    # 非百家号页面：直接添加占位行
-                    comments = []
-                    placeholder_comment = {
-                        'event_title': event['title'],
-                        'event_id': event['id'],
-                        'event_url': event_url,
-                        'comment_index': 0,
-                        'user_id': '',
-                        'comment_time': '',
-                        'comment_content': '非百家号页面，跳过评论爬取',
-                        'user_location': '',
-                        'like_count': 0,
-                        'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S'),
-                        'event_time': event_time
-                    }
-                    self._save_single_comment(placeholder_comment)
-                
-                total_comments += len(comments)
-                
-                # 显示进度
-                if is_baijiahao:
-                    print(f"✅ {i+1}/{len(sub_events_data)} - {event['title'][:30]}... - {len(comments)} 条评论")
-                else:
-                    print(f"⏭️ {i+1}/{len(sub_events_data)} - {event['title'][:30]}... - 非百家号页面，跳过")
+                count, failure = self._scrape_event(event, f"{i+1}/{len(sub_events_data)}")
+                total_comments += count
+                if failure:
+                    retries.push(event['id'], event, failure)
                 
                 # 避免请求过快
                 time.sleep(2)
@@ -535,9 +596,119 @@ class Level2Scraper:
                 logger.error(f"处理事件 {event['title']} 失败: {e}")
                 continue
         
+        if len(retries):
+            logger.info(f"主流程完成，{len(retries)} 个子事件进入延迟重试")
+            
+            def retry(event):
+                nonlocal total_comments
+                count, failure = self._scrape_event(event, '重试')
+                total_comments += count
+                return failure
+            
+            retries.drain(retry)
+        for event_id, failure in retries.gave_up.items():
+            self._give_up_event(event_id, failure)
+        self.retry_summary = retries.summary()
+        
+        self.flush_outputs()
         logger.info(f"评论爬取完成，共获取 {total_comments} 条评论")
         return total_comments
     
+    def _scrape_event(self, event, progress_label):
+        """处理单个子事件，返回 (评论数, 失败类别)；失败时不写“无评论”占位行，由调用方决定重试"""
+        # 为评论添加子事件时间信息
+        event_time = event.get('time', '')
+        event_url = event.get('link', '')
+        # 子事件元数据只登记一次，该子事件下的评论都引用它
+        self.comments_data.register_event(event['id'], event['title'], event_url, event_time)
+        
+        if not event.get('link'):
+            logger.warning(f"事件 {event['title']} 没有链接，跳过")
+            self.comments_data.set_status(event['id'], STATUS_NO_LINK)
+            self._save_event_status()
+            return 0, None
+        
+        # 先判断URL类型（支持http和https）
+        is_baijiahao = event_url.startswith('https://baijiahao.baidu.com/') or event_url.startswith('http://baijiahao.baidu.com/')
+        failure = None
+        
+        if is_baijiahao:
+            # 百家号页面：尝试爬取评论
+            comments = self.scrape_comments_from_url(
+                event_url, 
+                event['title'], 
+                event['id']
+            )
+            failure = self.last_failure
+            
+            # 为每条评论添加子事件时间
+            for comment in comments:
+                comment['event_time'] = event_time
+            
+            if failure:
+                # 失败状态与类别已由 scrape_comments_from_url 记录
+                self._save_event_status()
+            else:
+                self.comments_data.set_status(event['id'], STATUS_OK if comments else STATUS_NO_COMMENTS,
+                                              len(comments))
+                
+                # 若无评论，添加占位行（只用于扁平输出，规范化输出用子事件状态表示）
+                if len(comments) == 0 and self.write_flat:
+                    self._save_placeholder(event['id'], NO_COMMENTS_PLACEHOLDER)
+                else:
+                    self._save_event_status()
+        elif not self.write_flat:
+            comments = []
+            self.comments_data.set_status(event['id'], STATUS_SKIPPED)
+            self._save_event_status()
+        else:
+            # 非百家号页面：直接添加占位行
+            comments = []
+            self.comments_data.set_status(event['id'], STATUS_SKIPPED)
+            self._save_placeholder(event['id'], NON_BAIJIAHAO_PLACEHOLDER)
+        
+        # 每个子事件结束时落盘，崩溃最多丢失正在处理的子事件
+        self.flush_outputs()
+        
+        # 显示进度
+        if failure:
+            print(f"⚠️ {progress_label} - {event['title'][:30]}... - 失败（{failure}）")
+        elif is_baijiahao:
+            print(f"✅ {progress_label} - {event['title'][:30]}... - {len(comments)} 条评论")
+        else:
+            print(f"⏭️ {progress_label} - {event['title'][:30]}... - 非百家号页面，跳过")
+        return len(comments), failure
+    
+    def _save_placeholder(self, event_id, content):
+        meta = self.comments_data.events[event_id]
+        placeholder_comment = {
+            'event_title': meta.title,
+            'event_id': event_id,
+            'event_url': meta.url,
+            'comment_index': 0,
+            'user_id': '',
+            'comment_time': '',
+            'comment_content': content,
+            'user_location': '',
+            'like_count': 0,
+            'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'event_time': meta.time
+        }
+        self._save_single_comment(placeholder_comment)
+    
+    def _give_up_event(self, event_id, failure):
+        """
+        重试用尽：parse_empty 多次仍没有评论区，按真实的“无评论”处理；
+        其他类别保持 error 状态（规范化输出中带失败类别），不写占位行，以免被当成没有评论
+        """
+        if failure == FAIL_PARSE_EMPTY:
+            self.comments_data.set_status(event_id, STATUS_NO_COMMENTS)
+            if self.write_flat:
+                self._save_placeholder(event_id, NO_COMMENTS_PLACEHOLDER)
+                return
+        logger.warning(f"子事件 {event_id} 最终失败（{failure}）")
+        self._save_event_status()
+    
     def print_summary(self):
         """打印摘要信息"""
         print("\n" + "="*60)
@@ -547,6 +718,14 @@ class Level2Scraper:
         print(f"总评论数: {len(self.comments_data)}")
         print(f"JSON文件: {self.level2_file}")
         print(f"表格文件: {self.table_file}")
+        if self.comment_coverage:
+            truncated = sum(1 for c in self.comment_coverage if c['truncated'])
+            load_seconds = sum(c['seconds'] for c in self.comment_coverage)
+            print(f"评论加载: {len(self.comment_coverage)} 篇，截断 {truncated} 篇，共用时 {load_seconds:.1f}s")
+        if self.retry_summary.get('attempts'):
+            gave_up = self.retry_summary['gave_up']
+            print(f"失败重试: 恢复 {self.retry_summary['recovered']} 篇，最终失败 {len(gave_up)} 篇"
+                  + (f"（{', '.join(sorted(set(gave_up.values())))}）" if gave_up else ''))
         
         if self.comments_data:
             # 统计信息
@@ -564,9 +743,14 @@ class Level2Scraper:
         print("="*60)
     
     def close(self):
-        """关闭资源"""
-        if self.driver:
-            self.driver.quit()
+        """关闭资源（复用的驱动由 DriverManager 负责关闭）"""
+        self.flush_outputs()
+        if self.driver and self.driver_manager is None:
+            try:
+                self.driver.quit()
+            except Exception as e:
+                # 看门狗超时后浏览器进程已被结束
+                logger.warning(f"关闭浏览器失败: {e}")
         self.session.close()
 
 def main():
@@ -583,4 +767,5 @@ def main():
         scraper.close()
 
 if __name__ == "__main__":
+    setup_logging()
     main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 日志配置
+各模块只 getLogger(__name__)，不在导入时配置日志，由入口统一调用 setup_logging()：
+- 日志记录先放入内存队列（QueueHandler），由后台线程（QueueListener）写控制台/文件，
+  评论循环和多线程 ID 检测不再阻塞在控制台 I/O 上
+- LOG_LEVEL 设置全局级别，LOG_LEVELS 按子系统（模块名）单独设置，例如
+  LOG_LEVELS=level2_scraper=WARNING,test=DEBUG
+- LOG_FILE 额外写入日志文件
+- Sampler 把高频明细（每条评论、每个 ID）采样为前 N 条加每隔 K 条一条，其余由每个子事件/批次的汇总行体现
+"""
+
+import atexit
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+
+LOG_FORMAT = '%(asctime)s - %(levelname)s - %(message)s'
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+LOG_LEVELS = os.environ.get('LOG_LEVELS', '')
+LOG_FILE = os.environ.get('LOG_FILE', '')
+LOG_SAMPLE_FIRST = int(os.environ.get('LOG_SAMPLE_FIRST', '3'))
+LOG_SAMPLE_EVERY = int(os.environ.get('LOG_SAMPLE_EVERY', '50'))
+
+_listener = None
+
+
+def parse_levels(spec):
+    """'level2_scraper=WARNING,test=DEBUG' -> {'level2_scraper': 'WARNING', 'test': 'DEBUG'}"""
+    levels = {}
+    for item in (spec or '').split(','):
+        name, sep, level = item.partition('=')
+        if sep and name.strip() and level.strip():
+            levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level=None, levels=None, log_file=None, fmt=LOG_FORMAT):
+    """
+    配置根日志器为队列 + 后台写出线程（重复调用只更新级别）
+    level: 全局级别，默认 LOG_LEVEL；levels: {模块名: 级别} 或 'a=INFO,b=DEBUG'，默认 LOG_LEVELS
+    log_file: 额外写入的日志文件，默认 LOG_FILE
+    """
+    global _listener
+    root = logging.getLogger()
+    root.setLevel((level or LOG_LEVEL).upper())
+    if isinstance(levels, str) or levels is None:
+        levels = parse_levels(LOG_LEVELS if levels is None else levels)
+    for name, subsystem_level in levels.items():
+        logging.getLogger(name).setLevel(subsystem_level.upper() if isinstance(subsystem_level, str) else subsystem_level)
+
+    if _listener is not None:
+        return root
+
+    formatter = logging.Formatter(fmt)
+    handlers = [logging.StreamHandler(sys.stderr)]
+    log_file = LOG_FILE if log_file is None else log_file
+    if log_file:
+        os.makedirs(os.path.dirname(log_file) or '.', exist_ok=True)
+        handlers.append(logging.FileHandler(log_file, encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+    _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+    return root
+
+
+def shutdown_logging():
+    """写完队列中剩余的日志并停止后台线程"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+
+class Sampler:
+    """
+    高频明细采样：同一 key 的前 first 次全部通过，之后每 every 次通过一次（every<=0 表示只放行前 first 次）
+        if sampler(event_id):
+            logger.info(...)
+    """
+
+    def __init__(self, first=None, every=None):
+        self.first = LOG_SAMPLE_FIRST if first is None else first
+        self.every = LOG_SAMPLE_EVERY if every is None else every
+        self._counts = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, key=None):
+        with self._lock:
+            n = self._counts.get(key, 0) + 1
+            self._counts[key] = n
+        if n <= self.first:
+            return True
+        return self.every > 0 and (n - self.first) % self.every == 0
+
+    def count(self, key=None):
+        return self._counts.get(key, 0)
+
+    def reset(self, key=None):
+        with self._lock:
+            self._counts.pop(key, None)
@@ -5,13 +5,28 @@
 """
 
 from level1_scraper import Level1Scraper
+from scheduler import RowScheduler
+from metrics import metrics
+from profiling import RowProfiler
+from progress import BatchProgress
+from driver_manager import DriverManager
+from log_config import setup_logging
+from work_queue import WorkQueue
+from row_watchdog import RowTimeout, watchdog
+from fetch_router import fetch_router
+from failures import FAIL_DRIVER_CRASH, FAIL_PARSE_EMPTY, FAIL_TIMEOUT, RETRYABLE, RetryQueue, backoff_seconds, classify_exception
 import os
-import csv
 import argparse
+from contextlib import nullcontext
 
 
-def run_full_scrape(target_url: str, output_dir: str, csv_filename: str):
-    scraper = Level1Scraper()
+def run_full_scrape(target_url: str, output_dir: str, csv_filename: str, driver_manager: DriverManager = None):
+    """
+    返回 (二级评论总数, None)；一级爬取失败返回 (None, 失败类别)，类别见 failures.FAIL_*
+    （一级页面没有解析出核心信息/子事件且没有更具体的原因时为 parse_empty）。
+    传入 driver_manager 时一级、二级共用其浏览器会话
+    """
+    scraper = Level1Scraper(driver_manager=driver_manager)
     try:
         if scraper.scrape_core_info(target_url) and scraper.scrape_sub_events(target_url):
             # 覆盖默认的保存位置到 output_dir
@@ -25,13 +40,138 @@ def run_full_scrape(target_url: str, output_dir: str, csv_filename: str):
 
             # 启动二级，定向输出
             # 二级页面：每条评论实时保存（由 Level2Scraper 实现），并输出到指定目录
-            scraper.start_level2_scraping(output_dir=output_dir, csv_output_file=csv_output)
+            return scraper.start_level2_scraping(output_dir=output_dir, csv_output_file=csv_output), None
         else:
-            print('❌ 爬取失败：无法获取核心信息或子事件')
+            failure = scraper.last_failure or FAIL_PARSE_EMPTY
+            print(f'❌ 爬取失败：无法获取核心信息或子事件（{failure}）')
+            return None, failure
     finally:
         scraper.close()
 
 
+def run_batch(csv_path: str, start_row: int = 2, end_row: int = None, order: str = 'file', budget: int = None,
+              metrics_dir: str = None, profile: bool = False, profile_rows: int = None,
+              status_dir: str = os.path.join('data_BAI_DU', '_status'), reuse_driver: bool = True,
+              recycle_pages: int = 50, recycle_rss_mb: int = 1500, recycle_errors: int = 3,
+              browser_profile: str = None, browser_cache_mb: int = 512, queue_db: str = None,
+              lease_seconds: int = 600, row_timeout: int = 3600, page_timeout: int = 180):
+    """
+    基于CSV的url列批量爬取；order='priority' 时按调度器得分排序，budget 限制最多处理的行数
+    profile/profile_rows 开启逐行 cProfile + tracemalloc 剖析（profile_rows 只剖析前N行）
+    status_dir 下写出本 worker 的进度状态文件（行数、吞吐、当前阶段、ETA）
+    reuse_driver 时所有行共用一个浏览器会话，按页数/内存/连续错误回收（recycle_*，0 表示不按该项回收）
+    browser_profile 为持久化浏览器目录的根目录（需 reuse_driver），磁盘缓存上限 browser_cache_mb
+    queue_db 为共享任务队列（SQLite）路径：给出 csv_path 时先把行加入队列（已有的行不变），
+    然后以 lease_seconds 秒的租约逐行领取，直到队列中没有可领取的行
+    row_timeout / page_timeout 为每行、每次页面导航的截止时间（秒，0 表示不限），
+    超时后结束浏览器进程树，该行记为超时并继续下一行
+    失败按类别（timeout/driver_crash/blocked/parse_empty）归类，可重试的行在主流程之后按指数退避重试
+    """
+    if metrics_dir:
+        metrics.configure(metrics_dir)
+    watchdog.configure(row_timeout=row_timeout, page_timeout=page_timeout)
+    profiler = RowProfiler(enabled=profile or profile_rows is not None, max_rows=profile_rows)
+    work_queue = None
+    if queue_db:
+        work_queue = WorkQueue(queue_db, worker_id=metrics.worker_id, lease_seconds=lease_seconds)
+        if csv_path:
+            work_queue.add_csv(csv_path, start_row, end_row, order=order, budget=budget)
+        print(f'📋 从队列 {queue_db} 领取任务（队列剩余 {work_queue.remaining()} 行，worker {work_queue.worker_id}）')
+
+        def claimed():
+            # 进度只统计本 worker 领取的行，多个 worker 的状态文件汇总时不会重复计算队列总量
+            for task in work_queue.iter_claims():
+                progress.total_rows += 1
+                yield task
+
+        tasks = claimed()
+        total_rows = 0
+    else:
+        scheduler = RowScheduler()
+        tasks = scheduler.load_rows(csv_path, start_row, end_row)
+        if order == 'priority':
+            tasks = scheduler.order(tasks, budget=budget)
+            print(f'📋 已按优先级排序 {len(tasks)} 行（预算: {budget if budget is not None else "不限"}）')
+        elif budget is not None:
+            tasks = tasks[:budget]
+        total_rows = len(tasks)
+
+    progress = BatchProgress(total_rows, status_dir=status_dir, worker_id=metrics.worker_id)
+    metrics.add_listener(progress.on_stage)
+
+    driver_manager = None
+    if reuse_driver:
+        driver_manager = DriverManager(max_pages=recycle_pages, max_rss_mb=recycle_rss_mb, max_errors=recycle_errors,
+                                       profile_root=browser_profile, cache_mb=browser_cache_mb)
+        driver_manager.reap_orphans()
+
+    def process(task):
+        """处理一行，返回失败类别（成功返回 None）"""
+        idx, seq, url = task['idx'], task['seq'], task['url']
+        out_dir = os.path.join('data_BAI_DU', str(seq))
+        out_csv_name = f'{seq}.csv'
+
+        if 'score' in task:
+            print(f'🚀 开始处理 第 {idx} 行（序号 {seq}，得分 {task["score"]:.2f}）：{url}')
+        else:
+            print(f'🚀 开始处理 第 {idx} 行（序号 {seq}）：{url}')
+        progress.start_row(idx, seq, url)
+        failure = None
+        try:
+            with metrics.stage('row', seq=seq), profiler.profile_row(seq, out_dir), \
+                    (work_queue.lease(seq) if work_queue else nullcontext()), watchdog.row(seq):
+                comments, failure = run_full_scrape(url, out_dir, out_csv_name, driver_manager=driver_manager)
+            progress.finish_row(comments or 0, error=failure)
+            if driver_manager is not None and failure in (FAIL_DRIVER_CRASH, FAIL_TIMEOUT):
+                # 一级爬虫内部捕获了浏览器失联/加载超时，共享会话状态未知，换新会话
+                driver_manager.recycle(failure)
+                driver_manager.reap_orphans()
+            if work_queue and not failure:
+                work_queue.complete(seq, comments)
+        except (Exception, RowTimeout) as e:
+            timed_out = isinstance(e, RowTimeout)
+            failure = classify_exception(e)
+            if timed_out:
+                print(f'⏱️ 第 {idx} 行（序号 {seq}）超时，已取消：{e.reason}')
+            else:
+                print(f'❌ 第 {idx} 行（序号 {seq}）处理失败（{failure}）：{e}')
+            progress.finish_row(0, error=failure)
+            if driver_manager is not None:
+                # 行异常中断时浏览器状态未知，直接换新会话并清理可能遗留的进程
+                driver_manager.recycle('timeout' if timed_out else 'row_failed')
+                driver_manager.reap_orphans()
+        if work_queue and failure:
+            # 队列模式：失败的行带退避时间重新排队，由任意 worker 稍后领取
+            work_queue.fail(seq, failure, retry=failure in RETRYABLE, delay=backoff_seconds(task.get('attempt', 1)))
+        metrics.write_prometheus()
+        return failure
+
+    retries = RetryQueue(name='行重试')
+    for task in tasks:
+        failure = process(task)
+        if failure and not work_queue and retries.push(task['seq'], task, failure):
+            progress.total_rows += 1
+    if len(retries):
+        # 可重试的失败放到主流程之后，按指数退避重试，不拖慢其余行
+        print(f'🔄 主流程完成，{len(retries)} 行进入延迟重试')
+        retries.drain(process)
+    if retries.attempts:
+        summary = retries.summary()
+        print(f'🔄 行重试：恢复 {summary["recovered"]} 行，最终失败 {len(summary["gave_up"])} 行 {summary["gave_up"] or ""}')
+    static_pages = {key: f"{entry['static_ok']}/{entry['attempts']}" for key, entry in fetch_router.summary().items()}
+    if static_pages:
+        print(f'🌐 静态抓取成功/尝试（累计）：{static_pages}')
+    fetch_router.save()
+    if watchdog.timeouts:
+        print(f'⏱️ 超时取消 {watchdog.timeouts} 行')
+    if driver_manager is not None:
+        print(f'🔧 浏览器会话：启动 {driver_manager.sessions_started} 次，回收 {driver_manager.recycles or "无"}')
+        driver_manager.close()
+    profiler.stop()
+    metrics.close()
+    print('✅ 批量处理完成')
+
+
 if __name__ == '__main__':
     # ========== 批量模式：基于CSV的url列进行批量爬取 ==========
     # 请在这里填写CSV文件路径（包含表头，必须包含名为 url 的列）
@@ -47,7 +187,28 @@ if __name__ == '__main__':
     parser = argparse.ArgumentParser(description='Batch scrape Baidu events from a CSV file of URLs.')
     parser.add_argument('--start-row', type=int, help='起始行号（>=2）')
     parser.add_argument('--end-row', type=int, help='结束行号（可选，包含该行）')
+    parser.add_argument('--order', choices=['file', 'priority'], default='file',
+                        help='处理顺序：file=文件顺序，priority=按新鲜度/百家号数量/历史产出排序')
+    parser.add_argument('--budget', type=int, help='最多处理的行数（可选）')
+    parser.add_argument('--metrics-dir', default=os.path.join('data_BAI_DU', '_metrics'),
+                        help='分阶段耗时 JSONL/Prometheus 快照的输出目录，留空则不落盘')
+    parser.add_argument('--profile', action='store_true', help='逐行采集 cProfile 与 tracemalloc 报告')
+    parser.add_argument('--profile-rows', type=int, help='只剖析前N行（隐含 --profile）')
+    parser.add_argument('--no-reuse-driver', action='store_true', help='每行重新启动浏览器（不跨行复用会话）')
+    parser.add_argument('--recycle-pages', type=int, default=50, help='复用会话累计加载N个页面后回收')
+    parser.add_argument('--recycle-rss-mb', type=int, default=1500, help='浏览器进程树内存超过N MB时回收（需要psutil）')
+    parser.add_argument('--recycle-errors', type=int, default=3, help='连续N次页面加载失败后回收')
+    parser.add_argument('--browser-profile', nargs='?', const=os.path.join('data_BAI_DU', '_browser', 'profiles'), default=None,
+                        help='使用持久化浏览器目录和磁盘缓存（可指定根目录，每个worker独占一个子目录）')
+    parser.add_argument('--browser-cache-mb', type=int, default=512, help='持久化浏览器磁盘缓存上限（MB）')
+    parser.add_argument('--queue', default=None,
+                        help='共享任务队列（SQLite）路径：多个节点从同一队列以租约领取行，代替手工划分行号范围')
+    parser.add_argument('--lease-seconds', type=int, default=600, help='队列租约时长（秒），处理期间自动续租')
+    parser.add_argument('--row-timeout', type=int, default=3600, help='单行墙钟截止时间（秒，0 表示不限）')
+    parser.add_argument('--page-timeout', type=int, default=180,
+                        help='单次页面导航（含加载更多）的截止时间（秒，0 表示不限），超时结束浏览器并跳过该行')
     args, _unknown = parser.parse_known_args()
+    setup_logging()
 
     if args.start_row is not None:
         start_row = args.start_row
@@ -74,31 +235,13 @@ if __name__ == '__main__':
         start_row = 2
 
     if csv_path:
-        # 批量读取并逐行爬取
-        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
-            reader = csv.DictReader(f)
-            # 将行号与数据对齐：header在文件第1行，数据从第2行开始
-            for idx, row in enumerate(reader, start=2):
-                if idx < start_row:
-                    continue
-                if end_row is not None and idx > end_row:
-                    break
-
-                url = (row.get('url') or '').strip()
-                if not url:
-                    print(f'⏭️ 第 {idx} 行缺少 url，已跳过')
-                    continue
-
-                seq = idx - 1  # 序号 = 行号 - 1（第2行对应序号1）
-                out_dir = os.path.join('data_BAI_DU', str(seq))
-                out_csv_name = f'{seq}.csv'
-
-                print(f'🚀 开始处理 第 {idx} 行（序号 {seq}）：{url}')
-                try:
-                    run_full_scrape(url, out_dir, out_csv_name)
-                except Exception as e:
-                    print(f'❌ 第 {idx} 行（序号 {seq}）处理失败：{e}')
-        print('✅ 批量处理完成')
+        run_batch(csv_path, start_row, end_row, order=args.order, budget=args.budget,
+                  metrics_dir=args.metrics_dir or None, profile=args.profile, profile_rows=args.profile_rows,
+                  reuse_driver=not args.no_reuse_driver, recycle_pages=args.recycle_pages,
+                  recycle_rss_mb=args.recycle_rss_mb, recycle_errors=args.recycle_errors,
+                  browser_profile=args.browser_profile, browser_cache_mb=args.browser_cache_mb,
+                  queue_db=args.queue, lease_seconds=args.lease_seconds,
+                  row_timeout=args.row_timeout, page_timeout=args.page_timeout)
     else:
         # ========== 单个模式（保留原功能，按需使用） ==========
         target_url = 'https://events.baidu.com/search/vein?platform=pc&record_id=708914&query=%E9%82%A3%E8%8B%B1%E8%80%81%E5%85%AC%E5%90%A6%E8%AE%A4%E5%87%BA%E8%BD%A8%3A%E5%9B%A0%E8%85%BF%E4%BC%A4%E8%A2%AB%E6%90%80%E6%89%B6%E4%B8%8A%E8%BD%A6&srcid=50367'
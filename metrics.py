@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 分阶段耗时统计
+在驱动启动、页面加载、滚动加载、page_source 传输、解析和落盘等热点处计时，
+每次计时写一行 JSONL，并按 worker 输出 Prometheus 文本快照（含 p50/p95）
+"""
+
+import json
+import math
+import os
+import socket
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+# 每个阶段在内存中保留的最近样本数（用于计算分位数）
+MAX_SAMPLES = 10000
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+def percentile(values, q):
+    """最近秩法分位数，values 为空时返回 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, math.ceil(q * len(ordered)) - 1))
+    return ordered[k]
+
+
+class StageMetrics:
+    def __init__(self):
+        self.worker_id = default_worker_id()
+        self.output_dir = None
+        self._samples = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+        self._totals = defaultdict(lambda: [0, 0.0, 0])  # count, sum, errors
+        self._lock = threading.Lock()
+        self._jsonl = None
+        self._listeners = []
+
+    def configure(self, output_dir, worker_id=None):
+        """开启落盘：output_dir/metrics_<worker>.jsonl 与 metrics_<worker>.prom"""
+        self.close()
+        if worker_id:
+            self.worker_id = worker_id
+        self.output_dir = output_dir
+        os.makedirs(output_dir, exist_ok=True)
+        self._jsonl = open(self.jsonl_path, 'a', encoding='utf-8', buffering=1)
+
+    @property
+    def jsonl_path(self):
+        return os.path.join(self.output_dir, f'metrics_{self.worker_id}.jsonl') if self.output_dir else None
+
+    @property
+    def prom_path(self):
+        return os.path.join(self.output_dir, f'metrics_{self.worker_id}.prom') if self.output_dir else None
+
+    def add_listener(self, callback):
+        """注册阶段开始/结束回调：callback(event, stage, labels)，event 为 'start' 或 'end'"""
+        self._listeners.append(callback)
+
+    def _notify(self, event, name, labels):
+        for callback in self._listeners:
+            try:
+                callback(event, name, labels)
+            except Exception:
+                pass
+
+    @contextmanager
+    def stage(self, name, **labels):
+        """计时上下文：with metrics.stage('driver_get', url=url): ..."""
+        self._notify('start', name, labels)
+        t0 = time.perf_counter()
+        ok = True
+        try:
+            yield
+        except BaseException:
+            ok = False
+            raise
+        finally:
+            self.record(name, time.perf_counter() - t0, ok, **labels)
+            self._notify('end', name, labels)
+
+    def record(self, name, seconds, ok=True, **labels):
+        with self._lock:
+            self._samples[name].append(seconds)
+            totals = self._totals[name]
+            totals[0] += 1
+            totals[1] += seconds
+            if not ok:
+                totals[2] += 1
+            if self._jsonl is not None:
+                line = {'ts': round(time.time(), 3), 'worker': self.worker_id, 'stage': name,
+                        'seconds': round(seconds, 4), 'ok': ok}
+                line.update(labels)
+                self._jsonl.write(json.dumps(line, ensure_ascii=False) + '\n')
+
+    def summary(self):
+        """{stage: {count, sum, errors, p50, p95, max}}"""
+        with self._lock:
+            result = {}
+            for name, samples in self._samples.items():
+                count, total, errors = self._totals[name]
+                values = list(samples)
+                result[name] = {
+                    'count': count,
+                    'sum': round(total, 4),
+                    'errors': errors,
+                    'p50': round(percentile(values, 0.5), 4),
+                    'p95': round(percentile(values, 0.95), 4),
+                    'max': round(max(values), 4) if values else 0.0,
+                }
+            return result
+
+    def write_prometheus(self):
+        """写出 Prometheus textfile 快照（先写临时文件再替换，供 node_exporter 读取）"""
+        if not self.output_dir:
+            return
+        worker = self.worker_id.replace('"', '')
+        lines = [
+            '# HELP pachong_stage_seconds Wall time spent per scraper stage.',
+            '# TYPE pachong_stage_seconds summary',
+        ]
+        errors = []
+        for name, s in sorted(self.summary().items()):
+            label = f'worker="{worker}",stage="{name}"'
+            lines.append(f'pachong_stage_seconds{{{label},quantile="0.5"}} {s["p50"]}')
+            lines.append(f'pachong_stage_seconds{{{label},quantile="0.95"}} {s["p95"]}')
+            lines.append(f'pachong_stage_seconds_sum{{{label}}} {s["sum"]}')
+            lines.append(f'pachong_stage_seconds_count{{{label}}} {s["count"]}')
+            errors.append(f'pachong_stage_errors_total{{{label}}} {s["errors"]}')
+        lines.append('# HELP pachong_stage_errors_total Stages that ended with an exception.')
+        lines.append('# TYPE pachong_stage_errors_total counter')
+        lines.extend(errors)
+        tmp_path = self.prom_path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
+        os.replace(tmp_path, self.prom_path)
+
+    def close(self):
+        if self._jsonl is not None:
+            self._jsonl.close()
+            self._jsonl = None
+
+
+# 进程内共享的默认实例
+metrics = StageMetrics()
+stage = metrics.stage
+
+
+def summarize_jsonl(paths):
+    """汇总多个 worker 的 JSONL，返回 {stage: {count, p50, p95, max, errors}}"""
+    samples = defaultdict(list)
+    errors = defaultdict(int)
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    item = json.loads(line)
+                except ValueError:
+                    continue
+                samples[item['stage']].append(item['seconds'])
+                if not item.get('ok', True):
+                    errors[item['stage']] += 1
+    return {
+        name: {
+            'count': len(values),
+            'p50': round(percentile(values, 0.5), 3),
+            'p95': round(percentile(values, 0.95), 3),
+            'max': round(max(values), 3),
+            'errors': errors[name],
+        }
+        for name, values in samples.items()
+    }
+
+
+def main():
+    """python metrics.py data_BAI_DU/_metrics/*.jsonl  —— 打印各阶段 p50/p95"""
+    paths = sys.argv[1:]
+    if not paths:
+        print('用法: python metrics.py <metrics_*.jsonl> ...')
+        return
+    stats = summarize_jsonl(paths)
+    print(f"{'阶段':<20}{'次数':>8}{'p50(s)':>10}{'p95(s)':>10}{'max(s)':>10}{'失败':>6}")
+    for name, s in sorted(stats.items(), key=lambda kv: -kv[1]['p50'] * kv[1]['count']):
+        print(f"{name:<20}{s['count']:>8}{s['p50']:>10}{s['p95']:>10}{s['max']:>10}{s['errors']:>6}")
+
+
+if __name__ == '__main__':
+    main()
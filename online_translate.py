@@ -0,0 +1,159 @@
+import importlib
+import json
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+
+
+def _detect_engines() -> List[str]:
+    """检测已安装的在线翻译器（均为可选依赖，首次构建服务时才导入）"""
+    engines = []
+    for engine, module in (('googletrans', 'googletrans'), ('deep_translator', 'deep_translator')):
+        try:
+            importlib.import_module(module)
+            engines.append(engine)
+        except Exception:
+            pass
+    return engines
+
+
+class TokenBucket:
+    """令牌桶限速：每秒补充 rate 个令牌，最多积累 capacity 个"""
+
+    def __init__(self, rate: float, capacity: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class OnlineTranslationService:
+    """
+    在线翻译服务层
+    - 每个引擎只创建一个客户端并复用
+    - 线程池限制并发，令牌桶限制请求速率，失败按指数退避重试后切换下一个引擎
+    - 同一标题正在翻译时，后来的请求直接等待同一结果
+    engines 可选 googletrans / deep_translator / http；http 引擎向 endpoint 发送
+    LibreTranslate 风格的 POST 请求（{"q", "source", "target"} -> {"translatedText"}），
+    可指向本地替身服务做测试
+    """
+
+    def __init__(self, engines: Optional[List[str]] = None, endpoint: Optional[str] = None,
+                 max_workers: int = 4, rate: float = 5.0, burst: Optional[float] = None,
+                 retries: int = 2, backoff: float = 1.0, timeout: float = 10.0) -> None:
+        if engines is None:
+            engines = []
+            if endpoint:
+                engines.append('http')
+            engines.extend(_detect_engines())
+        self.engines = engines
+        self.endpoint = endpoint
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self._bucket = TokenBucket(rate, burst)
+        self._executor = ThreadPoolExecutor(max_workers=max(1, max_workers))
+        self._clients: Dict[str, object] = {}
+        self._lock = threading.Lock()
+        self._inflight: Dict[str, Future] = {}
+
+    @property
+    def available(self) -> bool:
+        return bool(self.engines)
+
+    def _client(self, engine: str):
+        with self._lock:
+            if engine not in self._clients:
+                if engine == 'googletrans':
+                    from googletrans import Translator as GoogletransTranslator  # type: ignore
+                    self._clients[engine] = GoogletransTranslator()
+                elif engine == 'deep_translator':
+                    from deep_translator import GoogleTranslator as DeepGoogleTranslator  # type: ignore
+                    self._clients[engine] = DeepGoogleTranslator(source='auto', target='en')
+                else:
+                    self._clients[engine] = None
+            return self._clients[engine]
+
+    def _call(self, engine: str, text: str) -> Optional[str]:
+        if engine == 'googletrans':
+            res = self._client(engine).translate(text, src='zh-cn', dest='en')
+            return getattr(res, 'text', '') or None
+        if engine == 'deep_translator':
+            res = self._client(engine).translate(text)
+            return res if isinstance(res, str) and res.strip() else None
+        if engine == 'http':
+            payload = json.dumps({'q': text, 'source': 'zh', 'target': 'en', 'format': 'text'}).encode('utf-8')
+            req = urllib.request.Request(self.endpoint, data=payload, headers={'Content-Type': 'application/json'})
+            with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+                data = json.loads(resp.read().decode('utf-8'))
+            return data.get('translatedText') or None
+        return None
+
+    def _translate_now(self, text: str) -> Optional[str]:
+        for engine in self.engines:
+            for attempt in range(self.retries + 1):
+                self._bucket.acquire()
+                try:
+                    res = self._call(engine, text)
+                    if res:
+                        return res
+                    break  # 空结果不重试，换下一个引擎
+                except Exception:
+                    if attempt < self.retries:
+                        time.sleep(self.backoff * (2 ** attempt) * (1 + random.random() * 0.1))
+        return None
+
+    def submit(self, text: str) -> Future:
+        """提交一个翻译任务；相同文本正在翻译时返回同一个 Future"""
+        with self._lock:
+            fut = self._inflight.get(text)
+            if fut is not None:
+                return fut
+            fut = self._executor.submit(self._translate_now, text)
+            self._inflight[text] = fut
+        fut.add_done_callback(lambda _f, key=text: self._forget(key))
+        return fut
+
+    def _forget(self, text: str) -> None:
+        with self._lock:
+            self._inflight.pop(text, None)
+
+    def translate(self, text: str) -> Optional[str]:
+        if not self.available or not text:
+            return None
+        return self.submit(text).result()
+
+    def translate_many(self, texts: Iterable[str]) -> Dict[str, Optional[str]]:
+        """并发翻译一组文本，返回 {原文: 译文或None}"""
+        if not self.available:
+            return {text: None for text in texts}
+        futures = {text: self.submit(text) for text in dict.fromkeys(texts) if text}
+        results: Dict[str, Optional[str]] = {}
+        for text, fut in futures.items():
+            try:
+                results[text] = fut.result()
+            except Exception:
+                results[text] = None
+        return results
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 页面内动态加载
+在页面中安装一个 MutationObserver，由页面脚本自己点击“加载更多”并滚动，
+条目数达到目标或在空闲窗口内不再增长时立即返回，避免 Python 侧固定 sleep 和反复查找按钮
+"""
+
+import logging
+
+logger = logging.getLogger(__name__)
+
+# 时间线子事件：标题链接与 _extract_event_from_item 保持一致，找不到时退回宽泛的条目选择器
+TIMELINE_ITEM_SELECTOR = 'a.content-link'
+TIMELINE_FALLBACK_SELECTOR = ('div.item, div[class*=item], div[class*=event], li[class*=item], '
+                              'li[class*=event], .timeline-item, .event-item')
+TIMELINE_MORE_PATTERN = r'^(加载更多|查看更多|展开更多|更多|点击加载|load more|more)'
+
+# 百家号评论：评论容器 xcp-item 与 _extract_comments 一致；同时展开“更多评论”和楼中楼“展开回复”
+COMMENT_ITEM_SELECTOR = 'div.xcp-item'
+COMMENT_MORE_PATTERN = r'^(查看更多评论|更多评论|加载更多|查看更多|展开更多|展开\s*\d*\s*条?回复|展开回复|查看全部\d*条回复)'
+
+# arguments: itemSelector, fallbackSelector, morePattern, target, idleMs, timeoutMs, maxRounds, clickAll, callback
+_OBSERVER_LOADER_JS = r"""
+const [itemSelector, fallbackSelector, morePattern, target, idleMs, timeoutMs, maxRounds, clickAll, done] = arguments;
+const moreRe = new RegExp(morePattern, 'i');
+const start = performance.now();
+const count = () => document.querySelectorAll(itemSelector).length
+    || (fallbackSelector ? document.querySelectorAll(fallbackSelector).length : 0);
+const visible = (el) => el.offsetParent !== null && el.getClientRects().length > 0;
+const findMore = () => {
+    const nodes = document.querySelectorAll(
+        'button, a, [role=button], div[class*=more], span[class*=more], div[class*=load], span[class*=load], '
+        + 'div[class*=expand], span[class*=expand], div[class*=reply], span[class*=reply]');
+    const found = [];
+    for (let i = nodes.length - 1; i >= 0; i--) {
+        const el = nodes[i];
+        // textContent 不触发布局，先用它排除评论正文等长文本容器
+        if (el.matches(itemSelector) || (el.textContent || '').length > 40) continue;
+        const text = (el.innerText || '').trim();
+        if (text && text.length <= 12 && moreRe.test(text) && visible(el)) {
+            found.push(el);
+            if (!clickAll) break;
+        }
+    }
+    return found;
+};
+let last = count(), rounds = 0, clicks = 0, finished = false;
+let idleTimer = null, settleTimer = null, hardTimer = null, observer = null;
+const finish = (reason) => {
+    if (finished) return;
+    finished = true;
+    if (observer) observer.disconnect();
+    clearTimeout(idleTimer); clearTimeout(settleTimer); clearTimeout(hardTimer);
+    done({count: count(), rounds: rounds, clicks: clicks, reason: reason,
+          ms: Math.round(performance.now() - start)});
+};
+const step = () => {
+    if (finished) return;
+    if (target && count() >= target) return finish('target');
+    if (maxRounds && rounds >= maxRounds) return finish('rounds');
+    rounds++;
+    const more = findMore();
+    // 嵌套的控件（外层 div 与内层 span 文本相同）只点最内层一次
+    more.filter((el) => !more.some((other) => other !== el && el.contains(other)))
+        .forEach((el) => { el.click(); clicks++; });
+    window.scrollTo(0, document.body.scrollHeight);
+    clearTimeout(idleTimer);
+    idleTimer = setTimeout(() => finish(more.length ? 'idle' : 'no_more'), idleMs);
+};
+observer = new MutationObserver(() => {
+    const n = count();
+    if (n > last) {
+        last = n;
+        clearTimeout(idleTimer);
+        clearTimeout(settleTimer);
+        // 一批节点通常分多次插入，稍等合并后再进行下一轮
+        settleTimer = setTimeout(step, 150);
+    }
+});
+observer.observe(document.body, {childList: true, subtree: true});
+hardTimer = setTimeout(() => finish('timeout'), timeoutMs);
+step();
+"""
+
+
+def run_observer_loader(driver, item_selector, fallback_selector, more_pattern, target=0, idle=1.5, timeout=90,
+                        max_rounds=0, click_all=False):
+    """
+    在页面内执行加载循环，返回 {count, rounds, clicks, reason, ms}
+    reason: target=达到目标数，idle=点击后空闲窗口内无新增，no_more=没有加载更多控件，
+            rounds=达到最大轮数，timeout=超时
+    click_all 时每轮点击所有匹配的控件（如多个“展开回复”），否则只点最靠下的一个
+    """
+    driver.set_script_timeout(timeout + 10)
+    return driver.execute_async_script(_OBSERVER_LOADER_JS, item_selector, fallback_selector, more_pattern,
+                                       int(target or 0), int(idle * 1000), int(timeout * 1000),
+                                       int(max_rounds or 0), bool(click_all))
+
+
+def load_timeline(driver, target=0, idle=1.5, timeout=90):
+    """加载时间线全部子事件；target 为页面声明的子事件数量（0 表示未知，只按空闲判断）"""
+    try:
+        result = run_observer_loader(driver, TIMELINE_ITEM_SELECTOR, TIMELINE_FALLBACK_SELECTOR,
+                                     TIMELINE_MORE_PATTERN, target, idle, timeout)
+    except Exception as e:
+        logger.warning(f"页面内加载脚本失败，使用当前已加载的内容: {e}")
+        return None
+    logger.info(f"时间线加载完成：{result['count']}/{target or '?'} 项，{result['rounds']} 轮，"
+                f"点击 {result['clicks']} 次，{result['ms'] / 1000:.1f}s（{result['reason']}）")
+    return result
+
+
+def load_comments(driver, max_comments=500, max_seconds=30, max_rounds=40, idle=2.0):
+    """
+    展开文章评论直到 xcp-item 数量不再增长，或达到单篇上限（条数/时间/轮数）
+    返回加载结果，reason 为 target/rounds/timeout 时说明该文章评论被截断
+    """
+    try:
+        result = run_observer_loader(driver, COMMENT_ITEM_SELECTOR, '', COMMENT_MORE_PATTERN, max_comments,
+                                     idle, max_seconds, max_rounds, click_all=True)
+    except Exception as e:
+        logger.warning(f"评论加载脚本失败，使用当前已加载的内容: {e}")
+        return None
+    result['truncated'] = result['reason'] in ('target', 'rounds', 'timeout')
+    return result
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 浏览器进程树
+看门狗和 DriverManager 共用的进程工具，不依赖 selenium：
+- driver_pid: chromedriver/msedgedriver 服务进程 pid（浏览器进程是它的子进程）
+- kill_process_tree: 结束进程及其全部后代；优先用 psutil，未安装时 POSIX 用 ps 列出后代、
+  Windows 用 taskkill /T，只有这些都不可用时才退回只结束驱动进程本身（并警告一次）
+"""
+
+import os
+import signal
+import subprocess
+import logging
+
+try:
+    import psutil
+except ImportError:  # psutil 列在 requirements.txt 中，缺失时用系统命令兜底
+    psutil = None
+
+logger = logging.getLogger(__name__)
+
+_warned_pid_only = False
+
+
+def driver_pid(driver):
+    """chromedriver/msedgedriver 服务进程 pid，浏览器进程是它的子进程；取不到时返回 None"""
+    try:
+        return driver.service.process.pid
+    except Exception:
+        return None
+
+
+def _descendant_pids(pid):
+    """通过 ps 列出 pid 的全部后代进程，ps 不可用时返回 None"""
+    try:
+        output = subprocess.run(['ps', '-A', '-o', 'pid=', '-o', 'ppid='], stdout=subprocess.PIPE,
+                                stderr=subprocess.DEVNULL, universal_newlines=True, timeout=5, check=True).stdout
+    except (OSError, subprocess.SubprocessError):
+        return None
+    children = {}
+    for line in output.splitlines():
+        parts = line.split()
+        if len(parts) == 2 and parts[0].isdigit() and parts[1].isdigit():
+            children.setdefault(int(parts[1]), []).append(int(parts[0]))
+    descendants = []
+    stack = [pid]
+    while stack:
+        for child in children.get(stack.pop(), []):
+            if child not in descendants:
+                descendants.append(child)
+                stack.append(child)
+    return descendants
+
+
+def _kill_without_psutil(pid):
+    global _warned_pid_only
+    if os.name == 'nt':
+        result = subprocess.run(['taskkill', '/F', '/T', '/PID', str(pid)],
+                                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        return 1 if result.returncode == 0 else 0
+    descendants = _descendant_pids(pid)
+    if descendants is None:
+        descendants = []
+        if not _warned_pid_only:
+            _warned_pid_only = True
+            logger.warning("未安装 psutil 且无法执行 ps：超时只能结束驱动进程，浏览器进程可能残留；请 pip install psutil")
+    killed = 0
+    # 先结束父进程，避免它在子进程被结束后重新拉起
+    for target in [pid] + descendants:
+        try:
+            os.kill(target, signal.SIGKILL)
+            killed += 1
+        except OSError:
+            pass
+    return killed
+
+
+def kill_process_tree(pid, timeout=5):
+    """结束 pid 及其全部子进程，返回结束的进程数"""
+    if psutil is None:
+        return _kill_without_psutil(pid)
+    try:
+        parent = psutil.Process(pid)
+        procs = parent.children(recursive=True) + [parent]
+    except psutil.Error:
+        return 0
+    for proc in procs:
+        try:
+            proc.kill()
+        except psutil.Error:
+            pass
+    gone, _alive = psutil.wait_procs(procs, timeout=timeout)
+    return len(gone)
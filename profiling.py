@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 批量行级性能剖析
+对每个处理的行采集 cProfile 记录，并在行开始/结束时做 tracemalloc 快照，
+报告写到该行的输出目录（data_BAI_DU/<seq>）下
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import time
+import tracemalloc
+import logging
+from contextlib import contextmanager
+
+logger = logging.getLogger(__name__)
+
+
+class RowProfiler:
+    """
+    enabled: 是否开启
+    max_rows: 只剖析前N行（None 表示全部）
+    top: 报告中列出的函数/内存分配条目数
+
+    每行生成：
+    - profile_row.prof  cProfile 原始数据，可用 snakeviz / pstats 打开
+    - profile_row.txt   按累计耗时排序的热点函数
+    - memory_row.txt    本行内存增长最多的分配位置，以及相对首个剖析行的累计增长
+    """
+
+    def __init__(self, enabled=False, max_rows=None, top=30):
+        self.enabled = enabled
+        self.max_rows = max_rows
+        self.top = top
+        self.rows_profiled = 0
+        self._baseline = None
+        self._started_tracemalloc = False
+
+    def _active(self):
+        return self.enabled and (self.max_rows is None or self.rows_profiled < self.max_rows)
+
+    @contextmanager
+    def profile_row(self, seq, out_dir):
+        if not self._active():
+            yield
+            return
+
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(25)
+            self._started_tracemalloc = True
+        before = tracemalloc.take_snapshot()
+        if self._baseline is None:
+            self._baseline = before
+
+        profiler = cProfile.Profile()
+        t0 = time.perf_counter()
+        profiler.enable()
+        try:
+            yield
+        finally:
+            profiler.disable()
+            elapsed = time.perf_counter() - t0
+            after = tracemalloc.take_snapshot()
+            self.rows_profiled += 1
+            try:
+                self._write_reports(seq, out_dir, profiler, before, after, elapsed)
+            except Exception as e:
+                logger.warning(f"写入剖析报告失败 (序号 {seq}): {e}")
+            if not self._active():
+                self.stop()
+
+    def _write_reports(self, seq, out_dir, profiler, before, after, elapsed):
+        os.makedirs(out_dir, exist_ok=True)
+        profiler.dump_stats(os.path.join(out_dir, 'profile_row.prof'))
+
+        buf = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buf)
+        stats.sort_stats('cumulative').print_stats(self.top)
+        with open(os.path.join(out_dir, 'profile_row.txt'), 'w', encoding='utf-8') as f:
+            f.write(f"序号 {seq}，耗时 {elapsed:.1f}s\n\n")
+            f.write(buf.getvalue())
+
+        current, peak = tracemalloc.get_traced_memory()
+        filters = [tracemalloc.Filter(False, tracemalloc.__file__)]
+        row_diff = after.filter_traces(filters).compare_to(before.filter_traces(filters), 'lineno')
+        total_diff = after.filter_traces(filters).compare_to(self._baseline.filter_traces(filters), 'lineno')
+        with open(os.path.join(out_dir, 'memory_row.txt'), 'w', encoding='utf-8') as f:
+            f.write(f"序号 {seq}，当前追踪内存 {current / 1024 / 1024:.1f} MB，峰值 {peak / 1024 / 1024:.1f} MB\n")
+            f.write(f"\n== 本行内存增长 Top {self.top} ==\n")
+            for item in row_diff[:self.top]:
+                f.write(f"{item}\n")
+            f.write(f"\n== 相对首个剖析行的累计增长 Top {self.top} ==\n")
+            for item in total_diff[:self.top]:
+                f.write(f"{item}\n")
+        logger.info(f"剖析报告已写入 {out_dir}（profile_row.txt / memory_row.txt）")
+
+    def stop(self):
+        if self._started_tracemalloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._started_tracemalloc = False
+        self._baseline = None
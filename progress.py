@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 批量进度与吞吐
+显示已完成/剩余行数、行/小时、评论/秒、当前阶段、失败率和预计剩余时间，
+并把状态写到 status_<worker>.json，供其他工具轮询（多个 worker 可汇总）
+"""
+
+import glob
+import json
+import os
+import time
+import logging
+from collections import Counter
+
+from data_manager import DataManager
+from metrics import default_worker_id
+
+logger = logging.getLogger(__name__)
+
+
+def _format_duration(seconds):
+    if seconds is None:
+        return '未知'
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, secs = divmod(rest, 60)
+    return f"{hours}h{minutes:02d}m" if hours else f"{minutes}m{secs:02d}s"
+
+
+class BatchProgress:
+    def __init__(self, total_rows, status_dir='data_BAI_DU/_status', worker_id=None, write_interval=1.0):
+        self.total_rows = total_rows
+        self.worker_id = worker_id or default_worker_id()
+        self.status_dir = status_dir
+        self.status_file = os.path.join(status_dir, f'status_{self.worker_id}.json')
+        self.write_interval = write_interval
+        self.started_at = time.time()
+        self.rows_done = 0
+        self.rows_failed = 0
+        self.comments_total = 0
+        self.errors = Counter()
+        self.current_row = None
+        self._stages = []
+        self._stage_since = None
+        self._last_write = 0.0
+        self._dm = DataManager(status_dir)
+
+    # ---- 由 metrics 的阶段回调驱动当前阶段 ----
+    def on_stage(self, event, name, labels):
+        if event == 'start':
+            self._stages.append(name)
+        elif self._stages and self._stages[-1] == name:
+            self._stages.pop()
+        self._stage_since = time.time()
+        self.write_status()
+
+    @property
+    def current_stage(self):
+        return self._stages[-1] if self._stages else 'idle'
+
+    def start_row(self, idx, seq, url):
+        self.current_row = {'idx': idx, 'seq': seq, 'url': url, 'started_at': time.time()}
+        self.write_status(force=True)
+
+    def finish_row(self, comments=0, error=None):
+        self.rows_done += 1
+        self.comments_total += comments or 0
+        if error is not None:
+            self.rows_failed += 1
+            self.errors[error] += 1
+        self.current_row = None
+        self.write_status(force=True)
+        self.render()
+
+    def snapshot(self):
+        elapsed = max(time.time() - self.started_at, 1e-6)
+        remaining = max(self.total_rows - self.rows_done, 0)
+        rows_per_hour = self.rows_done / elapsed * 3600
+        eta = remaining / rows_per_hour * 3600 if rows_per_hour > 0 else None
+        return {
+            'worker': self.worker_id,
+            'pid': os.getpid(),
+            'updated_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'started_at': time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at)),
+            'elapsed_seconds': round(elapsed, 1),
+            'total_rows': self.total_rows,
+            'rows_done': self.rows_done,
+            'rows_remaining': remaining,
+            'rows_failed': self.rows_failed,
+            'error_rate': round(self.rows_failed / self.rows_done, 4) if self.rows_done else 0.0,
+            'errors': dict(self.errors),
+            'rows_per_hour': round(rows_per_hour, 2),
+            'comments_total': self.comments_total,
+            'comments_per_second': round(self.comments_total / elapsed, 3),
+            'eta_seconds': round(eta, 1) if eta is not None else None,
+            'current_row': self.current_row,
+            'current_stage': self.current_stage,
+            'stage_seconds': round(time.time() - self._stage_since, 1) if self._stage_since else 0.0,
+        }
+
+    def write_status(self, force=False):
+        """原子写出状态文件；非强制写入时按 write_interval 节流"""
+        now = time.time()
+        if not force and now - self._last_write < self.write_interval:
+            return
+        self._last_write = now
+        try:
+            tmp_path = self.status_file + '.tmp'
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self.snapshot(), f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.status_file)
+        except Exception as e:
+            logger.warning(f"写入进度状态失败: {e}")
+
+    def render(self):
+        s = self.snapshot()
+        message = (f"{s['rows_per_hour']:.1f} 行/小时，{s['comments_per_second']:.2f} 评论/秒，"
+                   f"失败 {s['rows_failed']}，剩余 {_format_duration(s['eta_seconds'])}")
+        self._dm.print_progress(self.rows_done, self.total_rows, message)
+        if self.rows_done < self.total_rows:
+            print()  # print_progress 只在完成时换行，这里保持每行一条，避免被日志打断
+
+
+def read_status(status_dir='data_BAI_DU/_status'):
+    """读取所有 worker 的状态文件并汇总"""
+    workers = []
+    for path in sorted(glob.glob(os.path.join(status_dir, 'status_*.json'))):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                workers.append(json.load(f))
+        except Exception:
+            continue
+    summary = {
+        'workers': len(workers),
+        'rows_done': sum(w.get('rows_done', 0) for w in workers),
+        'rows_remaining': sum(w.get('rows_remaining', 0) for w in workers),
+        'rows_failed': sum(w.get('rows_failed', 0) for w in workers),
+        'rows_per_hour': round(sum(w.get('rows_per_hour', 0) for w in workers), 2),
+        'comments_per_second': round(sum(w.get('comments_per_second', 0) for w in workers), 3),
+    }
+    eta = [w['eta_seconds'] for w in workers if w.get('eta_seconds') is not None]
+    summary['eta_seconds'] = max(eta) if eta else None
+    return summary, workers
+
+
+def print_status(status_dir='data_BAI_DU/_status'):
+    summary, workers = read_status(status_dir)
+    print(f"📊 worker {summary['workers']} 个，已完成 {summary['rows_done']} 行，剩余 {summary['rows_remaining']} 行，"
+          f"失败 {summary['rows_failed']}，{summary['rows_per_hour']} 行/小时，"
+          f"{summary['comments_per_second']} 评论/秒，预计剩余 {_format_duration(summary['eta_seconds'])}")
+    for w in workers:
+        row = w.get('current_row') or {}
+        print(f"  🔧 {w['worker']}: {w['rows_done']}/{w['total_rows']}，当前 序号 {row.get('seq', '-')} "
+              f"阶段 {w.get('current_stage')}（{w.get('stage_seconds', 0)}s），更新于 {w.get('updated_at')}")
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 紧凑数据记录
+子事件和评论在内存中用 __slots__ 记录保存：重复出现的字符串（地区、时间、占位内容、用户名）做驻留，
+评论只引用所属子事件的 EventMeta，不再每条复制标题/链接/时间；只在输出 JSON/CSV 时转换回原来的 dict 结构
+"""
+
+import sys
+import time
+
+# 扁平输出中代替评论的占位行内容；规范化输出中改为子事件的抓取状态
+NO_COMMENTS_PLACEHOLDER = '无评论'
+NON_BAIJIAHAO_PLACEHOLDER = '非百家号页面，跳过评论爬取'
+PLACEHOLDER_CONTENTS = (NO_COMMENTS_PLACEHOLDER, NON_BAIJIAHAO_PLACEHOLDER)
+
+# 子事件抓取状态
+STATUS_PENDING = 'pending'
+STATUS_OK = 'ok'                  # 抓到评论
+STATUS_NO_COMMENTS = 'no_comments'  # 百家号页面但没有评论
+STATUS_ERROR = 'error'            # 百家号页面加载/解析失败（重试用尽，失败类别见 failure）
+STATUS_SKIPPED = 'skipped'        # 非百家号页面
+STATUS_NO_LINK = 'no_link'        # 没有链接
+
+# 扁平视图中每种状态对应的占位内容（no_link 不写占位行；error 也不写，避免失败被当成“无评论”）
+_STATUS_PLACEHOLDERS = {
+    STATUS_NO_COMMENTS: NO_COMMENTS_PLACEHOLDER,
+    STATUS_SKIPPED: NON_BAIJIAHAO_PLACEHOLDER,
+}
+
+NORMALIZED_SCHEMA = 'normalized-v1'
+
+
+def _intern(value):
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+class _Record:
+    """兼容原 dict 用法：record['title']、record.get('time', '')"""
+    __slots__ = ()
+    FIELDS = ()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key)
+
+    def get(self, key, default=None):
+        return getattr(self, key, default)
+
+    def __contains__(self, key):
+        return key in self.FIELDS
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.FIELDS}
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class SubEvent(_Record):
+    """一级页面的子事件"""
+    __slots__ = ('id', 'title', 'link', 'time', 'summary', 'author')
+    FIELDS = __slots__
+
+    def __init__(self, id, title='', link='', time='', summary='', author=''):
+        self.id = _intern(id)
+        self.title = title
+        self.link = link
+        self.time = _intern(time)
+        self.summary = summary
+        self.author = _intern(author)
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**{name: data.get(name, '') for name in cls.FIELDS})
+
+
+class EventMeta(_Record):
+    """评论所属子事件的元数据（含抓取状态、评论数和失败类别），同一子事件的所有评论共享一个实例"""
+    __slots__ = ('event_id', 'title', 'url', 'time', 'status', 'comment_count', 'failure')
+    FIELDS = __slots__
+
+    def __init__(self, event_id, title='', url='', time='', status=STATUS_PENDING, comment_count=0, failure=''):
+        self.event_id = _intern(event_id)
+        self.title = title
+        self.url = url
+        self.time = _intern(time)
+        self.status = status
+        self.comment_count = comment_count
+        self.failure = failure
+
+
+class Comment(_Record):
+    """
+    单条评论；event_title / event_url / event_time 通过 event 引用得到，scrape_time 以时间戳保存，
+    to_dict() 输出与原来完全相同的字段
+    """
+    __slots__ = ('event', 'comment_index', 'user_id', 'comment_time', 'comment_content',
+                 'user_location', 'like_count', 'scrape_ts')
+    FIELDS = ('event_title', 'event_id', 'event_url', 'comment_index', 'user_id', 'comment_time',
+              'comment_content', 'user_location', 'like_count', 'scrape_time', 'event_time')
+
+    def __init__(self, event, comment_index=0, user_id='', comment_time='', comment_content='',
+                 user_location='', like_count=0, scrape_ts=None):
+        self.event = event
+        self.comment_index = comment_index
+        self.user_id = _intern(user_id)
+        self.comment_time = _intern(comment_time)
+        self.comment_content = comment_content
+        self.user_location = _intern(user_location)
+        self.like_count = like_count
+        self.scrape_ts = int(scrape_ts if scrape_ts is not None else time.time())
+
+    # 子事件字段：从共享的 EventMeta 读取
+    @property
+    def event_id(self):
+        return self.event.event_id
+
+    @property
+    def event_title(self):
+        return self.event.title
+
+    @property
+    def event_url(self):
+        return self.event.url
+
+    @property
+    def event_time(self):
+        return self.event.time
+
+    @property
+    def scrape_time(self):
+        return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.scrape_ts))
+
+
+class CommentStore:
+    """
+    评论集合：按 event_id 登记子事件元数据，评论以 Comment 记录追加
+    迭代得到 Comment 记录；iter_dicts()/to_dicts() 在输出时转换为原来的 dict 结构
+    """
+
+    def __init__(self):
+        self.events = {}
+        self._comments = []
+
+    def register_event(self, event_id, title='', url='', time=''):
+        """登记（或更新）子事件元数据，返回共享的 EventMeta"""
+        meta = self.events.get(event_id)
+        if meta is None:
+            meta = self.events[event_id] = EventMeta(event_id, title, url, time)
+        else:
+            meta.title = title or meta.title
+            meta.url = url or meta.url
+            meta.time = _intern(time) or meta.time
+        return meta
+
+    def add(self, comment):
+        """追加一条评论，comment 可以是 _extract_single_comment 生成的 dict 或 Comment"""
+        if not isinstance(comment, Comment):
+            meta = self.events.get(comment.get('event_id'))
+            if meta is None or comment.get('event_time'):
+                meta = self.register_event(comment.get('event_id', ''), comment.get('event_title', ''),
+                                           comment.get('event_url', ''), comment.get('event_time', ''))
+            # 短内容（“无评论”等占位、表情、“赞”）重复率高，同样驻留
+            content = comment.get('comment_content', '')
+            comment = Comment(meta, comment.get('comment_index', 0), comment.get('user_id', ''),
+                              comment.get('comment_time', ''), _intern(content) if len(content) <= 16 else content,
+                              comment.get('user_location', ''), comment.get('like_count', 0))
+        self._comments.append(comment)
+        return comment
+
+    def __len__(self):
+        return len(self._comments)
+
+    def __iter__(self):
+        return iter(self._comments)
+
+    def __getitem__(self, index):
+        return self._comments[index]
+
+    def iter_dicts(self):
+        for comment in self._comments:
+            yield comment.to_dict()
+
+    def to_dicts(self):
+        return list(self.iter_dicts())
+
+    def set_status(self, event_id, status, comment_count=0, failure=''):
+        meta = self.events.get(event_id)
+        if meta is not None:
+            meta.status = status
+            meta.comment_count = comment_count
+            meta.failure = failure
+
+    def to_normalized(self, core_event_name=''):
+        """
+        规范化输出：events 表（每个子事件一行，含 status / comment_count），
+        comments 表只含真实评论并以 event_id 关联，不再写占位行，也不重复子事件字段
+        """
+        comments = []
+        for comment in self._comments:
+            if comment.comment_index == 0 and comment.comment_content in PLACEHOLDER_CONTENTS:
+                continue
+            comments.append({
+                'event_id': comment.event_id,
+                'comment_index': comment.comment_index,
+                'user_id': comment.user_id,
+                'comment_time': comment.comment_time,
+                'comment_content': comment.comment_content,
+                'user_location': comment.user_location,
+                'like_count': comment.like_count,
+                'scrape_time': comment.scrape_time,
+            })
+        return {
+            'schema': NORMALIZED_SCHEMA,
+            'core_event_name': core_event_name,
+            'events': [meta.to_dict() for meta in self.events.values()],
+            'comments': comments,
+            'total_events': len(self.events),
+            'total_comments': len(comments),
+            'scrape_time': time.strftime('%Y-%m-%d %H:%M:%S'),
+        }
+
+
+def flatten_normalized(data):
+    """由规范化输出还原原来的扁平评论列表（按子事件顺序，并补回占位行）"""
+    by_event = {}
+    for comment in data.get('comments', []):
+        by_event.setdefault(comment['event_id'], []).append(comment)
+    scrape_time = data.get('scrape_time', '')
+    flat = []
+    for event in data.get('events', []):
+        base = {'event_title': event['title'], 'event_id': event['event_id'], 'event_url': event['url']}
+        comments = by_event.get(event['event_id'], [])
+        for comment in comments:
+            row = dict(base)
+            row.update(comment)
+            row['event_time'] = event['time']
+            flat.append(row)
+        placeholder = _STATUS_PLACEHOLDERS.get(event.get('status'))
+        if not comments and placeholder:
+            row = dict(base)
+            row.update({'comment_index': 0, 'user_id': '', 'comment_time': '', 'comment_content': placeholder,
+                        'user_location': '', 'like_count': 0, 'scrape_time': scrape_time,
+                        'event_time': event['time']})
+            flat.append(row)
+    return flat
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 行级看门狗
+批量爬取时每行在墙钟截止时间内运行，每次页面导航另有单页截止时间
+（arm_page() 在 driver.get 前开始计时，导航和展开结束后 disarm_page() 停止计时，之后的解析、静态抓取、等待不计入）：
+- 后台线程发现超时后结束本行用到的浏览器进程树，卡在 driver.get / execute_async_script 中的调用随即抛错返回
+- 之后爬虫在下一次导航或下一个子事件前调用 check()，抛出 RowTimeout 取消本行剩余工作
+RowTimeout 继承 BaseException，不会被爬虫内部大量的 `except Exception` 吞掉（与 asyncio.CancelledError 同理）
+"""
+
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+from process_tree import driver_pid, kill_process_tree
+
+logger = logging.getLogger(__name__)
+
+ROW_TIMEOUT = 'row_timeout'
+PAGE_TIMEOUT = 'page_timeout'
+
+
+class RowTimeout(BaseException):
+    """本行超过截止时间被取消；reason 为 row_timeout 或 page_timeout"""
+
+    def __init__(self, reason, detail=''):
+        super().__init__(f"{reason}: {detail}" if detail else reason)
+        self.reason = reason
+        self.detail = detail
+
+
+class Watchdog:
+    def __init__(self, row_timeout=0, page_timeout=0, poll_interval=0.5):
+        self.row_timeout = row_timeout
+        self.page_timeout = page_timeout
+        self.poll_interval = poll_interval
+        self.expired = None
+        self.timeouts = 0
+        self._row_deadline = None
+        self._page_deadline = None
+        self._page_label = ''
+        self._row_label = ''
+        self._pids = set()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def configure(self, row_timeout=None, page_timeout=None):
+        """row_timeout / page_timeout 为秒数，0 表示不限"""
+        if row_timeout is not None:
+            self.row_timeout = row_timeout
+        if page_timeout is not None:
+            self.page_timeout = page_timeout
+
+    @property
+    def enabled(self):
+        return bool(self.row_timeout or self.page_timeout)
+
+    def _ensure_thread(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._monitor, name='row-watchdog', daemon=True)
+            self._thread.start()
+
+    @contextmanager
+    def row(self, label=''):
+        """
+        在截止时间内运行一行；超时后本行以 RowTimeout 结束
+        （即使爬虫内部吞掉了浏览器被结束引起的异常并正常返回）
+        """
+        with self._lock:
+            self.expired = None
+            self._pids.clear()
+            self._row_label = str(label)
+            self._row_deadline = time.time() + self.row_timeout if self.row_timeout else None
+            self._page_deadline = None
+        if self.enabled:
+            self._ensure_thread()
+        try:
+            yield self
+        except RowTimeout:
+            raise
+        except Exception as e:
+            if self.expired:
+                raise RowTimeout(self.expired, self._row_label) from e
+            raise
+        finally:
+            with self._lock:
+                self._row_deadline = None
+                self._page_deadline = None
+                self._pids.clear()
+        self.check()
+
+    def arm_page(self, driver, label=''):
+        """开始一次页面导航：登记浏览器进程并重置单页截止时间；本行已超时则直接取消"""
+        self.check()
+        pid = driver_pid(driver)
+        with self._lock:
+            if pid is not None:
+                self._pids.add(pid)
+            self._page_label = label
+            self._page_deadline = time.time() + self.page_timeout if self.page_timeout else None
+
+    def disarm_page(self):
+        """页面导航和展开结束：停止单页计时（行截止时间不变）"""
+        with self._lock:
+            self._page_deadline = None
+            self._page_label = ''
+
+    def check(self):
+        """本行已超时时抛出 RowTimeout，供爬虫在导航/子事件之间取消剩余工作"""
+        if self.expired:
+            raise RowTimeout(self.expired, self._row_label)
+
+    def _monitor(self):
+        while True:
+            time.sleep(self.poll_interval)
+            now = time.time()
+            with self._lock:
+                if self.expired:
+                    continue
+                if self._row_deadline is not None and now >= self._row_deadline:
+                    reason = ROW_TIMEOUT
+                elif self._page_deadline is not None and now >= self._page_deadline:
+                    reason = PAGE_TIMEOUT
+                else:
+                    continue
+                self.expired = reason
+                self.timeouts += 1
+                pids = list(self._pids)
+                page_label = self._page_label
+            logger.warning(f"行 {self._row_label} 超时（{reason}，页面 {page_label or '-'}），结束浏览器进程树 {pids}")
+            for pid in pids:
+                kill_process_tree(pid)
+
+
+# 全局看门狗：批量入口配置截止时间，爬虫在导航前调用 arm_page()，页面加载/展开结束后调用 disarm_page()
+watchdog = Watchdog()
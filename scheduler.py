@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 批量任务调度
+按更新时间的新鲜度、预计百家号子事件数量和历史评论产出，对CSV中的行排序，
+让有限的爬取预算优先分配给新鲜评论最多的行
+"""
+
+import csv
+import os
+import logging
+from datetime import date, datetime
+
+from records import PLACEHOLDER_CONTENTS  # 二级爬虫写入的占位行，不计入评论产出
+import storage
+
+logger = logging.getLogger(__name__)
+
+
+def is_baijiahao_url(url):
+    """判断是否为百度百家号页面（支持http和https）"""
+    return url.startswith('https://baijiahao.baidu.com/') or url.startswith('http://baijiahao.baidu.com/')
+
+
+def parse_update_date(text):
+    """解析 update_date 列（形如 2025-09-10），失败返回 None"""
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text.strip()[:10], '%Y-%m-%d').date()
+    except ValueError:
+        return None
+
+
+class RowScheduler:
+    """
+    行调度器
+
+    每行的得分 = 新鲜度^recency_weight × 预计百家号子事件数^baijiahao_weight × 单事件评论产出^yield_weight
+    - 新鲜度：按 update_date 以 half_life_days 为半衰期指数衰减
+    - 预计百家号子事件数：已爬过的行取 level1_data.json 中的实际值，否则取语料平均值
+    - 单事件评论产出：已爬过的行取 level2_data.json 中的真实评论数/百家号事件数，否则取语料平均值
+    """
+
+    def __init__(self, data_root='data_BAI_DU', half_life_days=30.0, recency_weight=1.0,
+                 baijiahao_weight=1.0, yield_weight=1.0, today=None):
+        self.data_root = data_root
+        self.half_life_days = half_life_days
+        self.recency_weight = recency_weight
+        self.baijiahao_weight = baijiahao_weight
+        self.yield_weight = yield_weight
+        self.today = today or date.today()
+        self._history_cache = {}
+
+    def load_rows(self, csv_path, start_row=2, end_row=None):
+        """读取CSV中 [start_row, end_row] 范围内带 url 的行，行号与文件行号对齐（表头为第1行）"""
+        tasks = []
+        with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.DictReader(f)
+            for idx, row in enumerate(reader, start=2):
+                if idx < start_row:
+                    continue
+                if end_row is not None and idx > end_row:
+                    break
+                url = (row.get('url') or '').strip()
+                if not url:
+                    logger.info(f'⏭️ 第 {idx} 行缺少 url，已跳过')
+                    continue
+                tasks.append({
+                    'idx': idx,
+                    'seq': idx - 1,  # 序号 = 行号 - 1（第2行对应序号1）
+                    'url': url,
+                    'update_date': parse_update_date(row.get('update_date', '')),
+                })
+        return tasks
+
+    def _load_history(self, seq):
+        """读取某行已有的爬取结果：(百家号子事件数, 真实评论数)，没有历史返回 None"""
+        if seq in self._history_cache:
+            return self._history_cache[seq]
+
+        history = None
+        row_dir = os.path.join(self.data_root, str(seq))
+        level1_file = os.path.join(row_dir, 'level1_data.json')
+        level2_file = os.path.join(row_dir, 'level2_data.json')
+        normalized_file = os.path.join(row_dir, 'level2_normalized.json')
+        try:
+            level1_data = storage.load_json(level1_file)
+            if level1_data is not None:
+                baijiahao_count = sum(
+                    1 for event in level1_data.get('sub_events', [])
+                    if is_baijiahao_url(event.get('link', ''))
+                )
+                comment_count = 0
+                level2_data = storage.load_json(level2_file)
+                if level2_data is not None:
+                    comment_count = sum(
+                        1 for comment in level2_data.get('comments', [])
+                        if comment.get('comment_content') not in PLACEHOLDER_CONTENTS
+                    )
+                else:
+                    # 规范化输出的评论表不含占位行
+                    normalized = storage.load_json(normalized_file)
+                    if normalized is not None:
+                        comment_count = normalized.get('total_comments', 0)
+                history = (baijiahao_count, comment_count)
+        except Exception as e:
+            logger.warning(f"读取历史数据失败 {row_dir}: {e}")
+
+        self._history_cache[seq] = history
+        return history
+
+    def _corpus_priors(self, tasks):
+        """根据已爬取的行估计语料平均值：(平均百家号子事件数, 每个百家号事件的平均评论数)"""
+        total_baijiahao = 0
+        total_comments = 0
+        rows_with_history = 0
+        for task in tasks:
+            history = self._load_history(task['seq'])
+            if history is None:
+                continue
+            rows_with_history += 1
+            total_baijiahao += history[0]
+            total_comments += history[1]
+
+        if rows_with_history == 0:
+            return 1.0, 1.0
+        mean_baijiahao = total_baijiahao / rows_with_history
+        mean_yield = total_comments / total_baijiahao if total_baijiahao else 0.0
+        return max(mean_baijiahao, 0.1), max(mean_yield, 0.1)
+
+    def _recency(self, update_date):
+        """新鲜度因子，0~1；缺少日期时按一个半衰期处理"""
+        if update_date is None:
+            return 0.5
+        age_days = max((self.today - update_date).days, 0)
+        return 0.5 ** (age_days / self.half_life_days) if self.half_life_days > 0 else 1.0
+
+    def score(self, task, priors):
+        """计算单行得分，并把各分项写回 task 方便日志与排查"""
+        mean_baijiahao, mean_yield = priors
+        history = self._load_history(task['seq'])
+        if history is not None:
+            expected_baijiahao = float(history[0])
+            per_event_yield = history[1] / history[0] if history[0] else 0.0
+        else:
+            expected_baijiahao = mean_baijiahao
+            per_event_yield = mean_yield
+
+        recency = self._recency(task['update_date'])
+        task['recency'] = recency
+        task['expected_baijiahao'] = expected_baijiahao
+        task['per_event_yield'] = per_event_yield
+        task['expected_comments'] = expected_baijiahao * per_event_yield
+        task['score'] = (
+            recency ** self.recency_weight
+            * expected_baijiahao ** self.baijiahao_weight
+            * per_event_yield ** self.yield_weight
+        )
+        return task['score']
+
+    def order(self, tasks, budget=None):
+        """按得分从高到低排序；budget 为最多处理的行数（None 表示不限）"""
+        priors = self._corpus_priors(tasks)
+        logger.info(f"语料先验: 平均百家号子事件 {priors[0]:.1f}，单事件平均评论 {priors[1]:.1f}")
+        for task in tasks:
+            self.score(task, priors)
+        # 得分相同则保持文件顺序
+        ordered = sorted(tasks, key=lambda t: (-t['score'], t['idx']))
+        if budget is not None and budget >= 0:
+            ordered = ordered[:budget]
+        return ordered
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - JSON 存储
+所有输出都先写同目录临时文件、fsync 后再 os.replace，进程中途被杀也不会留下写了一半的文件；
+BatchedWriter 把频繁的整文件重写合并成每 N 次更新（或每隔若干秒）落盘一次
+按 STORAGE_MODE 写出 level1/level2 等 JSON 文件：
+- json: 原来的缩进 JSON（默认）
+- gzip: 紧凑 JSON + gzip，文件名加 .gz
+- zstd: 紧凑 JSON + zstd，文件名加 .zst（需要 zstandard，未安装时退回 gzip）
+读取时按逻辑文件名（如 level2_data.json）自动找到实际存在的变体并透明解压
+
+    python storage.py compress data_BAI_DU --mode zstd   # 把已有目录转换为压缩存储 + 清单
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import sys
+import time
+import logging
+from contextlib import contextmanager
+
+try:
+    import zstandard
+except ImportError:  # zstandard 为可选依赖
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+STORAGE_MODE = os.environ.get('STORAGE_MODE', 'json')
+MODES = ('json', 'gzip', 'zstd')
+_SUFFIXES = {'json': '', 'gzip': '.gz', 'zstd': '.zst'}
+_warned_zstd = False
+
+
+def _resolve_mode(mode=None):
+    global _warned_zstd
+    mode = mode or STORAGE_MODE
+    if mode not in MODES:
+        raise ValueError(f"未知的存储模式: {mode}（可选 {', '.join(MODES)}）")
+    if mode == 'zstd' and zstandard is None:
+        if not _warned_zstd:
+            logger.warning("未安装 zstandard，压缩存储改用 gzip")
+            _warned_zstd = True
+        return 'gzip'
+    return mode
+
+
+def _fsync_dir(path):
+    """rename 之后同步目录项（Windows 不支持对目录 fsync，忽略）"""
+    if os.name == 'nt':
+        return
+    try:
+        fd = os.open(path or '.', os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def _temp_path(path):
+    """同目录、保留扩展名的临时文件名（pandas 按扩展名选择写出引擎）"""
+    base, ext = os.path.splitext(path)
+    return f"{base}.tmp-{os.getpid()}{ext}"
+
+
+@contextmanager
+def atomic_path(path, fsync=True):
+    """
+    原子写出：yield 一个临时路径，调用方写完后 fsync 并替换到 path；出错时删除临时文件、保留原文件
+        with atomic_path(xlsx) as tmp:
+            df.to_excel(tmp, index=False)
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp = _temp_path(path)
+    try:
+        yield tmp
+        if fsync:
+            with open(tmp, 'rb+') as f:
+                os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    if fsync:
+        _fsync_dir(os.path.dirname(path))
+
+
+@contextmanager
+def atomic_open(path, mode='w', encoding='utf-8', newline=None, append=False, fsync=True):
+    """
+    原子方式打开文件写入；append=True 时先复制原文件再在副本末尾追加，
+    替换前原文件保持完整（用于 CSV 追加等场景）
+    """
+    with atomic_path(path, fsync=fsync) as tmp:
+        if append and os.path.exists(path):
+            shutil.copyfile(path, tmp)
+        file_mode = ('a' if append else 'w') + ('b' if 'b' in mode else '')
+        kwargs = {} if 'b' in mode else {'encoding': encoding, 'newline': newline}
+        with open(tmp, file_mode, **kwargs) as f:
+            yield f
+
+
+def atomic_write_bytes(path, raw, fsync=True):
+    with atomic_open(path, 'wb', fsync=fsync) as f:
+        f.write(raw)
+
+
+class BatchedWriter:
+    """
+    合并整文件重写：register() 登记写出函数（写出时才生成内容），touch() 记录一次数据变更，
+    累计 flush_every 次变更或距上次落盘超过 flush_interval 秒时调用全部写出函数；
+    写出函数自己负责原子写入，因此 fsync 只在批次落盘时发生
+    """
+
+    def __init__(self, flush_every=50, flush_interval=10.0):
+        self.flush_every = max(1, flush_every)
+        self.flush_interval = flush_interval
+        self._producers = {}
+        self._updates = 0
+        self._last_flush = time.time()
+
+    def register(self, name, producer):
+        self._producers[name] = producer
+
+    def touch(self, count=1):
+        self._updates += count
+        if self._updates >= self.flush_every or time.time() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        if not self._updates:
+            return
+        for name, producer in self._producers.items():
+            try:
+                producer()
+            except Exception as e:
+                logger.error(f"批量写出 {name} 失败: {e}")
+        self._updates = 0
+        self._last_flush = time.time()
+
+
+def storage_path(path, mode=None):
+    """逻辑文件名在指定模式下的实际路径"""
+    return path + _SUFFIXES[_resolve_mode(mode)]
+
+
+def find(path):
+    """返回逻辑文件名实际存在的变体路径（多个变体并存时取最新的），不存在返回 None"""
+    existing = [p for p in (path, path + '.zst', path + '.gz') if os.path.exists(p)]
+    if not existing:
+        return None
+    return max(existing, key=os.path.getmtime)
+
+
+def encode_json(data, mode=None):
+    mode = _resolve_mode(mode)
+    if mode == 'json':
+        return json.dumps(data, ensure_ascii=False, indent=2).encode('utf-8')
+    payload = json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    if mode == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(payload)
+    return gzip.compress(payload, compresslevel=6)
+
+
+def decode_json(raw, path):
+    if path.endswith('.zst'):
+        if zstandard is None:
+            raise RuntimeError(f"读取 {path} 需要安装 zstandard")
+        raw = zstandard.ZstdDecompressor().decompress(raw)
+    elif path.endswith('.gz'):
+        raw = gzip.decompress(raw)
+    return json.loads(raw.decode('utf-8'))
+
+
+def dump_json(path, data, mode=None):
+    """按存储模式写出 JSON，并删除其他模式留下的旧变体，返回实际写入的路径"""
+    target = storage_path(path, mode)
+    atomic_write_bytes(target, encode_json(data, mode))
+    for stale in (path, path + '.zst', path + '.gz'):
+        if stale != target and os.path.exists(stale):
+            os.remove(stale)
+    return target
+
+
+def load_json(path):
+    """按逻辑文件名读取 JSON（自动解压），不存在返回 None"""
+    actual = find(path)
+    if actual is None:
+        return None
+    with open(actual, 'rb') as f:
+        return decode_json(f.read(), actual)
+
+
+def _dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path)
+               if os.path.isfile(os.path.join(path, name)))
+
+
+def compress_tree(root, mode):
+    """把 root 下每个数据目录的 JSON 转为指定存储模式，combined_data.json 改写为清单"""
+    from data_manager import DataManager
+
+    before = after = dirs = 0
+    for name in sorted(os.listdir(root)):
+        data_dir = os.path.join(root, name)
+        if name.startswith('_') or not os.path.isdir(data_dir):
+            continue
+        before += _dir_size(data_dir)
+        for filename in ('level1_data.json', 'level2_data.json', 'level2_normalized.json'):
+            path = os.path.join(data_dir, filename)
+            data = load_json(path)
+            if data is not None:
+                dump_json(path, data, mode)
+        dm = DataManager(data_dir, storage_mode=mode)
+        if dm.load_level1_data() and dm.load_level2_data():
+            dm.combine_data()
+        after += _dir_size(data_dir)
+        dirs += 1
+    print(f"✅ 已转换 {dirs} 个目录：{before / 1024 / 1024:.1f} MB -> {after / 1024 / 1024:.1f} MB")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='JSON 存储工具')
+    sub = parser.add_subparsers(dest='command', required=True)
+    p = sub.add_parser('compress', help='把已有数据目录转换为压缩存储 + 清单')
+    p.add_argument('root', nargs='?', default='data_BAI_DU')
+    p.add_argument('--mode', choices=MODES, default='zstd')
+    args = parser.parse_args(argv)
+    if args.command == 'compress':
+        compress_tree(args.root, args.mode)
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -17,6 +17,13 @@ import csv
 from datetime import datetime, date
 from bs4 import BeautifulSoup
 import os
+import logging
+import storage
+from log_config import Sampler, setup_logging
+
+logger = logging.getLogger(__name__)
+# 无效/被过滤的ID数量很大，逐条结果只采样输出，完整数量见批次汇总行
+_id_detail = Sampler()
 
 class RecordIdChecker:
     def __init__(self, output_file='valid_record_ids.csv'):
@@ -46,12 +53,11 @@ class RecordIdChecker:
                 # 尝试读取文件，处理NUL字符问题
                 with open(self.output_file, 'r', encoding='utf-8', errors='ignore') as f:
                     content = f.read()
-                    # 移除NUL字符
-                    content = content.replace('\x00', '')
                 
-                # 重新写入清理后的内容
-                with open(self.output_file, 'w', encoding='utf-8') as f:
-                    f.write(content)
+                # 只有确实含NUL字符时才（原子地）重写清理后的内容
+                if '\x00' in content:
+                    with storage.atomic_open(self.output_file, 'w', newline='') as f:
+                        f.write(content.replace('\x00', ''))
                 
                 # 重新读取
                 with open(self.output_file, 'r', encoding='utf-8', newline='') as f:
@@ -112,8 +118,8 @@ class RecordIdChecker:
                         cleaned_item[key] = value
                 cleaned_data.append(cleaned_item)
             
-            # 简化保存逻辑，不使用锁
-            with open(self.output_file, 'w', encoding='utf-8', newline='') as f:
+            # 先写临时文件再替换，中途被杀也不会留下写了一半的CSV
+            with storage.atomic_open(self.output_file, 'w', newline='') as f:
                 print(f"📝 文件创建/打开成功")
                 fieldnames = ['url', 'title_chinese', 'title_english', 'update_date', 'found_time']
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
@@ -125,7 +131,7 @@ class RecordIdChecker:
                 # 写入数据
                 for i, item in enumerate(cleaned_data):
                     writer.writerow(item)
-                    print(f"📊 写入第 {i+1} 条记录: {item['title_chinese']}")
+                    logger.debug(f"📊 写入第 {i+1} 条记录: {item['title_chinese']}")
                 
                 print(f"✅ 全部 {len(cleaned_data)} 条记录保存完成！")
                 
@@ -144,7 +150,7 @@ class RecordIdChecker:
             time_elem = soup.find('p', class_='create-time')
             if time_elem:
                 time_text = time_elem.get_text(strip=True)
-                print(f"🔍 找到时间元素: {time_text}")  # 调试信息
+                logger.debug(f"🔍 找到时间元素: {time_text}")  # 调试信息
                 
                 # 格式1: "更新至2025年9月10日 10:08"
                 date_match = re.search(r'(\d{4})年(\d{1,2})月(\d{1,2})日', time_text)
@@ -178,7 +184,7 @@ class RecordIdChecker:
                 return date(year, month, day)
                 
         except Exception as e:
-            print(f"❌ 时间解析错误: {e}")
+            logger.debug(f"❌ 时间解析错误: {e}")
         
         return None
     
@@ -187,32 +193,32 @@ class RecordIdChecker:
         url = f"https://events.baidu.com/search/vein?platform=pc&record_id={record_id}"
         
         try:
-            print(f"🔍 正在检查 ID: {record_id}")
+            logger.debug(f"🔍 正在检查 ID: {record_id}")
             response = self.session.get(url, timeout=10)
-            print(f"📡 响应状态: {response.status_code}")
+            logger.debug(f"📡 响应状态: {response.status_code}")
             
             if response.status_code == 200:
                 content = response.text
-                print(f"📄 页面内容长度: {len(content)} 字符")
+                logger.debug(f"📄 页面内容长度: {len(content)} 字符")
                 
                 # 检查是否包含事件页面特征
                 if any(keyword in content for keyword in ['更新至', '全部', '时间倒序']):
-                    print(f"✅ ID {record_id} 包含事件页面特征")
+                    logger.debug(f"✅ ID {record_id} 包含事件页面特征")
                     
                     # 提取更新时间
-                    print(f"🕐 开始提取时间...")
+                    logger.debug(f"🕐 开始提取时间...")
                     update_date = self.extract_update_time(content)
-                    print(f"📅 解析到时间: {update_date}")
+                    logger.debug(f"📅 解析到时间: {update_date}")
                     
                     # 时间过滤：只保留2025年1月1日之后的事件
                     if update_date and update_date >= self.min_date:
-                        print(f"✅ 时间符合要求，开始提取标题...")
+                        logger.debug(f"✅ 时间符合要求，开始提取标题...")
                         title = self.extract_title(content)
-                        print(f"📝 提取到标题: {title}")
+                        logger.debug(f"📝 提取到标题: {title}")
                         
-                        print(f"🌐 开始翻译...")
+                        logger.debug(f"🌐 开始翻译...")
                         title_english = self.translate_to_english(title)
-                        print(f"🌐 翻译结果: {title_english}")
+                        logger.debug(f"🌐 翻译结果: {title_english}")
                         
                         result = {
                             'url': url,
@@ -222,25 +228,25 @@ class RecordIdChecker:
                             'found_time': datetime.now().isoformat()
                         }
                         
-                        print(f"💾 添加到新记录列表...")
+                        logger.debug(f"💾 添加到新记录列表...")
                         # 添加到新记录列表，不立即保存
                         self.new_records.append(result)
                         
-                        print(f"✅ ID {record_id} 添加到新记录列表!")
+                        logger.debug(f"✅ ID {record_id} 添加到新记录列表!")
                         return result
                     else:
                         reason = f'时间过旧: {update_date}' if update_date else '无法解析时间'
-                        print(f"⏰ ID {record_id} 时间过滤: {reason}")
+                        logger.debug(f"⏰ ID {record_id} 时间过滤: {reason}")
                     return {
                         'id': record_id,
                             'status': 'filtered',
                             'reason': reason
                     }
                 else:
-                    print(f"❌ ID {record_id} 不包含事件页面特征")
+                    logger.debug(f"❌ ID {record_id} 不包含事件页面特征")
                         
         except Exception as e:
-            print(f"❌ ID {record_id} 请求失败: {e}")
+            logger.debug(f"❌ ID {record_id} 请求失败: {e}")
         
         return {'id': record_id, 'status': 'invalid'}
     
@@ -295,16 +301,18 @@ class RecordIdChecker:
                         
                         if result.get('status') == 'valid':
                             valid_count += 1
-                            print(f"✅ [{total_checked}/{end_id-start_id+1}] 发现有效ID: {result['id']}")
+                            logger.info(f"✅ [{total_checked}/{end_id-start_id+1}] 发现有效ID: {result['id']}")
                         elif result.get('status') == 'filtered':
                             filtered_count += 1
-                            print(f"⏰ [{total_checked}/{end_id-start_id+1}] 时间过滤: {result['id']} - {result['reason']}")
+                            if _id_detail('filtered'):
+                                logger.info(f"⏰ [{total_checked}/{end_id-start_id+1}] 时间过滤: {result['id']} - {result['reason']}")
                         elif result.get('status') == 'invalid':
-                            print(f"❌ [{total_checked}/{end_id-start_id+1}] 无效ID: {result['id']}")
+                            if _id_detail('invalid'):
+                                logger.info(f"❌ [{total_checked}/{end_id-start_id+1}] 无效ID: {result['id']}")
                         else:
                             # 直接保存的结果
                             valid_count += 1
-                            print(f"✅ [{total_checked}/{end_id-start_id+1}] 发现有效ID: {result.get('id', 'unknown')}")
+                            logger.info(f"✅ [{total_checked}/{end_id-start_id+1}] 发现有效ID: {result.get('id', 'unknown')}")
                     
                     # 批次完成，整理排序
                     print(f"🔄 批次完成，开始整理排序...")
@@ -317,23 +325,24 @@ class RecordIdChecker:
             # 串行处理模式（默认）
             print(f"🔄 使用串行处理模式")
             for record_id in range(start_id, end_id + 1):
-                print(f"\n🔄 处理 ID {record_id} ({total_checked + 1}/{end_id-start_id+1})")
+                logger.debug(f"🔄 处理 ID {record_id} ({total_checked + 1}/{end_id-start_id+1})")
                 result = self.check_single_id(record_id)
                 total_checked += 1
                 
                 if 'status' in result:
                     if result['status'] == 'valid':
                         valid_count += 1
-                        print(f"✅ 发现有效ID: {record_id}")
+                        logger.info(f"✅ 发现有效ID: {record_id}")
                     elif result['status'] == 'filtered':
                         filtered_count += 1
-                        print(f"⏰ 时间过滤: {record_id} - {result['reason']}")
-                    else:
-                        print(f"❌ 无效ID: {record_id}")
+                        if _id_detail('filtered'):
+                            logger.info(f"⏰ 时间过滤: {record_id} - {result['reason']}")
+                    elif _id_detail('invalid'):
+                        logger.info(f"❌ 无效ID: {record_id}")
                 else:
                     # 直接保存的结果
                     valid_count += 1
-                    print(f"✅ 发现有效ID: {record_id}")
+                    logger.info(f"✅ 发现有效ID: {record_id}")
         
         print(f"\n🎉 检测完成！")
         print(f"📊 总检测: {total_checked} 个ID")
@@ -398,15 +407,15 @@ class RecordIdChecker:
                         cleaned_item[key] = value
                 cleaned_data.append(cleaned_item)
             
-            # 追加模式写入
-            with open(self.output_file, 'a', encoding='utf-8', newline='') as f:
+            # 追加模式写入（在原文件副本上追加后替换）
+            with storage.atomic_open(self.output_file, append=True, newline='') as f:
                 fieldnames = ['url', 'title_chinese', 'title_english', 'update_date', 'found_time']
                 writer = csv.DictWriter(f, fieldnames=fieldnames)
                 
                 # 写入新数据
                 for i, item in enumerate(cleaned_data):
                     writer.writerow(item)
-                    print(f"📊 追加第 {i+1} 条记录: {item['title_chinese']}")
+                    logger.debug(f"📊 追加第 {i+1} 条记录: {item['title_chinese']}")
                 
                 print(f"✅ 全部 {len(cleaned_data)} 条新记录追加完成！")
             
@@ -451,4 +460,5 @@ def main():
     print(f"\n💾 结果已保存到 valid_record_ids.csv")
 
 if __name__ == "__main__":
+    setup_logging()
     main()
\ No newline at end of file
@@ -10,6 +10,7 @@ import json
 import pandas as pd
 from level1_scraper import Level1Scraper
 from level2_scraper import Level2Scraper
+from log_config import setup_logging
 
 def test_complete_workflow():
     """测试完整工作流程"""
@@ -114,4 +115,5 @@ def verify_files(core_event_name):
         print(f"❌ {excel_file} 不存在")
 
 if __name__ == "__main__":
+    setup_logging()
     test_complete_workflow()
@@ -12,16 +12,10 @@ from level1_scraper import Level1Scraper
 from level2_scraper import Level2Scraper
 from data_manager import DataManager
 import logging
+from log_config import setup_logging
 
-# 配置日志
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(),
-        logging.FileHandler('test_scraper.log', encoding='utf-8')
-    ]
-)
+# 配置日志（控制台 + test_scraper.log）
+setup_logging(log_file='test_scraper.log')
 
 def test_scraper():
     """测试修复后的爬虫"""
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""失败分类、退避时间与延迟重试队列的测试"""
+
+import pytest
+
+from failures import (FAIL_BLOCKED, FAIL_DRIVER_CRASH, FAIL_OTHER, FAIL_PARSE_EMPTY, FAIL_TIMEOUT, RetryQueue,
+                      backoff_seconds, classify_exception, has_comment_section, is_blocked)
+
+
+class TimeoutException(Exception):
+    pass
+
+
+class InvalidSessionIdException(Exception):
+    pass
+
+
+@pytest.mark.parametrize('exc, expected', [
+    (TimeoutException('page load'), FAIL_TIMEOUT),
+    (Exception('timeout: Timed out receiving message from renderer'), FAIL_TIMEOUT),
+    (InvalidSessionIdException('x'), FAIL_DRIVER_CRASH),
+    (ConnectionRefusedError(111, 'refused'), FAIL_DRIVER_CRASH),
+    (Exception('Message: invalid session id'), FAIL_DRIVER_CRASH),
+    (ValueError('bad value'), FAIL_OTHER),
+    # 信息中只是提到 timeout 的不算超时；同时带有失联特征时按 driver_crash
+    (ValueError('invalid timeout value'), FAIL_OTHER),
+    (Exception('Message: invalid session id (timeout while waiting)'), FAIL_DRIVER_CRASH),
+    (Exception("Max retries exceeded with url: /session (Caused by ReadTimeoutError('Read timed out.'))"),
+     FAIL_DRIVER_CRASH),
+    (Exception('Message: timeout: Timed out receiving message from renderer: 10.000'), FAIL_TIMEOUT),
+    (Exception('timeout: cannot determine loading status'), FAIL_TIMEOUT),
+])
+def test_classify_exception(exc, expected):
+    assert classify_exception(exc) == expected
+
+
+def test_blocked_and_comment_section_markers():
+    assert is_blocked('https://wappass.baidu.com/static/captcha/tuxing.html')
+    assert is_blocked('https://baijiahao.baidu.com/s?id=1', '<title>百度安全验证</title>')
+    assert not is_blocked('https://baijiahao.baidu.com/s?id=1', '<div class="xcp-item"></div>')
+    assert has_comment_section('<div class="xcp-list"></div>')
+    assert not has_comment_section('<div class="article"></div>')
+
+
+def test_backoff_doubles_and_is_capped(monkeypatch):
+    monkeypatch.setattr('failures.random.uniform', lambda a, b: 1.0)
+    assert [backoff_seconds(n, base=10, cap=60) for n in (1, 2, 3, 4, 5)] == [10, 20, 40, 60, 60]
+    monkeypatch.undo()
+    for _ in range(50):
+        assert 8 <= backoff_seconds(1, base=10, cap=60) <= 12  # ±20% 抖动
+
+
+def _fake_clock(monkeypatch):
+    """让 RetryQueue 使用可控时钟：sleep 推进时间并记录等待时长"""
+    now = [1000.0]
+    waits = []
+    monkeypatch.setattr('failures.time.time', lambda: now[0])
+    monkeypatch.setattr('failures.random.uniform', lambda a, b: 1.0)
+
+    def sleep(seconds):
+        waits.append(round(seconds, 3))
+        now[0] += seconds
+
+    return sleep, waits
+
+
+def test_retry_queue_recovers_with_backoff(monkeypatch):
+    sleep, waits = _fake_clock(monkeypatch)
+    queue = RetryQueue(max_attempts=3, base_seconds=10, max_seconds=100)
+    assert queue.push('a', 'payload-a', FAIL_TIMEOUT)
+    assert queue.push('b', 'payload-b', FAIL_BLOCKED)
+    assert len(queue) == 2
+
+    outcomes = {'payload-a': [None], 'payload-b': [FAIL_BLOCKED, None]}
+    handled = []
+
+    def handler(payload):
+        handled.append(payload)
+        return outcomes[payload].pop(0)
+
+    assert queue.drain(handler, sleep=sleep) == (2, 0)
+    assert handled == ['payload-a', 'payload-b', 'payload-b']
+    # a、b 都在 10s 后到期；b 第二次失败后等待 20s
+    assert waits == [10.0, 20.0]
+    assert queue.summary() == {'recovered': 2, 'gave_up': {}, 'attempts': 3}
+
+
+def test_retry_queue_gives_up(monkeypatch):
+    sleep, waits = _fake_clock(monkeypatch)
+    queue = RetryQueue(max_attempts=3, base_seconds=1, max_seconds=100)
+    assert not queue.push('x', 'px', FAIL_OTHER)  # 不可重试的类别直接放弃
+    assert queue.push('y', 'py', FAIL_PARSE_EMPTY)
+
+    assert queue.drain(lambda payload: FAIL_DRIVER_CRASH, sleep=sleep) == (0, 2)
+    assert queue.attempts == {'x': 1, 'y': 3}
+    assert queue.gave_up == {'x': FAIL_OTHER, 'y': FAIL_DRIVER_CRASH}
+    assert queue.failures['y'] == [FAIL_PARSE_EMPTY, FAIL_DRIVER_CRASH, FAIL_DRIVER_CRASH]
+    assert waits == [1.0, 2.0]
+    assert len(queue) == 0
@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+"""FetchRouter 成功率统计：按成功率跳过静态抓取，多进程保存时合并累加"""
+
+import json
+import multiprocessing
+
+import pytest
+
+pytest.importorskip('requests')
+pytest.importorskip('bs4')
+
+from fetch_router import FetchRouter  # noqa: E402
+
+
+def test_low_success_rate_routes_to_browser_with_probes(tmp_path):
+    router = FetchRouter(stats_file=str(tmp_path / 'stats.json'), min_samples=3, min_success_rate=0.5, probe_every=4)
+    url = 'https://baijiahao.baidu.com/s?id=1'
+    for ok in (False, False, False):
+        assert router.should_try_static(url, 'article')
+        router._record(router._key(url, 'article'), ok)
+    decisions = [router.should_try_static(url, 'article') for _ in range(8)]
+    assert decisions == [False, False, False, True] * 2
+    # 其他主机/页面类型不受影响
+    assert router.should_try_static('https://events.baidu.com/x', 'article')
+    assert router.should_try_static(url, 'timeline')
+    assert not FetchRouter(stats_file=str(tmp_path / 'other.json'), mode='browser').should_try_static(url, 'article')
+
+
+def _record_and_save(stats_file, worker, rounds):
+    router = FetchRouter(stats_file=stats_file, save_every=1)
+    for i in range(rounds):
+        router._record(f'host{worker % 2}|article', i % 2 == 0)
+    router.save()
+
+
+def test_concurrent_saves_accumulate(tmp_path):
+    stats_file = str(tmp_path / 'stats.json')
+    workers, rounds = 4, 30
+    ctx = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods() else 'spawn')
+    procs = [ctx.Process(target=_record_and_save, args=(stats_file, w, rounds)) for w in range(workers)]
+    for p in procs:
+        p.start()
+    for p in procs:
+        p.join(timeout=60)
+        assert p.exitcode == 0
+    with open(stats_file, encoding='utf-8') as f:
+        stats = json.load(f)
+    assert sum(entry['attempts'] for entry in stats.values()) == workers * rounds
+    assert stats['host0|article']['static_ok'] == stats['host1|article']['static_ok'] == rounds
@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+"""OnlineTranslationService 对本地替身服务（LibreTranslate 风格）的测试"""
+
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from online_translate import OnlineTranslationService
+
+
+class StubTranslateServer:
+    """本地替身翻译服务：记录每个请求的原文和时间；failures[原文] 为依次返回的错误状态码"""
+
+    def __init__(self, delay=0.0, failures=None):
+        self.delay = delay
+        self.failures = {text: list(codes) for text, codes in (failures or {}).items()}
+        self.requests = []
+        self._lock = threading.Lock()
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers['Content-Length'])).decode('utf-8'))
+                text = body['q']
+                with stub._lock:
+                    stub.requests.append((text, time.monotonic()))
+                    codes = stub.failures.get(text)
+                    code = codes.pop(0) if codes else 200
+                if stub.delay:
+                    time.sleep(stub.delay)
+                payload = json.dumps({'translatedText': f'EN:{text}'} if code == 200 else {'error': code}).encode('utf-8')
+                self.send_response(code)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.endpoint = f'http://127.0.0.1:{self.server.server_address[1]}/translate'
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def texts(self):
+        return [text for text, _ in self.requests]
+
+    def times(self, text=None):
+        return [ts for t, ts in self.requests if text is None or t == text]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def make_service():
+    created = []
+
+    def factory(server_kwargs=None, **service_kwargs):
+        server = StubTranslateServer(**(server_kwargs or {}))
+        service_kwargs.setdefault('rate', 0)
+        service = OnlineTranslationService(engines=['http'], endpoint=server.endpoint, timeout=5, **service_kwargs)
+        created.append((server, service))
+        return server, service
+
+    yield factory
+    for server, service in created:
+        service.close()
+        server.close()
+
+
+def test_duplicate_titles_sent_once(make_service):
+    server, service = make_service({'delay': 0.2}, max_workers=4)
+    results = service.translate_many(['标题一', '标题一', '标题二', '标题一'])
+    assert results == {'标题一': 'EN:标题一', '标题二': 'EN:标题二'}
+    assert sorted(server.texts()) == ['标题一', '标题二']
+
+    # 同一标题正在翻译时，并发的重复请求等待同一个结果
+    futures = [service.submit('标题三') for _ in range(3)]
+    assert len({id(f) for f in futures}) == 1
+    assert futures[0].result() == 'EN:标题三'
+    assert server.texts().count('标题三') == 1
+
+
+def test_token_bucket_spaces_requests(make_service):
+    server, service = make_service(max_workers=4, rate=10, burst=1)
+    texts = [f'标题{i}' for i in range(5)]
+    results = service.translate_many(texts)
+    assert all(results[text] == f'EN:{text}' for text in texts)
+    times = sorted(server.times())
+    assert len(times) == 5
+    # 每秒 10 个令牌、桶容量 1：首个请求立即发出，其后约每 0.1 秒一个
+    assert times[-1] - times[0] >= 0.35
+    assert min(b - a for a, b in zip(times, times[1:])) >= 0.05
+
+
+def test_transient_errors_retried_with_backoff(make_service):
+    server, service = make_service({'failures': {'限流': [429], '故障': [503, 500]}}, retries=2, backoff=0.1)
+    assert service.translate('限流') == 'EN:限流'
+    assert service.translate('故障') == 'EN:故障'
+    assert server.texts().count('限流') == 2
+    times = server.times('故障')
+    assert len(times) == 3
+    # 指数退避：第一次等待约 backoff，第二次约 2 * backoff
+    assert times[1] - times[0] >= 0.09
+    assert times[2] - times[1] >= 0.18
+
+
+def test_gives_up_after_retries(make_service):
+    server, service = make_service({'failures': {'一直失败': [429, 503, 500]}}, retries=2, backoff=0.05)
+    assert service.translate_many(['一直失败', '正常']) == {'一直失败': None, '正常': 'EN:正常'}
+    # 首次请求 + 2 次重试后放弃
+    assert server.texts().count('一直失败') == 3
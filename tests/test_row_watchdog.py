@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""行级看门狗：单页截止时间只覆盖导航和展开，行截止时间覆盖整行"""
+
+import subprocess
+import sys
+import time
+import types
+
+import pytest
+
+import process_tree
+from row_watchdog import PAGE_TIMEOUT, ROW_TIMEOUT, RowTimeout, Watchdog
+
+
+class FakeDriver:
+    """只提供 service.process.pid 的驱动替身，进程是一个长时间 sleep 的子进程"""
+
+    def __init__(self):
+        self.process = subprocess.Popen([sys.executable, '-c', 'import time; time.sleep(60)'])
+        self.service = types.SimpleNamespace(process=self.process)
+
+    def close(self):
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.wait()
+
+
+@pytest.fixture
+def driver():
+    d = FakeDriver()
+    yield d
+    d.close()
+
+
+def test_disarmed_page_does_not_time_out(driver):
+    wd = Watchdog(page_timeout=0.5, poll_interval=0.05)
+    with wd.row(1):
+        wd.arm_page(driver, 'article')
+        wd.disarm_page()
+        time.sleep(0.8)  # 导航结束后的解析、等待、静态抓取
+    assert wd.expired is None and wd.timeouts == 0
+    assert driver.process.poll() is None
+
+
+def test_armed_page_times_out_and_kills_browser(driver):
+    wd = Watchdog(page_timeout=0.3, poll_interval=0.05)
+    with pytest.raises(RowTimeout) as info:
+        with wd.row(2):
+            wd.arm_page(driver, 'article')
+            driver.process.wait(timeout=5)  # 卡在导航中，直到看门狗结束进程
+    assert info.value.reason == PAGE_TIMEOUT
+    assert driver.process.returncode is not None
+    assert wd.timeouts == 1
+
+    # 下一行重新计时
+    with wd.row(3):
+        pass
+    assert wd.expired is None
+
+
+def test_row_deadline_still_applies_after_disarm():
+    wd = Watchdog(row_timeout=0.3, page_timeout=10, poll_interval=0.05)
+    with pytest.raises(RowTimeout) as info:
+        with wd.row(4):
+            wd.arm_page(None, 'timeline')
+            wd.disarm_page()
+            time.sleep(0.5)
+    assert info.value.reason == ROW_TIMEOUT
+
+
+def _alive(pid):
+    """进程仍在运行（已退出但未被回收的僵尸进程视为已结束）"""
+    try:
+        with open(f'/proc/{pid}/stat') as f:
+            return f.read().rsplit(')', 1)[1].split()[0] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason='通过 /proc 检查孙进程状态')
+@pytest.mark.parametrize('use_psutil', [True, False])
+def test_kill_process_tree_kills_grandchildren(monkeypatch, use_psutil):
+    if use_psutil:
+        pytest.importorskip('psutil')
+    else:
+        monkeypatch.setattr(process_tree, 'psutil', None)
+    # 模拟 chromedriver -> Chrome：子进程再启动一个孙进程并输出其 pid
+    parent = subprocess.Popen([sys.executable, '-c',
+                               'import subprocess, sys, time\n'
+                               'child = subprocess.Popen([sys.executable, "-c", "import time; time.sleep(60)"])\n'
+                               'print(child.pid, flush=True)\n'
+                               'time.sleep(60)'],
+                              stdout=subprocess.PIPE, universal_newlines=True)
+    try:
+        grandchild = int(parent.stdout.readline())
+        assert _alive(grandchild)
+        assert process_tree.kill_process_tree(parent.pid) >= 2
+        parent.wait(timeout=5)
+        deadline = time.time() + 5
+        while _alive(grandchild) and time.time() < deadline:
+            time.sleep(0.05)
+        assert not _alive(grandchild)
+    finally:
+        if parent.poll() is None:
+            parent.kill()
+        parent.stdout.close()
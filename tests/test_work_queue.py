@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""WorkQueue 租约领取、过期接管与失败重排队的测试"""
+
+import threading
+import time
+
+import pytest
+
+from work_queue import ROW_DONE, ROW_FAILED, ROW_LEASED, ROW_PENDING, WorkQueue
+
+
+def _tasks(n):
+    return [{'seq': i, 'idx': i + 1, 'url': f'https://example.com/{i}', 'score': 0.0} for i in range(1, n + 1)]
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'queue.db')
+
+
+def test_claim_leases_each_row_once(db_path):
+    a = WorkQueue(db_path, worker_id='a', lease_seconds=60)
+    b = WorkQueue(db_path, worker_id='b', lease_seconds=60)
+    assert a.add_tasks(_tasks(3)) == 3
+    assert a.add_tasks(_tasks(3)) == 0  # 已存在的行不重复加入
+
+    claimed = [a.claim(), b.claim(), a.claim()]
+    assert sorted(t['seq'] for t in claimed) == [1, 2, 3]
+    assert a.claim() is None and b.claim() is None
+    stats = a.stats()
+    assert stats[ROW_LEASED] == 3 and stats['workers'] == {'a': 2, 'b': 1}
+
+    assert a.complete(claimed[0]['seq'], comments=5)
+    assert not a.complete(claimed[1]['seq'])  # 不属于 a 的租约不更新
+    assert a.stats()[ROW_DONE] == 1 and a.stats()['comments'] == 5
+
+
+def test_expired_lease_is_reclaimed(db_path):
+    crashed = WorkQueue(db_path, worker_id='crashed', lease_seconds=0.2)
+    survivor = WorkQueue(db_path, worker_id='survivor', lease_seconds=60)
+    crashed.add_tasks(_tasks(1))
+    assert crashed.claim()['attempt'] == 1
+    assert survivor.claim() is None
+
+    time.sleep(0.3)
+    task = survivor.claim()
+    assert task['seq'] == 1 and task['attempt'] == 2
+    # 原 worker 的迟到结果不覆盖接管后的状态
+    assert not crashed.complete(1)
+    assert survivor.complete(1)
+
+
+def test_heartbeat_keeps_lease(db_path):
+    owner = WorkQueue(db_path, worker_id='owner', lease_seconds=0.3)
+    other = WorkQueue(db_path, worker_id='other', lease_seconds=60)
+    owner.add_tasks(_tasks(1))
+    owner.claim()
+    for _ in range(3):
+        time.sleep(0.15)
+        assert owner.heartbeat(1)
+    assert other.claim() is None
+
+
+def test_expired_lease_at_max_attempts_fails(db_path):
+    q = WorkQueue(db_path, worker_id='w', lease_seconds=0.1, max_attempts=2)
+    q.add_tasks(_tasks(1))
+    q.claim()
+    time.sleep(0.15)
+    assert q.claim()['attempt'] == 2
+    time.sleep(0.15)
+    assert q.claim() is None
+    stats = q.stats()
+    assert stats[ROW_FAILED] == 1 and stats['errors'] == {'lease_expired': 1}
+
+
+def test_fail_requeues_with_delay_until_max_attempts(db_path):
+    q = WorkQueue(db_path, worker_id='w', lease_seconds=60, max_attempts=2)
+    q.add_tasks(_tasks(1))
+    q.claim()
+    assert q.fail(1, 'timeout', delay=0.2)
+    assert q.claim() is None
+    assert 0 < q.next_retry_in() <= 0.2
+    time.sleep(0.25)
+    assert q.claim()['attempt'] == 2
+    q.fail(1, 'timeout')
+    assert q.stats()[ROW_FAILED] == 1 and q.next_retry_in() is None
+
+    assert q.requeue() == 1
+    assert q.stats()[ROW_PENDING] == 1 and q.claim()['attempt'] == 1
+
+
+def test_iter_claims_waits_for_crashed_workers_lease(db_path):
+    crashed = WorkQueue(db_path, worker_id='crashed', lease_seconds=0.5)
+    survivor = WorkQueue(db_path, worker_id='survivor', lease_seconds=60)
+    crashed.add_tasks(_tasks(2))
+    crashed.claim()  # 领取后不再续租、不回写，模拟 worker 崩溃
+
+    seen = []
+    for task in survivor.iter_claims(max_wait=0.2):
+        seen.append(task['seq'])
+        survivor.complete(task['seq'])
+    assert sorted(seen) == [1, 2]
+    assert survivor.stats()[ROW_DONE] == 2
+
+
+def test_iter_claims_returns_when_other_worker_finishes(db_path):
+    other = WorkQueue(db_path, worker_id='other', lease_seconds=60)
+    idle = WorkQueue(db_path, worker_id='idle', lease_seconds=60)
+    other.add_tasks(_tasks(1))
+    other.claim()
+    threading.Timer(0.3, other.complete, args=(1,)).start()
+
+    start = time.time()
+    assert list(idle.iter_claims(max_wait=0.1)) == []
+    assert time.time() - start >= 0.3
@@ -0,0 +1,88 @@
+import json
+import os
+import sqlite3
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# 旧版整文件JSON缓存，首次打开空库时自动导入
+LEGACY_JSON_PATH = "translation_cache.json"
+DEFAULT_DB_PATH = "translation_cache.sqlite3"
+
+
+class TranslationCacheStore:
+    """基于SQLite（WAL模式）的翻译缓存：按条写入、批量提交，记录来源文本、引擎和时间"""
+
+    def __init__(self, path: str = DEFAULT_DB_PATH, commit_every: int = 500,
+                 legacy_json: Optional[str] = LEGACY_JSON_PATH) -> None:
+        self.path = path
+        self.commit_every = max(1, commit_every)
+        self._pending: List[Tuple[str, str, str, str]] = []
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS translations ("
+            " source TEXT PRIMARY KEY,"
+            " target TEXT NOT NULL,"
+            " engine TEXT NOT NULL DEFAULT '',"
+            " updated_at TEXT NOT NULL)"
+        )
+        self._conn.commit()
+        if legacy_json:
+            self._import_legacy_json(legacy_json)
+
+    def _import_legacy_json(self, json_path: str) -> None:
+        if not os.path.exists(json_path):
+            return
+        if self._conn.execute("SELECT 1 FROM translations LIMIT 1").fetchone():
+            return
+        try:
+            with open(json_path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            return
+        if isinstance(data, dict):
+            self.put_many((str(k), str(v), 'legacy_json') for k, v in data.items())
+            self.flush()
+
+    def load_all(self) -> Dict[str, str]:
+        return dict(self._conn.execute("SELECT source, target FROM translations"))
+
+    def get(self, source: str) -> Optional[str]:
+        for pending_source, target, _engine, _ts in reversed(self._pending):
+            if pending_source == source:
+                return target
+        row = self._conn.execute("SELECT target FROM translations WHERE source = ?", (source,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, source: str, target: str, engine: str = '') -> None:
+        now = datetime.now().isoformat(timespec='seconds')
+        self._pending.append((source, target, engine, now))
+        if len(self._pending) >= self.commit_every:
+            self.flush()
+
+    def put_many(self, items: Iterable[Tuple[str, str, str]]) -> None:
+        for source, target, engine in items:
+            self.put(source, target, engine)
+
+    def flush(self) -> None:
+        """把未提交的条目在一个事务中写入"""
+        if not self._pending:
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO translations (source, target, engine, updated_at) VALUES (?, ?, ?, ?)",
+                self._pending,
+            )
+        self._pending = []
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+    def __enter__(self) -> "TranslationCacheStore":
+        return self
+
+    def __exit__(self, *exc) -> bool:
+        self.close()
+        return False
@@ -0,0 +1,297 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+百度事件评论爬虫 - 多节点共享任务队列
+把输入CSV的行放进共享盘上的 SQLite 数据库，各节点的 worker 以限时租约领取行：
+- claim() 领取一行并加租约，处理期间后台线程定时 heartbeat() 续租
+- complete()/fail() 回写结果和状态；失败的行在 max_attempts 次以内带退避时间重新排队
+- worker 崩溃后租约到期，该行自动被其他 worker 重新领取，无需手工划分 --start-row/--end-row
+共享盘（NFS/SMB）上 SQLite 自身的文件锁不可靠，所有事务另外在 <db>.lock 上加独占文件锁，并且不使用 WAL
+
+    python cli.py queue add urls.csv --db /shared/queue.db --order priority
+    python cli.py batch --queue /shared/queue.db          # 每个节点各启动若干个
+    python cli.py queue status --db /shared/queue.db
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import logging
+from contextlib import contextmanager
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import fcntl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_DB = os.path.join('data_BAI_DU', '_queue', 'queue.db')
+
+# 行状态
+ROW_PENDING = 'pending'
+ROW_LEASED = 'leased'
+ROW_DONE = 'done'
+ROW_FAILED = 'failed'
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    seq INTEGER PRIMARY KEY,
+    idx INTEGER NOT NULL,
+    url TEXT NOT NULL,
+    update_date TEXT,
+    priority REAL NOT NULL DEFAULT 0,
+    status TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    comments INTEGER,
+    error TEXT,
+    updated_at REAL,
+    available_at REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS rows_claim ON rows (status, priority DESC, idx);
+"""
+
+
+def _lock_file(fh):
+    """阻塞式独占锁（Windows 的 LK_LOCK 每秒重试一次，共 10 次，这里循环直到成功）"""
+    if os.name == 'nt':
+        while True:
+            try:
+                fh.seek(0)
+                msvcrt.locking(fh.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    fcntl.flock(fh.fileno(), fcntl.LOCK_EX)
+
+
+def _unlock_file(fh):
+    try:
+        if os.name == 'nt':
+            fh.seek(0)
+            msvcrt.locking(fh.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            fcntl.flock(fh.fileno(), fcntl.LOCK_UN)
+    except OSError:
+        pass
+
+
+class WorkQueue:
+    def __init__(self, db_path=DEFAULT_QUEUE_DB, worker_id=None, lease_seconds=600, max_attempts=3):
+        from metrics import default_worker_id
+
+        self.db_path = db_path
+        self.lock_path = db_path + '.lock'
+        self.worker_id = worker_id or default_worker_id()
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        with self._transaction() as conn:
+            for statement in _SCHEMA.split(';'):
+                if statement.strip():
+                    conn.execute(statement)
+            columns = {row[1] for row in conn.execute('PRAGMA table_info(rows)')}
+            if 'available_at' not in columns:  # 旧版本创建的队列
+                conn.execute('ALTER TABLE rows ADD COLUMN available_at REAL NOT NULL DEFAULT 0')
+
+    @contextmanager
+    def _transaction(self):
+        """文件锁 + 单次连接的事务；每次操作重新连接，避免共享盘上读到其他节点写入前的缓存页"""
+        with open(self.lock_path, 'a+b') as lock_fh:
+            _lock_file(lock_fh)
+            try:
+                conn = sqlite3.connect(self.db_path, timeout=30, isolation_level=None)
+                try:
+                    conn.execute('PRAGMA journal_mode=DELETE')
+                    conn.execute('BEGIN IMMEDIATE')
+                    try:
+                        yield conn
+                        conn.execute('COMMIT')
+                    except BaseException:
+                        conn.execute('ROLLBACK')
+                        raise
+                finally:
+                    conn.close()
+            finally:
+                _unlock_file(lock_fh)
+
+    def add_tasks(self, tasks):
+        """加入 RowScheduler.load_rows()/order() 生成的行；已存在的序号保持原状态，返回新加入的行数"""
+        now = time.time()
+        with self._transaction() as conn:
+            before = conn.total_changes
+            conn.executemany(
+                'INSERT OR IGNORE INTO rows (seq, idx, url, update_date, priority, updated_at) VALUES (?, ?, ?, ?, ?, ?)',
+                [(t['seq'], t['idx'], t['url'], t['update_date'].isoformat() if t.get('update_date') else None,
+                  t.get('score', 0.0), now) for t in tasks])
+            return conn.total_changes - before
+
+    def add_csv(self, csv_path, start_row=2, end_row=None, order='file', budget=None):
+        """读取CSV并加入队列；order='priority' 时按调度器得分排定领取顺序"""
+        from scheduler import RowScheduler
+
+        scheduler = RowScheduler()
+        tasks = scheduler.load_rows(csv_path, start_row, end_row)
+        if order == 'priority':
+            tasks = scheduler.order(tasks, budget=budget)
+        elif budget is not None:
+            tasks = tasks[:budget]
+        added = self.add_tasks(tasks)
+        logger.info(f"队列 {self.db_path}：读取 {len(tasks)} 行，新加入 {added} 行")
+        return added
+
+    def claim(self):
+        """领取一行（优先级高、行号小的待处理行，或租约已过期的行），没有可领取的行返回 None"""
+        now = time.time()
+        with self._transaction() as conn:
+            # 过期租约已达最大尝试次数的行不再重新发放
+            conn.execute("UPDATE rows SET status = ?, error = 'lease_expired', worker = NULL, lease_expires = NULL, "
+                         "updated_at = ? WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+                         (ROW_FAILED, now, ROW_LEASED, now, self.max_attempts))
+            row = conn.execute('SELECT seq, idx, url, update_date, priority, status, worker, attempts FROM rows '
+                               'WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires < ?) '
+                               'ORDER BY priority DESC, idx LIMIT 1',
+                               (ROW_PENDING, now, ROW_LEASED, now)).fetchone()
+            if row is None:
+                return None
+            seq, idx, url, update_date, priority, status, previous_worker, attempts = row
+            conn.execute('UPDATE rows SET status = ?, worker = ?, lease_expires = ?, attempts = attempts + 1, '
+                         'updated_at = ? WHERE seq = ?',
+                         (ROW_LEASED, self.worker_id, now + self.lease_seconds, now, seq))
+        if status == ROW_LEASED:
+            logger.warning(f"序号 {seq} 的租约已过期（原 worker: {previous_worker}），重新领取")
+        return {'idx': idx, 'seq': seq, 'url': url, 'update_date': update_date, 'score': priority,
+                'attempt': attempts + 1}
+
+    def next_retry_in(self):
+        """
+        距最早一行可能被领取还有多少秒（已到期返回 0）：待处理行看 available_at，处理中的行看租约到期时间
+        （持有者崩溃时到期后由本 worker 接管）；没有待处理或处理中的行返回 None
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            earliest = conn.execute('SELECT MIN(CASE WHEN status = ? THEN available_at ELSE lease_expires END) '
+                                    'FROM rows WHERE status IN (?, ?)',
+                                    (ROW_PENDING, ROW_PENDING, ROW_LEASED)).fetchone()[0]
+        return None if earliest is None else max(earliest - now, 0)
+
+    def iter_claims(self, max_wait=60):
+        """
+        逐行领取直到队列中没有待处理或处理中的行；只剩延迟重试的行或其他 worker 租约中的行时，
+        每隔最多 max_wait 秒再试一次（对方续租则继续等待，崩溃则在租约到期后接管）
+        """
+        while True:
+            task = self.claim()
+            if task is not None:
+                yield task
+                continue
+            wait = self.next_retry_in()
+            if wait is None:
+                return
+            logger.info(f"队列中只剩延迟重试或其他 worker 处理中的行，{min(wait, max_wait):.0f}s 后再领取")
+            time.sleep(min(wait, max_wait) + 0.1)
+
+    def heartbeat(self, seq):
+        """续租；租约已被其他 worker 接管时返回 False"""
+        now = time.time()
+        with self._transaction() as conn:
+            cursor = conn.execute('UPDATE rows SET lease_expires = ?, updated_at = ? '
+                                  'WHERE seq = ? AND worker = ? AND status = ?',
+                                  (now + self.lease_seconds, now, seq, self.worker_id, ROW_LEASED))
+            return cursor.rowcount == 1
+
+    def complete(self, seq, comments=0):
+        return self._finish(seq, ROW_DONE, comments=comments)
+
+    def fail(self, seq, error, retry=True, delay=0):
+        """记录失败；retry 且尝试次数未达上限时 delay 秒后重新可领取，否则标记为 failed"""
+        return self._finish(seq, ROW_FAILED, error=error, retry=retry, delay=delay)
+
+    def _finish(self, seq, status, comments=None, error=None, retry=False, delay=0):
+        now = time.time()
+        with self._transaction() as conn:
+            row = conn.execute('SELECT worker, status, attempts FROM rows WHERE seq = ?', (seq,)).fetchone()
+            if row is None:
+                return False
+            worker, current, attempts = row
+            if worker != self.worker_id or current != ROW_LEASED:
+                # 租约过期后已被其他 worker 接管：本次结果仍写在输出目录里，但不覆盖队列状态
+                logger.warning(f"序号 {seq} 的租约已不属于本 worker（当前 {worker}/{current}），不更新队列状态")
+                return False
+            if status == ROW_FAILED and retry and attempts < self.max_attempts:
+                status = ROW_PENDING
+            conn.execute('UPDATE rows SET status = ?, worker = NULL, lease_expires = NULL, comments = ?, error = ?, '
+                         'updated_at = ?, available_at = ? WHERE seq = ?',
+                         (status, comments, error, now, now + delay if status == ROW_PENDING else 0, seq))
+            return True
+
+    def requeue(self, statuses=(ROW_FAILED,)):
+        """把指定状态的行重新置为待处理并清零尝试次数，返回行数"""
+        now = time.time()
+        marks = ','.join('?' * len(statuses))
+        with self._transaction() as conn:
+            cursor = conn.execute(f'UPDATE rows SET status = ?, worker = NULL, lease_expires = NULL, attempts = 0, '
+                                  f'error = NULL, updated_at = ?, available_at = 0 WHERE status IN ({marks})',
+                                  (ROW_PENDING, now, *statuses))
+            return cursor.rowcount
+
+    def stats(self):
+        now = time.time()
+        with self._transaction() as conn:
+            counts = dict(conn.execute('SELECT status, COUNT(*) FROM rows GROUP BY status').fetchall())
+            expired = conn.execute('SELECT COUNT(*) FROM rows WHERE status = ? AND lease_expires < ?',
+                                   (ROW_LEASED, now)).fetchone()[0]
+            workers = conn.execute('SELECT worker, COUNT(*) FROM rows WHERE status = ? AND lease_expires >= ? '
+                                   'GROUP BY worker', (ROW_LEASED, now)).fetchall()
+            comments = conn.execute('SELECT COALESCE(SUM(comments), 0) FROM rows WHERE status = ?',
+                                    (ROW_DONE,)).fetchone()[0]
+            errors = conn.execute('SELECT error, COUNT(*) FROM rows WHERE status = ? GROUP BY error',
+                                  (ROW_FAILED,)).fetchall()
+        return {
+            'total': sum(counts.values()),
+            **{status: counts.get(status, 0) for status in (ROW_PENDING, ROW_LEASED, ROW_DONE, ROW_FAILED)},
+            'expired_leases': expired,
+            'workers': dict(workers),
+            'comments': comments,
+            'errors': dict(errors),
+        }
+
+    def remaining(self):
+        s = self.stats()
+        return s[ROW_PENDING] + s[ROW_LEASED]
+
+    @contextmanager
+    def lease(self, seq):
+        """处理一行期间在后台线程中每 lease_seconds/3 秒续租一次"""
+        stop = threading.Event()
+        interval = max(self.lease_seconds / 3, 1)
+
+        def renew():
+            while not stop.wait(interval):
+                try:
+                    if not self.heartbeat(seq):
+                        logger.warning(f"序号 {seq} 续租失败：租约已被其他 worker 接管")
+                        return
+                except Exception as e:
+                    logger.warning(f"序号 {seq} 续租出错: {e}")
+
+        thread = threading.Thread(target=renew, name=f'lease-{seq}', daemon=True)
+        thread.start()
+        try:
+            yield
+        finally:
+            stop.set()
+            thread.join(timeout=5)
+
+
+def print_queue_status(db_path=DEFAULT_QUEUE_DB):
+    s = WorkQueue(db_path).stats()
+    print(f"📋 队列 {db_path}：共 {s['total']} 行，待处理 {s[ROW_PENDING]}，处理中 {s[ROW_LEASED]}"
+          f"（租约过期 {s['expired_leases']}），完成 {s[ROW_DONE]}，失败 {s[ROW_FAILED]}，评论 {s['comments']}")
+    for worker, count in sorted(s['workers'].items()):
+        print(f"  🔧 {worker}: 处理中 {count} 行")
+    for error, count in sorted(s['errors'].items(), key=lambda item: -item[1]):
+        print(f"  ❌ {error}: {count} 行")